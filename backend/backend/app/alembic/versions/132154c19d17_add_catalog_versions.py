@@ -0,0 +1,31 @@
+"""add catalog versions
+
+Revision ID: 132154c19d17
+Revises: 43a51b3f2f33
+Create Date: 2026-10-18 10:03:17.204981
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '132154c19d17'
+down_revision = '43a51b3f2f33'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'catalog_versions',
+        sa.Column('name', sqlmodel.sql.sqltypes.AutoString(length=50), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('name'),
+    )
+    op.execute("INSERT INTO catalog_versions (name, version) VALUES ('ingredients', 1)")
+
+
+def downgrade():
+    op.drop_table('catalog_versions')
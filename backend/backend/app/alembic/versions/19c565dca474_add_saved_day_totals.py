@@ -0,0 +1,53 @@
+"""add saved day totals
+
+Revision ID: 19c565dca474
+Revises: f374b40f7939
+Create Date: 2026-10-18 13:20:41.557102
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '19c565dca474'
+down_revision = 'f374b40f7939'
+branch_labels = None
+depends_on = None
+
+# saved_days column -> key in the frontend's day_plan.total_nutrition
+TOTALS = {
+    'total_calories': 'calories',
+    'total_protein': 'protein',
+    'total_carbohydrates': 'carbs',
+    'total_fat': 'fat',
+    'total_fiber': 'fiber',
+    'total_sodium': 'sodium',
+}
+
+
+def upgrade():
+    for column in TOTALS:
+        op.add_column(
+            'saved_days',
+            sa.Column(column, sa.Float(), nullable=False, server_default='0'),
+        )
+    # Existing plans keep the totals the client computed until they are saved
+    # again, which recomputes them server-side
+    for column, key in TOTALS.items():
+        op.execute(
+            f"""
+            UPDATE saved_days
+            SET {column} = (day_plan::jsonb #>> '{{total_nutrition,{key}}}')::float
+            WHERE jsonb_typeof(day_plan::jsonb #> '{{total_nutrition,{key}}}') = 'number'
+            """
+        )
+    op.create_index(
+        'ix_saved_days_total_calories_id', 'saved_days', ['total_calories', 'id']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_saved_days_total_calories_id', table_name='saved_days')
+    for column in reversed(TOTALS):
+        op.drop_column('saved_days', column)
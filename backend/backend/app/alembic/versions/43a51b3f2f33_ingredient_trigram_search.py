@@ -0,0 +1,71 @@
+"""ingredient trigram search
+
+Revision ID: 43a51b3f2f33
+Revises: nutrition_2025_11_15
+Create Date: 2026-10-18 09:12:41.513208
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '43a51b3f2f33'
+down_revision = 'nutrition_2025_11_15'
+branch_labels = None
+depends_on = None
+
+
+# Lowercase, strip Latin accents (unaccent) and Arabic diacritics/tatweel,
+# and fold alef/yeh/teh marbuta variants so "creme" matches "Crème".
+# unaccent() is only STABLE, so it is wrapped with an explicit dictionary
+# to be usable in a generated column.
+NORMALIZE_FUNCTION = r"""
+CREATE OR REPLACE FUNCTION ingredient_search_normalize(value text)
+RETURNS text
+LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE
+AS $$
+    SELECT translate(
+        regexp_replace(
+            lower(public.unaccent('public.unaccent'::regdictionary, value)),
+            '[\u0610-\u061A\u064B-\u065F\u0670\u0640]', '', 'g'
+        ),
+        U&'\0623\0625\0622\0671\0649\0629',
+        U&'\0627\0627\0627\0627\064A\0647'
+    )
+$$
+"""
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    op.execute(NORMALIZE_FUNCTION)
+
+    op.add_column(
+        'ingredients',
+        sa.Column(
+            'search_text',
+            sa.Text(),
+            sa.Computed(
+                "ingredient_search_normalize("
+                "name_en || ' ' || name_fr || ' ' || name_ar || ' ' || tags::text)",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+    )
+    op.create_index(
+        'ix_ingredients_search_text_trgm',
+        'ingredients',
+        ['search_text'],
+        postgresql_using='gin',
+        postgresql_ops={'search_text': 'gin_trgm_ops'},
+    )
+
+
+def downgrade():
+    op.drop_index('ix_ingredients_search_text_trgm', table_name='ingredients')
+    op.drop_column('ingredients', 'search_text')
+    op.execute("DROP FUNCTION IF EXISTS ingredient_search_normalize(text)")
@@ -0,0 +1,87 @@
+"""add ingredient units
+
+Revision ID: 491ad23749c6
+Revises: f95885522ca7
+Create Date: 2026-10-18 19:21:07.640318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '491ad23749c6'
+down_revision = 'f95885522ca7'
+branch_labels = None
+depends_on = None
+
+# The unit aliases of app.nutrition.units when this revision was written
+ALIASES = {
+    'g': ('gram', 'grams', 'gr', 'gramme', 'grammes', 'غ', 'غرام', 'جرام'),
+    'kg': ('kilogram', 'kilograms', 'kilo', 'kilos', 'kilogramme', 'kilogrammes'),
+    'mg': ('milligram', 'milligrams', 'milligramme', 'milligrammes'),
+    'ml': ('milliliter', 'milliliters', 'millilitre', 'millilitres', 'مل'),
+    'tbsp': (
+        'tablespoon', 'tablespoons', 'tbs', 'c.à.s', 'c.a.s', 'càs', 'cas',
+        'cuillère à soupe', 'cuillères à soupe', 'ملعقة كبيرة',
+    ),
+    'tsp': (
+        'teaspoon', 'teaspoons', 'c.à.c', 'c.a.c', 'càc', 'cac',
+        'cuillère à café', 'cuillères à café', 'ملعقة صغيرة',
+    ),
+    'cup': ('cups', 'tasse', 'tasses', 'كوب'),
+    'piece': ('pieces', 'pc', 'pcs', 'pièce', 'pièces', 'حبة'),
+    'pinch': ('pinches', 'pincée', 'pincées', 'رشة'),
+}
+MASS_UNITS = {'g', 'kg', 'mg'}
+CANONICAL = {
+    alias: unit for unit, aliases in ALIASES.items() for alias in (unit, *aliases)
+}
+
+
+def canonical_unit(unit):
+    key = ' '.join(unit.lower().split())
+    return CANONICAL.get(key, key)
+
+
+def upgrade():
+    ingredient_units = op.create_table(
+        'ingredient_units',
+        sa.Column('ingredient_id', sa.Uuid(), nullable=False),
+        sa.Column('unit', sqlmodel.sql.sqltypes.AutoString(length=50), nullable=False),
+        sa.Column('grams_per_unit', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ['ingredient_id'], ['ingredients.id'], ondelete='CASCADE'
+        ),
+        sa.PrimaryKeyConstraint('ingredient_id', 'unit'),
+    )
+
+    rows = []
+    ingredients = op.get_bind().execute(
+        sa.text(
+            'SELECT id, unit_conversions, measurement_units, default_unit '
+            'FROM ingredients'
+        )
+    )
+    for ingredient_id, conversions, measurement_units, default_unit in ingredients:
+        factors = {}
+        # Milliliters without a conversion were counted as grams
+        if any(
+            canonical_unit(unit) == 'ml'
+            for unit in [*(measurement_units or []), default_unit]
+        ):
+            factors['ml'] = 1.0
+        for unit, grams in (conversions or {}).items():
+            if canonical_unit(unit) not in MASS_UNITS:
+                factors[canonical_unit(unit)] = float(grams)
+        rows.extend(
+            {'ingredient_id': ingredient_id, 'unit': unit, 'grams_per_unit': grams}
+            for unit, grams in factors.items()
+        )
+    if rows:
+        op.bulk_insert(ingredient_units, rows)
+
+
+def downgrade():
+    op.drop_table('ingredient_units')
@@ -0,0 +1,50 @@
+"""index refresh tokens
+
+Revision ID: aacde1450aff
+Revises: 19c565dca474
+Create Date: 2026-10-18 15:06:12.804417
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'aacde1450aff'
+down_revision = '19c565dca474'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Only active rows are ever looked up; drop the rest before indexing
+    op.execute("DELETE FROM refresh_tokens WHERE NOT is_active")
+    op.execute(
+        """
+        DELETE FROM refresh_tokens a
+        USING refresh_tokens b
+        WHERE a.token = b.token AND a.ctid < b.ctid
+        """
+    )
+    # Rows used to expire after 7 days while the token itself lasts 15; keep
+    # existing sessions valid until their token expires
+    op.execute(
+        "UPDATE refresh_tokens SET expires_at = created_at + interval '15 days' "
+        "WHERE created_at IS NOT NULL"
+    )
+
+    op.create_index(
+        'ix_refresh_tokens_token', 'refresh_tokens', ['token'], unique=True
+    )
+    op.create_index(
+        'ix_refresh_tokens_user_id_is_active',
+        'refresh_tokens',
+        ['user_id', 'is_active'],
+    )
+    # Lets the sweeper find expired rows without a full scan
+    op.create_index('ix_refresh_tokens_expires_at', 'refresh_tokens', ['expires_at'])
+
+
+def downgrade():
+    op.drop_index('ix_refresh_tokens_expires_at', table_name='refresh_tokens')
+    op.drop_index('ix_refresh_tokens_user_id_is_active', table_name='refresh_tokens')
+    op.drop_index('ix_refresh_tokens_token', table_name='refresh_tokens')
@@ -0,0 +1,56 @@
+"""add nutrition daily rollup
+
+Revision ID: b3b86b6daff6
+Revises: aacde1450aff
+Create Date: 2026-10-18 16:42:08.311529
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3b86b6daff6'
+down_revision = 'aacde1450aff'
+branch_labels = None
+depends_on = None
+
+TOTALS = (
+    'total_calories',
+    'total_protein',
+    'total_carbohydrates',
+    'total_fat',
+    'total_fiber',
+    'total_sodium',
+)
+
+
+def upgrade():
+    op.create_table(
+        'nutrition_daily_rollup',
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.Column('user_id', sa.Uuid(), nullable=True),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('day_count', sa.Integer(), nullable=False),
+        *(sa.Column(column, sa.Float(), nullable=False) for column in TOTALS),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    # Days without a user share one row per date
+    op.create_index(
+        'ix_nutrition_daily_rollup_user_id_day',
+        'nutrition_daily_rollup',
+        ['user_id', 'day'],
+        unique=True,
+        postgresql_nulls_not_distinct=True,
+    )
+    # Filled from the existing saved days by
+    # python -m app.backfill_nutrition_rollup
+
+
+def downgrade():
+    op.drop_index(
+        'ix_nutrition_daily_rollup_user_id_day', table_name='nutrition_daily_rollup'
+    )
+    op.drop_table('nutrition_daily_rollup')
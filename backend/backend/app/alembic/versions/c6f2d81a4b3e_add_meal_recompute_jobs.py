@@ -0,0 +1,40 @@
+"""add meal recompute jobs
+
+Revision ID: c6f2d81a4b3e
+Revises: 491ad23749c6
+Create Date: 2026-10-18 20:12:37.508214
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6f2d81a4b3e'
+down_revision = '491ad23749c6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'meal_recompute_jobs',
+        sa.Column('id', sa.Uuid(), nullable=False),
+        sa.Column('ingredient_ids', postgresql.ARRAY(sa.Uuid()), nullable=False),
+        sa.Column('status', sqlmodel.sql.sqltypes.AutoString(length=20), nullable=False),
+        sa.Column('last_meal_id', sa.Uuid(), nullable=True),
+        sa.Column('total_meals', sa.Integer(), nullable=False),
+        sa.Column('processed_meals', sa.Integer(), nullable=False),
+        sa.Column('updated_meals', sa.Integer(), nullable=False),
+        sa.Column('error', sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+
+def downgrade():
+    op.drop_table('meal_recompute_jobs')
@@ -0,0 +1,70 @@
+"""add saved day references
+
+Revision ID: d4a9e3b7c215
+Revises: c6f2d81a4b3e
+Create Date: 2026-10-18 22:41:09.113870
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4a9e3b7c215'
+down_revision = 'c6f2d81a4b3e'
+branch_labels = None
+depends_on = None
+
+
+def _references(kind):
+    # Ids of the plan's items of one kind; the planner may only store the
+    # embedded meal/ingredient
+    return f"""
+        ARRAY(
+            SELECT DISTINCT COALESCE(item ->> '{kind}_id', item #>> '{{{kind},id}}')::uuid
+            FROM jsonb_array_elements(
+                CASE WHEN jsonb_typeof(day_plan::jsonb -> 'day_meals') = 'array'
+                THEN day_plan::jsonb -> 'day_meals' ELSE '[]' END
+            ) AS slot,
+            jsonb_array_elements(
+                CASE WHEN jsonb_typeof(slot -> 'items') = 'array'
+                THEN slot -> 'items' ELSE '[]' END
+            ) AS item
+            WHERE item ->> 'type' = '{kind}'
+            AND COALESCE(item ->> '{kind}_id', item #>> '{{{kind},id}}') IS NOT NULL
+        )
+    """
+
+
+def upgrade():
+    for kind in ('meal', 'ingredient'):
+        op.add_column(
+            'saved_days',
+            sa.Column(
+                f'{kind}_ids',
+                postgresql.ARRAY(sa.Uuid()),
+                nullable=False,
+                server_default='{}',
+            ),
+        )
+    op.execute(
+        f"""
+        UPDATE saved_days
+        SET meal_ids = {_references('meal')},
+            ingredient_ids = {_references('ingredient')}
+        """
+    )
+    for kind in ('meal', 'ingredient'):
+        op.create_index(
+            f'ix_saved_days_{kind}_ids',
+            'saved_days',
+            [f'{kind}_ids'],
+            postgresql_using='gin',
+        )
+
+
+def downgrade():
+    for kind in ('ingredient', 'meal'):
+        op.drop_index(f'ix_saved_days_{kind}_ids', table_name='saved_days')
+        op.drop_column('saved_days', f'{kind}_ids')
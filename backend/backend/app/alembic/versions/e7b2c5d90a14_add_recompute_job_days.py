@@ -0,0 +1,34 @@
+"""add recompute job days
+
+Revision ID: e7b2c5d90a14
+Revises: d4a9e3b7c215
+Create Date: 2026-10-18 23:17:52.640318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b2c5d90a14'
+down_revision = 'd4a9e3b7c215'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'meal_recompute_jobs',
+        sa.Column('meals_done', sa.Boolean(), nullable=False, server_default='false'),
+    )
+    op.add_column('meal_recompute_jobs', sa.Column('last_day_id', sa.Uuid(), nullable=True))
+    op.add_column(
+        'meal_recompute_jobs',
+        sa.Column('updated_days', sa.Integer(), nullable=False, server_default='0'),
+    )
+
+
+def downgrade():
+    op.drop_column('meal_recompute_jobs', 'updated_days')
+    op.drop_column('meal_recompute_jobs', 'last_day_id')
+    op.drop_column('meal_recompute_jobs', 'meals_done')
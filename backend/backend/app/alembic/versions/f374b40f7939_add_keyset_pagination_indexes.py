@@ -0,0 +1,36 @@
+"""add keyset pagination indexes
+
+Revision ID: f374b40f7939
+Revises: 132154c19d17
+Create Date: 2026-10-18 11:42:05.318264
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'f374b40f7939'
+down_revision = '132154c19d17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Match the (sort key, id) cursors of the list endpoints
+    op.create_index('ix_meals_created_at_id', 'meals', ['created_at', 'id'])
+    op.create_index('ix_saved_days_updated_at_id', 'saved_days', ['updated_at', 'id'])
+    op.create_index('ix_ingredients_created_at_id', 'ingredients', ['created_at', 'id'])
+    op.create_index('ix_user_created_at_id', 'user', ['created_at', 'id'])
+    op.create_index('ix_item_created_at_id', 'item', ['created_at', 'id'])
+    op.create_index(
+        'ix_item_owner_id_created_at_id', 'item', ['owner_id', 'created_at', 'id']
+    )
+
+
+def downgrade():
+    op.drop_index('ix_item_owner_id_created_at_id', table_name='item')
+    op.drop_index('ix_item_created_at_id', table_name='item')
+    op.drop_index('ix_user_created_at_id', table_name='user')
+    op.drop_index('ix_ingredients_created_at_id', table_name='ingredients')
+    op.drop_index('ix_saved_days_updated_at_id', table_name='saved_days')
+    op.drop_index('ix_meals_created_at_id', table_name='meals')
@@ -0,0 +1,38 @@
+"""add meal fingerprint
+
+Revision ID: f95885522ca7
+Revises: b3b86b6daff6
+Create Date: 2026-10-18 18:05:41.902174
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'f95885522ca7'
+down_revision = 'b3b86b6daff6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        'meals',
+        sa.Column(
+            'fingerprint',
+            postgresql.ARRAY(sa.BigInteger()),
+            server_default='{}',
+            nullable=False,
+        ),
+    )
+    op.create_index(
+        'ix_meals_fingerprint', 'meals', ['fingerprint'], postgresql_using='gin'
+    )
+    # Filled for the existing meals by python -m app.backfill_meal_fingerprints
+
+
+def downgrade():
+    op.drop_index('ix_meals_fingerprint', table_name='meals')
+    op.drop_column('meals', 'fingerprint')
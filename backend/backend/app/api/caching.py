@@ -0,0 +1,140 @@
+"""
+Conditional GETs for the ingredient catalog.
+
+Catalog responses carry a strong ETag derived from the catalog version, which
+every ingredient and category write bumps. A request whose ``If-None-Match``
+matches the current version gets a 304 before the catalog is loaded or
+anything is serialized. The tag is read before the body, so it is never newer
+than the data it is sent with. Compressed bodies carry the tag with their
+coding appended, and a 304 echoes the tag the client sent.
+
+Responses served from the catalog snapshot are also kept serialized, with
+their compressed variants, for the snapshot's version. Repeated downloads of
+the same URL are then sent without serializing or compressing anything.
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.api.compression import (
+    coded_etag,
+    compressor,
+    negotiate_encoding,
+    uncoded_etag,
+)
+from app.core.config import settings
+from app.nutrition.catalog import catalog
+
+
+def catalog_etag(session: Session) -> str:
+    return f'"catalog-{catalog.version(session)}"'
+
+
+async def catalog_etag_async(session: AsyncSession) -> str:
+    return f'"catalog-{await catalog.version_async(session)}"'
+
+
+def _cache_headers(etag: str) -> dict[str, str]:
+    return {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.CATALOG_CACHE_MAX_AGE}",
+    }
+
+
+def not_modified(request: Request, etag: str) -> Response | None:
+    """304 response when the client already has ``etag``."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return None
+    # If-None-Match uses the weak comparison: W/ prefixes are ignored. Any
+    # coding of the current version matches
+    for tag in if_none_match.split(","):
+        tag = tag.strip().removeprefix("W/")
+        if tag == "*" or uncoded_etag(tag) == etag:
+            held = etag if tag == "*" else tag
+            return Response(status_code=304, headers=_cache_headers(held))
+    return None
+
+
+def with_cache_headers(response: Response, etag: str) -> Response:
+    """Cache headers for ``response``, tagged with its content-coding if any."""
+    encoding = response.headers.get("content-encoding")
+    if encoding is not None:
+        etag = coded_etag(etag, encoding)
+    response.headers.update(_cache_headers(etag))
+    return response
+
+
+@dataclass
+class CachedBody:
+    content: bytes
+    # Compressed on first use; a concurrent first use only compresses twice
+    encoded: dict[str, bytes] = field(default_factory=dict)
+
+    def response(self, request: Request) -> Response:
+        """The body in the encoding the client prefers."""
+        content = self.content
+        headers = {"Vary": "Accept-Encoding"}
+        encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+        if encoding is not None and len(content) >= settings.COMPRESSION_MIN_SIZE:
+            if encoding not in self.encoded:
+                self.encoded[encoding] = compressor(encoding, best=True).compress(
+                    content, final=True
+                )
+            content = self.encoded[encoding]
+            headers["Content-Encoding"] = encoding
+        return Response(content=content, media_type="application/json", headers=headers)
+
+
+class CatalogResponseCache:
+    """
+    Serialized responses of one catalog version, keyed by URL. Bodies of an
+    older version are never stored, and a newer version drops them all.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self._version = -1
+        self._bodies: OrderedDict[str, CachedBody] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, version: int, url: str) -> CachedBody | None:
+        with self._lock:
+            if version != self._version:
+                return None
+            body = self._bodies.get(url)
+            if body is not None:
+                self._bodies.move_to_end(url)
+            return body
+
+    def put(
+        self,
+        version: int,
+        url: str,
+        model: BaseModel,
+        include: dict[str, Any] | None = None,
+    ) -> CachedBody:
+        """Serialize ``model`` and keep it for ``version``."""
+        body = CachedBody(model.model_dump_json(include=include).encode())
+        if self.max_size <= 0:
+            return body
+        with self._lock:
+            if version < self._version:
+                return body
+            if version > self._version:
+                self._bodies.clear()
+                self._version = version
+            self._bodies[url] = body
+            while len(self._bodies) > self.max_size:
+                self._bodies.popitem(last=False)
+        return body
+
+
+catalog_responses = CatalogResponseCache(settings.CATALOG_RESPONSE_CACHE_SIZE)
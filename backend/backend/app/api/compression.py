@@ -0,0 +1,197 @@
+"""
+Response compression.
+
+``CompressionMiddleware`` compresses responses of at least
+``COMPRESSION_MIN_SIZE`` bytes with brotli or gzip, whichever the client
+prefers (brotli on a tie). Streaming responses are compressed chunk by chunk.
+Each content-coding is its own representation, so a strong ``ETag`` gets the
+coding appended (``"tag-br"``, see :func:`coded_etag`).
+Responses that already carry a ``Content-Encoding`` are passed through, so
+routes can send precompressed bodies (the meal export, the cached catalog) and
+pick the encoding themselves with :func:`negotiate_encoding`.
+"""
+
+import zlib
+from functools import partial
+from typing import Protocol
+
+import anyio.to_thread
+import brotli
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+# Already compressed or streamed to the client as it happens
+EXCLUDED_CONTENT_TYPES = (
+    "application/gzip",
+    "application/zip",
+    "audio/",
+    "image/",
+    "text/event-stream",
+    "video/",
+)
+# Larger chunks are compressed in a worker thread, off the event loop
+THREAD_MIN_SIZE = 128 * 1024
+
+
+def _weights(accept_encoding: str) -> dict[str, float]:
+    """q-value of each coding listed in an Accept-Encoding header."""
+    weights: dict[str, float] = {}
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.partition(";")
+        weight = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[coding.strip()] = weight
+    return weights
+
+
+def accepts_encoding(accept_encoding: str, encoding: str) -> bool:
+    """Whether an Accept-Encoding header allows ``encoding`` (q above 0)."""
+    weights = _weights(accept_encoding)
+    return weights.get(encoding, weights.get("*", 0.0)) > 0
+
+
+CODINGS = ("br", "gzip")
+
+
+def negotiate_encoding(accept_encoding: str) -> str | None:
+    """The client's preferred encoding among br and gzip, or None."""
+    weights = _weights(accept_encoding)
+    wildcard = weights.get("*", 0.0)
+    encoding = max(CODINGS, key=lambda coding: weights.get(coding, wildcard))
+    return encoding if weights.get(encoding, wildcard) > 0 else None
+
+
+def coded_etag(etag: str, encoding: str) -> str:
+    """The strong ``etag`` of a body in ``encoding``; weak tags are kept."""
+    if etag.startswith("W/"):
+        return etag
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def uncoded_etag(etag: str) -> str:
+    """The tag :func:`coded_etag` was given."""
+    for encoding in CODINGS:
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return f'{etag.removesuffix(suffix)}"'
+    return etag
+
+
+class Compressor(Protocol):
+    def compress(self, data: bytes, *, final: bool) -> bytes: ...
+
+
+class GzipCompressor:
+    def __init__(self, level: int) -> None:
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, *, final: bool) -> bytes:
+        flush = zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH
+        return self._compressor.compress(data) + self._compressor.flush(flush)
+
+
+class BrotliCompressor:
+    def __init__(self, quality: int) -> None:
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes, *, final: bool) -> bytes:
+        body: bytes = self._compressor.process(data)
+        tail: bytes = self._compressor.finish() if final else self._compressor.flush()
+        return body + tail
+
+
+def compressor(encoding: str, *, best: bool = False) -> Compressor:
+    """
+    Compressor for ``encoding``. ``best`` trades CPU for size, for bodies that
+    are compressed once and sent many times.
+    """
+    if encoding == "br":
+        return BrotliCompressor(9 if best else settings.COMPRESSION_BROTLI_QUALITY)
+    return GzipCompressor(9 if best else settings.COMPRESSION_GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        responder = _Responder(send, encoding, self.minimum_size)
+        await self.app(scope, receive, responder.send)
+
+
+class _Responder:
+    def __init__(self, send: Send, encoding: str | None, minimum_size: int) -> None:
+        self._send = send
+        self._encoding = encoding
+        self._minimum_size = minimum_size
+        self._start: Message | None = None
+        self._compressor: Compressor | None = None
+        # Whether the response is passed through as it is
+        self._identity = False
+
+    async def send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            self._identity = (
+                "content-encoding" in headers
+                or message["status"] in (204, 206, 304)
+                or content_type.startswith(EXCLUDED_CONTENT_TYPES)
+            )
+            if self._identity:
+                await self._send(message)
+            else:
+                # Sent with the first body chunk, once its headers are known
+                self._start = message
+            return
+        if message["type"] != "http.response.body" or self._identity:
+            await self._send(message)
+            return
+
+        body: bytes = message.get("body", b"")
+        more_body: bool = message.get("more_body", False)
+        if self._start is not None:
+            start, self._start = self._start, None
+            headers = MutableHeaders(raw=start["headers"])
+            small = not more_body and len(body) < self._minimum_size
+            if not small:
+                headers.add_vary_header("Accept-Encoding")
+            if small or self._encoding is None:
+                self._identity = True
+                await self._send(start)
+                await self._send(message)
+                return
+            self._compressor = compressor(self._encoding)
+            headers["Content-Encoding"] = self._encoding
+            if "etag" in headers:
+                headers["ETag"] = coded_etag(headers["etag"], self._encoding)
+            del headers["Content-Length"]
+            body = await self._compress(body, final=not more_body)
+            if not more_body:
+                headers["Content-Length"] = str(len(body))
+            await self._send(start)
+        else:
+            body = await self._compress(body, final=not more_body)
+        await self._send({**message, "body": body})
+
+    async def _compress(self, body: bytes, *, final: bool) -> bytes:
+        encoder = self._compressor
+        assert encoder is not None
+        if len(body) >= THREAD_MIN_SIZE:
+            return await anyio.to_thread.run_sync(
+                partial(encoder.compress, body, final=final)
+            )
+        return encoder.compress(body, final=final)
@@ -1,19 +1,27 @@
-from collections.abc import Generator
-from typing import Annotated
+from collections.abc import AsyncGenerator, Callable, Generator
+from typing import Annotated, Any, TypeVar, overload
 
 import jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
-from pydantic import ValidationError
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import orm
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core import security
 from app.core.config import settings
-from app.core.db import engine
+from app.core.db import async_engine, engine
+from app.core.user_cache import user_cache
 from app.models.models import User
+from app.nutrition.catalog import catalog
 from app.schemas.users import TokenPayload
 
+M = TypeVar("M", bound=BaseModel)
+R = TypeVar("R")
+
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/login/access-token"
 )
@@ -24,11 +32,79 @@ def get_db() -> Generator[Session, None, None]:
         yield session
 
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    # Rows stay loaded after commit: lazy refreshes can't run outside run_sync
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield session
+
+
 SessionDep = Annotated[Session, Depends(get_db)]
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_db)]
 TokenDep = Annotated[str, Depends(reusable_oauth2)]
 
 
+@overload
+async def run_sync_route(
+    session: AsyncSession,
+    route: Callable[..., Any],
+    response_model: type[M],
+    **kwargs: Any,
+) -> M | Response: ...
+
+
+@overload
+async def run_sync_route(
+    session: AsyncSession,
+    route: Callable[..., R],
+    response_model: None = None,
+    **kwargs: Any,
+) -> R: ...
+
+
+async def run_sync_route(
+    session: AsyncSession,
+    route: Callable[..., Any],
+    response_model: type[BaseModel] | None = None,
+    **kwargs: Any,
+) -> Any:
+    """
+    Run a sync route function on the async session's connection. The result is
+    validated as ``response_model`` inside the call, so any relationship it
+    touches is loaded before leaving the greenlet. Responses the route already
+    serialized are returned as they are.
+    The ingredient catalog is loaded first, in the threadpool, so the route
+    doesn't load it on the event loop.
+    """
+    await catalog.get_async()
+
+    # Called with the sqlmodel Session the async session wraps
+    def call(sync_session: orm.Session, /) -> Any:
+        result = route(session=sync_session, **kwargs)
+        if response_model is None or isinstance(result, Response):
+            return result
+        return response_model.model_validate(result)
+
+    return await session.run_sync(call)
+
+
+async def run_route_in_threadpool(route: Callable[..., R], **kwargs: Any) -> R:
+    """
+    Run a sync route function in the threadpool on its own sync session. For
+    CPU-bound routes, which would hold the event loop under run_sync_route.
+    """
+
+    def call() -> R:
+        with Session(engine) as sync_session:
+            return route(session=sync_session, **kwargs)
+
+    return await run_in_threadpool(call)
+
+
 def get_current_user(session: SessionDep, token: TokenDep) -> User:
+    cached = user_cache.get(token)
+    if cached is not None:
+        return cached.to_user(session)
+
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
@@ -50,6 +126,7 @@ def get_current_user(session: SessionDep, token: TokenDep) -> User:
             status_code=status.HTTP_401_UNAUTHORIZED,  # ✅ Changed to 401
             detail="Inactive user",
         )
+    user_cache.put(token, token_data, payload.get("exp"), user)
     return user
 
 
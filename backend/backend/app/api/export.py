@@ -0,0 +1,191 @@
+"""
+Streaming exports for list endpoints.
+
+Rows are read through a server-side cursor (``yield_per``) in a session owned
+by the response, serialized one at a time as NDJSON or CSV and, when the client
+accepts it, gzip-compressed on the fly, so memory stays flat however many rows
+are exported. The async variant streams the same way through the asyncio
+engine.
+"""
+
+import csv
+import io
+import json
+import zlib
+from collections.abc import (
+    AsyncIterable,
+    AsyncIterator,
+    Callable,
+    Iterable,
+    Iterator,
+)
+from enum import Enum
+from typing import TypeVar
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import SelectOfScalar
+
+from app.api.compression import accepts_encoding
+from app.core.db import async_engine, engine
+
+T = TypeVar("T")
+
+EXPORT_BATCH_SIZE = 500
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv",
+}
+
+
+def _records(
+    statement: SelectOfScalar[T], serialize: Callable[[T], BaseModel]
+) -> Iterator[BaseModel]:
+    # The request's session is closed before the body is streamed
+    with Session(engine) as session:
+        rows = session.exec(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for row in rows:
+            yield serialize(row)
+
+
+async def _async_records(
+    statement: SelectOfScalar[T], serialize: Callable[[T], BaseModel]
+) -> AsyncIterator[BaseModel]:
+    async with AsyncSession(async_engine) as session:
+        rows = await session.stream_scalars(
+            statement.execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+        async for row in rows:
+            yield serialize(row)
+
+
+class _Encoder:
+    """
+    Turns records into body bytes: NDJSON or CSV lines, buffered into
+    ``EXPORT_CHUNK_BYTES`` chunks and optionally gzip-compressed. Shared by the
+    sync and async record streams.
+    """
+
+    def __init__(self, format: ExportFormat, fields: list[str], compress: bool):
+        self._chunk: list[bytes] = []
+        self._size = 0
+        self._compressor = (
+            zlib.compressobj(wbits=zlib.MAX_WBITS | 16) if compress else None
+        )
+        self._buffer = io.StringIO()
+        self._writer = None
+        if format == ExportFormat.csv:
+            self._writer = csv.DictWriter(self._buffer, fieldnames=fields)
+            self._writer.writeheader()
+            self._append(self._take_buffer())
+
+    def _take_buffer(self) -> str:
+        value = self._buffer.getvalue()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return value
+
+    def _line(self, record: BaseModel) -> str:
+        if self._writer is None:
+            return record.model_dump_json() + "\n"
+        self._writer.writerow(
+            {
+                field: json.dumps(value) if isinstance(value, list | dict) else value
+                for field, value in record.model_dump(mode="json").items()
+            }
+        )
+        return self._take_buffer()
+
+    def _append(self, line: str) -> None:
+        data = line.encode()
+        self._chunk.append(data)
+        self._size += len(data)
+
+    def _flush_chunk(self) -> bytes:
+        data = b"".join(self._chunk)
+        self._chunk, self._size = [], 0
+        return self._compressor.compress(data) if self._compressor else data
+
+    def write(self, record: BaseModel) -> bytes:
+        """Bytes ready to send after ``record``, empty until a chunk fills."""
+        self._append(self._line(record))
+        if self._size < EXPORT_CHUNK_BYTES:
+            return b""
+        return self._flush_chunk()
+
+    def finish(self) -> bytes:
+        data = self._flush_chunk()
+        if self._compressor:
+            data += self._compressor.flush()
+        return data
+
+
+def _body(records: Iterable[BaseModel], encoder: _Encoder) -> Iterator[bytes]:
+    for record in records:
+        if data := encoder.write(record):
+            yield data
+    yield encoder.finish()
+
+
+async def _async_body(
+    records: AsyncIterable[BaseModel], encoder: _Encoder
+) -> AsyncIterator[bytes]:
+    async for record in records:
+        if data := encoder.write(record):
+            yield data
+    yield encoder.finish()
+
+
+def _encoder_and_headers(
+    request: Request, schema: type[BaseModel], format: ExportFormat, filename: str
+) -> tuple[_Encoder, dict[str, str]]:
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}.{format.value}"',
+        "Vary": "Accept-Encoding",
+    }
+    compress = accepts_encoding(request.headers.get("accept-encoding", ""), "gzip")
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+    return _Encoder(format, list(schema.model_fields), compress), headers
+
+
+def export_response(
+    request: Request,
+    statement: SelectOfScalar[T],
+    serialize: Callable[[T], BaseModel],
+    schema: type[BaseModel],
+    format: ExportFormat,
+    filename: str,
+) -> StreamingResponse:
+    """
+    Stream every row of ``statement`` as ``schema`` records, gzip-encoded when
+    the client's ``Accept-Encoding`` allows gzip.
+    """
+    encoder, headers = _encoder_and_headers(request, schema, format, filename)
+    body = _body(_records(statement, serialize), encoder)
+    return StreamingResponse(body, media_type=MEDIA_TYPES[format], headers=headers)
+
+
+def async_export_response(
+    request: Request,
+    statement: SelectOfScalar[T],
+    serialize: Callable[[T], BaseModel],
+    schema: type[BaseModel],
+    format: ExportFormat,
+    filename: str,
+) -> StreamingResponse:
+    """:func:`export_response` reading rows through the asyncio engine."""
+    encoder, headers = _encoder_and_headers(request, schema, format, filename)
+    body = _async_body(_async_records(statement, serialize), encoder)
+    return StreamingResponse(body, media_type=MEDIA_TYPES[format], headers=headers)
@@ -0,0 +1,117 @@
+"""
+Sparse fieldsets for list endpoints.
+
+``fields`` is a comma-separated list of the fields to return for each item. A
+dotted name selects part of a nested object or list, so
+``fields=id,name,meal_ingredients.quantity,meal_ingredients.ingredient_id``
+returns meals with their ingredient lines but without the embedded ingredient
+records. Routes check :meth:`Fields.selects` to skip loading relationships
+that are not returned. Without ``fields`` the full items are returned.
+"""
+
+import types
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Annotated, Any, Union, get_args, get_origin
+
+from fastapi import HTTPException, Query
+from pydantic import BaseModel
+
+FIELDS_DESCRIPTION = (
+    "Comma-separated fields to return for each item; use dots for nested "
+    "fields, e.g. id,name,meal_ingredients.quantity"
+)
+
+
+def _nested_model(annotation: Any) -> tuple[type[BaseModel] | None, bool]:
+    """
+    The model of a field typed as a model, a list of models or an optional
+    model, and whether the field is a list.
+    """
+    origin = get_origin(annotation)
+    args = [arg for arg in get_args(annotation) if arg is not type(None)]
+    if origin is list and args:
+        model, _ = _nested_model(args[0])
+        return model, True
+    if origin in (Union, types.UnionType) and len(args) == 1:
+        return _nested_model(args[0])
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, False
+    return None, False
+
+
+def _include(
+    model: type[BaseModel], paths: list[tuple[str, ...]], prefix: str = ""
+) -> dict[str, Any]:
+    # None selects the whole field, a list selects some of its subfields
+    selected: dict[str, list[tuple[str, ...]] | None] = {}
+    for name, *rest in paths:
+        if name not in model.model_fields:
+            raise HTTPException(
+                status_code=400, detail=f"Unknown field: {prefix}{name}"
+            )
+        if not rest:
+            selected[name] = None
+        elif selected.get(name, []) is not None:
+            selected.setdefault(name, []).append(tuple(rest))  # type: ignore[union-attr]
+
+    include: dict[str, Any] = {}
+    for name, subpaths in selected.items():
+        if subpaths is None:
+            include[name] = True
+            continue
+        nested, is_list = _nested_model(model.model_fields[name].annotation)
+        if nested is None:
+            raise HTTPException(
+                status_code=400, detail=f"Field has no subfields: {prefix}{name}"
+            )
+        spec = _include(nested, subpaths, f"{prefix}{name}.")
+        include[name] = {"__all__": spec} if is_list else spec
+    return include
+
+
+@dataclass
+class Fields:
+    # pydantic ``include`` for one item, None for every field
+    include: dict[str, Any] | None = None
+
+    @classmethod
+    def parse(cls, fields: str | None, model: type[BaseModel]) -> "Fields":
+        if fields is None:
+            return cls()
+        paths = [
+            tuple(part.strip() for part in name.split("."))
+            for name in fields.split(",")
+            if name.strip()
+        ]
+        if not paths:
+            raise HTTPException(status_code=400, detail="No fields selected")
+        return cls(_include(model, paths))
+
+    def selects(self, path: str) -> bool:
+        """Whether any part of the dotted ``path`` is returned."""
+        spec: Any = self.include
+        for part in path.split("."):
+            if spec is None or spec is True:
+                return True
+            spec = spec.get("__all__", spec).get(part)
+            if spec is None:
+                return False
+        return True
+
+    def page(self) -> dict[str, Any] | None:
+        """pydantic ``include`` for a page of items."""
+        if self.include is None:
+            return None
+        return {"data": {"__all__": self.include}, "count": True, "next_cursor": True}
+
+
+def sparse_fields(model: type[BaseModel]) -> Callable[..., Fields]:
+    """Dependency parsing the ``fields`` query parameter against ``model``."""
+
+    def dependency(
+        fields: Annotated[str | None, Query(description=FIELDS_DESCRIPTION)] = None,
+    ) -> Fields:
+        return Fields.parse(fields, model)
+
+    return dependency
@@ -3,13 +3,19 @@ from fastapi import APIRouter
 from app.api.routes import (
     avatars,
     days,
+    days_async,
     ingredients,
+    ingredients_async,
     items,
     login,
     meals,
+    meals_async,
+    nutrition,
+    nutrition_async,
     users,
     utils,
 )
+from app.core.config import settings
 
 api_router = APIRouter()
 api_router.include_router(users.router)
@@ -18,7 +24,14 @@ api_router.include_router(utils.router)
 api_router.include_router(items.router)
 api_router.include_router(avatars.router)
 
-# Nutrition routes
-api_router.include_router(ingredients.router)
-api_router.include_router(meals.router)
-api_router.include_router(days.router)
+# Nutrition routes, on the sync or asyncio database stack
+if settings.ASYNC_DATABASE:
+    api_router.include_router(ingredients_async.router)
+    api_router.include_router(meals_async.router)
+    api_router.include_router(days_async.router)
+    api_router.include_router(nutrition_async.router)
+else:
+    api_router.include_router(ingredients.router)
+    api_router.include_router(meals.router)
+    api_router.include_router(days.router)
+    api_router.include_router(nutrition.router)
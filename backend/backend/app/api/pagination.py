@@ -0,0 +1,252 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+Each page carries an opaque ``next_cursor`` encoding the sort key of its last
+row, e.g. ``(created_at, id)``. Passing it back as ``cursor`` continues with a
+row-value comparison on an index instead of an OFFSET over every prior row.
+``skip`` is still honoured when no cursor is given.
+
+The total is optional: ``include_count=false`` skips it, and
+``estimate_count=true`` reads it from the planner statistics
+(``pg_class.reltuples`` or the EXPLAIN row estimate) instead of ``count(*)``.
+
+Async routes use the ``_async`` variants, which run the same statements on an
+``AsyncSession``.
+"""
+
+import base64
+import binascii
+import json
+from bisect import bisect_right
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Annotated, Any, Generic, TypeVar
+
+from fastapi import Depends, HTTPException, Query
+from pydantic import TypeAdapter, ValidationError
+from pydantic_core import to_jsonable_python
+from sqlalchemy import tuple_
+from sqlalchemy.engine import Dialect
+from sqlmodel import Session, func, select, text
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import SelectOfScalar
+
+T = TypeVar("T")
+
+
+@dataclass
+class PageParams:
+    cursor: str | None = None
+    skip: Annotated[int, Query(ge=0)] = 0
+    limit: Annotated[int, Query(ge=1)] = 100
+    include_count: bool = True
+    estimate_count: bool = False
+
+
+PageParamsDep = Annotated[PageParams, Depends()]
+
+
+@dataclass
+class Page(Generic[T]):
+    data: list[T]
+    count: int | None
+    next_cursor: str | None
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = json.dumps(to_jsonable_python(list(values)), separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, order_by: Sequence[Any]) -> tuple[Any, ...]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+        if not isinstance(values, list) or len(values) != len(order_by):
+            raise ValueError(cursor)
+        return tuple(
+            TypeAdapter(
+                column.class_.model_fields[column.key].annotation
+            ).validate_python(value)
+            for column, value in zip(order_by, values, strict=True)
+        )
+    except (ValueError, binascii.Error, ValidationError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _cursor_after(row: Any, order_by: Sequence[Any]) -> str:
+    return encode_cursor([getattr(row, column.key) for column in order_by])
+
+
+RELTUPLES = text(
+    "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)"
+)
+
+
+def _estimate_table(statement: SelectOfScalar[Any], dialect: Dialect) -> str | None:
+    """The table whose reltuples estimates an unfiltered statement."""
+    if statement.whereclause is not None:
+        return None
+    (table,) = statement.get_final_froms()
+    return dialect.identifier_preparer.format_table(table)
+
+
+def _reltuples_estimate(reltuples: int | None) -> int | None:
+    # -1 until the table has been vacuumed or analyzed
+    if reltuples is not None and reltuples >= 0:
+        return int(reltuples)
+    return None
+
+
+def _explain(statement: SelectOfScalar[Any], dialect: Dialect) -> tuple[str, Any]:
+    compiled = statement.compile(
+        dialect=dialect, compile_kwargs={"render_postcompile": True}
+    )
+    return f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+
+
+def _plan_rows(plan: Any) -> int:
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def estimate_count(session: Session, statement: SelectOfScalar[Any]) -> int:
+    """Row estimate from the planner statistics, without scanning the table."""
+    connection = session.connection()
+    table = _estimate_table(statement, connection.dialect)
+    if table is not None:
+        reltuples = connection.execute(RELTUPLES, {"name": table}).scalar()
+        if (estimate := _reltuples_estimate(reltuples)) is not None:
+            return estimate
+    plan = connection.exec_driver_sql(
+        *_explain(statement, connection.dialect)
+    ).scalar_one()
+    return _plan_rows(plan)
+
+
+async def estimate_count_async(
+    session: AsyncSession, statement: SelectOfScalar[Any]
+) -> int:
+    """:func:`estimate_count` on an async session."""
+    connection = await session.connection()
+    table = _estimate_table(statement, connection.dialect)
+    if table is not None:
+        reltuples = (await connection.execute(RELTUPLES, {"name": table})).scalar()
+        if (estimate := _reltuples_estimate(reltuples)) is not None:
+            return estimate
+    plan = (
+        await connection.exec_driver_sql(*_explain(statement, connection.dialect))
+    ).scalar_one()
+    return _plan_rows(plan)
+
+
+def _count_statement(statement: SelectOfScalar[Any]) -> SelectOfScalar[int]:
+    return select(func.count()).select_from(statement.subquery())
+
+
+def count_rows(
+    session: Session, statement: SelectOfScalar[Any], params: PageParams
+) -> int | None:
+    if not params.include_count:
+        return None
+    if params.estimate_count:
+        return estimate_count(session, statement)
+    return session.exec(_count_statement(statement)).one()
+
+
+async def count_rows_async(
+    session: AsyncSession, statement: SelectOfScalar[Any], params: PageParams
+) -> int | None:
+    if not params.include_count:
+        return None
+    if params.estimate_count:
+        return await estimate_count_async(session, statement)
+    return (await session.exec(_count_statement(statement))).one()
+
+
+def _page_statement(
+    statement: SelectOfScalar[T],
+    params: PageParams,
+    order_by: Sequence[Any],
+    descending: bool,
+) -> SelectOfScalar[T]:
+    if params.cursor:
+        key = tuple_(*order_by)
+        after = tuple_(*decode_cursor(params.cursor, order_by))
+        statement = statement.where(key < after if descending else key > after)
+    else:
+        statement = statement.offset(params.skip)
+    statement = statement.order_by(
+        *(column.desc() if descending else column.asc() for column in order_by)
+    )
+    # One extra row tells whether there is a next page
+    return statement.limit(params.limit + 1)
+
+
+def _page(
+    rows: list[T], count: int | None, params: PageParams, order_by: Sequence[Any]
+) -> Page[T]:
+    next_cursor = None
+    if len(rows) > params.limit:
+        rows = rows[: params.limit]
+        next_cursor = _cursor_after(rows[-1], order_by)
+    return Page(data=rows, count=count, next_cursor=next_cursor)
+
+
+def paginate(
+    session: Session,
+    statement: SelectOfScalar[T],
+    params: PageParams,
+    order_by: Sequence[Any],
+    *,
+    descending: bool = False,
+) -> Page[T]:
+    """
+    Run one page of ``statement`` ordered by the ``order_by`` columns, which
+    must end with a unique column (normally the primary key).
+    """
+    count = count_rows(session, statement, params)
+    page_statement = _page_statement(statement, params, order_by, descending)
+    rows = list(session.exec(page_statement).all())
+    return _page(rows, count, params, order_by)
+
+
+async def paginate_async(
+    session: AsyncSession,
+    statement: SelectOfScalar[T],
+    params: PageParams,
+    order_by: Sequence[Any],
+    *,
+    descending: bool = False,
+) -> Page[T]:
+    """:func:`paginate` on an async session."""
+    count = await count_rows_async(session, statement, params)
+    page_statement = _page_statement(statement, params, order_by, descending)
+    rows = list((await session.exec(page_statement)).all())
+    return _page(rows, count, params, order_by)
+
+
+def paginate_sequence(
+    items: Sequence[T], params: PageParams, order_by: Sequence[Any]
+) -> Page[T]:
+    """
+    Page through an in-memory sequence already sorted ascending by the
+    ``order_by`` columns, with the same cursors as :func:`paginate`.
+    """
+    start = params.skip
+    if params.cursor:
+        after = decode_cursor(params.cursor, order_by)
+        start = bisect_right(
+            items,
+            after,
+            key=lambda item: tuple(getattr(item, column.key) for column in order_by),
+        )
+    end = start + params.limit
+
+    next_cursor = None
+    if end < len(items):
+        next_cursor = _cursor_after(items[end - 1], order_by)
+    return Page(
+        data=list(items[start:end]),
+        count=len(items) if params.include_count else None,
+        next_cursor=next_cursor,
+    )
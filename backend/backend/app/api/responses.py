@@ -0,0 +1,29 @@
+"""
+JSON responses.
+
+The app renders responses with orjson by default. Hot read endpoints return
+:func:`model_response` instead: pydantic serializes the response model
+straight to JSON bytes, skipping FastAPI's second validation against the
+``response_model``, ``jsonable_encoder`` and the intermediate dict.
+"""
+
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+
+
+def model_response(model: BaseModel, include: dict[str, Any] | None = None) -> Response:
+    """Serialize ``model`` once, keeping only ``include`` when given."""
+    return Response(
+        content=model.model_dump_json(include=include),
+        media_type="application/json",
+    )
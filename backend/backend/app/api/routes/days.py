@@ -1,15 +1,30 @@
 import uuid
+from datetime import datetime
 from typing import Any
 
-from fastapi import APIRouter, HTTPException
-from sqlmodel import func, select
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session, select
+from sqlmodel.sql.expression import SelectOfScalar
 
 from app.api.deps import SessionDep
+from app.api.export import ExportFormat, export_response
+from app.api.pagination import PageParamsDep, paginate
+from app.core.config import settings
+from app.crud.nutrition import get_meals_by_ids, get_recent_meals
 from app.models.models import Message
-from app.models.nutrition import SavedDay
+from app.models.nutrition import Meal, SavedDay
+from app.nutrition.catalog import CatalogSnapshot, catalog
+from app.nutrition.day_plan import compute_day_plan, plan_references
+from app.nutrition.optimizer import OptimizerError, optimize_day
+from app.nutrition.rollup import apply_day_change, rollup_entry
 from app.schemas.nutrition import (
+    DayOptimizeRequest,
+    DayOptimizeResult,
+    DayPlan,
     SavedDayCreate,
     SavedDayPublic,
+    SavedDaySort,
     SavedDaysPublic,
     SavedDayUpdate,
 )
@@ -17,17 +32,87 @@ from app.schemas.nutrition import (
 router = APIRouter(prefix="/days", tags=["days"])
 
 
-@router.get("/", response_model=SavedDaysPublic)
-def get_saved_days(
-    session: SessionDep,
-    skip: int = 0,
-    limit: int = 100,
-    search: str | None = None,
-) -> Any:
+def _day_plan_values(session: Session, plan: DayPlan) -> dict[str, Any]:
     """
-    Retrieve saved day plans.
-    For now, returns all saved days (user_id is nullable).
+    Compute the plan's totals, returning the stored day_plan, total_* and
+    reference columns. Referenced meals are loaded in one batch, ingredients
+    come from the catalog; missing ones are reported in a 404.
     """
+    references = plan_references(plan)
+    meal_ids = references["meal_ids"]
+    meals = get_meals_by_ids(session=session, ids=meal_ids)
+    missing_meals = [str(i) for i in meal_ids if i not in meals]
+    if missing_meals:
+        raise HTTPException(
+            status_code=404, detail=f"Meals not found: {', '.join(missing_meals)}"
+        )
+
+    ingredient_ids = references["ingredient_ids"] + [
+        line.ingredient_id for meal in meals.values() for line in meal.meal_ingredients
+    ]
+    snapshot = catalog.get_including(session, ingredient_ids)
+    missing_ingredients = [
+        str(i) for i in dict.fromkeys(ingredient_ids) if i not in snapshot.table
+    ]
+    if missing_ingredients:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Ingredients not found: {', '.join(missing_ingredients)}",
+        )
+
+    totals = compute_day_plan(plan, meals, snapshot.table)
+    return {"day_plan": plan.model_dump(mode="json"), **totals, **references}
+
+
+def optimizer_inputs(
+    session: Session, optimize_in: DayOptimizeRequest
+) -> tuple[CatalogSnapshot, list[Meal]]:
+    """The catalog and the candidate meals of an optimize request."""
+    if optimize_in.meal_ids is not None:
+        meals = list(
+            get_meals_by_ids(session=session, ids=optimize_in.meal_ids).values()
+        )
+    else:
+        meals = get_recent_meals(
+            session=session,
+            user_id=optimize_in.user_id,
+            limit=settings.DAY_OPTIMIZER_MAX_MEALS,
+        )
+    snapshot = catalog.get_including(
+        session,
+        [line.ingredient_id for meal in meals for line in meal.meal_ingredients],
+    )
+    return snapshot, meals
+
+
+def optimized_day(
+    optimize_in: DayOptimizeRequest, snapshot: CatalogSnapshot, meals: list[Meal]
+) -> DayOptimizeResult:
+    try:
+        return optimize_day(
+            optimize_in, snapshot, meals, settings.DAY_OPTIMIZER_TIME_LIMIT_SECONDS
+        )
+    except OptimizerError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+def saved_day_export_statement(
+    updated_since: datetime | None,
+) -> SelectOfScalar[SavedDay]:
+    statement = select(SavedDay)
+    if updated_since:
+        statement = statement.where(SavedDay.updated_at >= updated_since)
+    return statement.order_by(SavedDay.updated_at, SavedDay.id)
+
+
+def saved_days_statement(
+    *,
+    search: str | None,
+    min_calories: float | None,
+    max_calories: float | None,
+    min_protein: float | None,
+    max_protein: float | None,
+) -> SelectOfScalar[SavedDay]:
     # Build the base query
     statement = select(SavedDay)
 
@@ -38,16 +123,82 @@ def get_saved_days(
             (SavedDay.title.ilike(search_pattern))
             | (SavedDay.description.ilike(search_pattern))
         )
+    if min_calories is not None:
+        statement = statement.where(SavedDay.total_calories >= min_calories)
+    if max_calories is not None:
+        statement = statement.where(SavedDay.total_calories <= max_calories)
+    if min_protein is not None:
+        statement = statement.where(SavedDay.total_protein >= min_protein)
+    if max_protein is not None:
+        statement = statement.where(SavedDay.total_protein <= max_protein)
+    return statement
+
+
+def saved_day_order(sort: SavedDaySort) -> tuple[Any, ...]:
+    return (getattr(SavedDay, sort.value), SavedDay.id)
+
+
+@router.get("/", response_model=SavedDaysPublic)
+def get_saved_days(
+    session: SessionDep,
+    page: PageParamsDep,
+    search: str | None = None,
+    min_calories: float | None = None,
+    max_calories: float | None = None,
+    min_protein: float | None = None,
+    max_protein: float | None = None,
+    sort: SavedDaySort = SavedDaySort.updated_at,
+    descending: bool = True,
+) -> Any:
+    """
+    Retrieve saved day plans, filterable and sortable by their daily totals.
+    For now, returns all saved days (user_id is nullable).
+    """
+    statement = saved_days_statement(
+        search=search,
+        min_calories=min_calories,
+        max_calories=max_calories,
+        min_protein=min_protein,
+        max_protein=max_protein,
+    )
+    saved_days = paginate(
+        session, statement, page, saved_day_order(sort), descending=descending
+    )
+    return SavedDaysPublic(
+        data=[SavedDayPublic.model_validate(day) for day in saved_days.data],
+        count=saved_days.count,
+        next_cursor=saved_days.next_cursor,
+    )
 
-    # Count total
-    count_statement = select(func.count()).select_from(statement.subquery())
-    count = session.exec(count_statement).one()
 
-    # Get paginated results
-    statement = statement.order_by(SavedDay.updated_at.desc()).offset(skip).limit(limit)
-    saved_days = session.exec(statement).all()
+@router.get("/export")
+def export_saved_days(
+    request: Request,
+    format: ExportFormat = ExportFormat.ndjson,
+    updated_since: datetime | None = None,
+) -> StreamingResponse:
+    """
+    Stream all saved day plans as NDJSON or CSV, oldest update first.
+    Pass updated_since for an incremental backup.
+    """
+    return export_response(
+        request,
+        saved_day_export_statement(updated_since),
+        SavedDayPublic.model_validate,
+        SavedDayPublic,
+        format,
+        "saved-days",
+    )
+
 
-    return SavedDaysPublic(data=saved_days, count=count)
+@router.post("/optimize", response_model=DayOptimizeResult)
+def optimize_saved_day(*, session: SessionDep, optimize_in: DayOptimizeRequest) -> Any:
+    """
+    Solve for a day plan meeting calorie and macro goals, from the candidate
+    meals and the ingredient catalog. The plan is not saved: post it to
+    /days/ as the day_plan of a new saved day.
+    """
+    return optimized_day(optimize_in, *optimizer_inputs(session, optimize_in))
 
 
 @router.get("/{day_id}", response_model=SavedDayPublic)
@@ -64,10 +215,13 @@ def get_saved_day(session: SessionDep, day_id: uuid.UUID) -> Any:
 @router.post("/", response_model=SavedDayPublic)
 def create_saved_day(*, session: SessionDep, day_in: SavedDayCreate) -> Any:
     """
-    Create new saved day plan.
+    Create new saved day plan. Its nutrition totals are computed server-side.
     """
-    saved_day = SavedDay.model_validate(day_in)
+    saved_day = SavedDay.model_validate(
+        day_in, update=_day_plan_values(session, day_in.day_plan)
+    )
     session.add(saved_day)
+    apply_day_change(session, after=rollup_entry(saved_day))
     session.commit()
     session.refresh(saved_day)
     return saved_day
@@ -87,9 +241,13 @@ def update_saved_day(
     if not saved_day:
         raise HTTPException(status_code=404, detail="Saved day not found")
 
-    update_dict = day_in.model_dump(exclude_unset=True)
+    before = rollup_entry(saved_day)
+    update_dict = day_in.model_dump(exclude_unset=True, exclude={"day_plan"})
+    if day_in.day_plan is not None:
+        update_dict.update(_day_plan_values(session, day_in.day_plan))
     saved_day.sqlmodel_update(update_dict)
     session.add(saved_day)
+    apply_day_change(session, before, rollup_entry(saved_day))
     session.commit()
     session.refresh(saved_day)
     return saved_day
@@ -104,6 +262,7 @@ def delete_saved_day(session: SessionDep, day_id: uuid.UUID) -> Message:
     if not saved_day:
         raise HTTPException(status_code=404, detail="Saved day not found")
 
+    apply_day_change(session, before=rollup_entry(saved_day))
     session.delete(saved_day)
     session.commit()
     return Message(message="Saved day deleted successfully")
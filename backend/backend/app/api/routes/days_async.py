@@ -0,0 +1,143 @@
+"""
+Saved days router on the asyncio engine, served instead of ``days`` when
+``ASYNC_DATABASE`` is set. Reads run their queries on the async session;
+writes and the optimizer inputs await the sync route logic through
+``AsyncSession.run_sync``.
+"""
+
+import uuid
+from datetime import datetime
+from typing import Any
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from app.api.deps import AsyncSessionDep, run_sync_route
+from app.api.export import ExportFormat, async_export_response
+from app.api.pagination import PageParamsDep, paginate_async
+from app.api.routes import days
+from app.models.models import Message
+from app.models.nutrition import SavedDay
+from app.schemas.nutrition import (
+    DayOptimizeRequest,
+    DayOptimizeResult,
+    SavedDayCreate,
+    SavedDayPublic,
+    SavedDaySort,
+    SavedDaysPublic,
+    SavedDayUpdate,
+)
+
+router = APIRouter(prefix="/days", tags=["days"])
+
+
+@router.get("/", response_model=SavedDaysPublic)
+async def get_saved_days(
+    session: AsyncSessionDep,
+    page: PageParamsDep,
+    search: str | None = None,
+    min_calories: float | None = None,
+    max_calories: float | None = None,
+    min_protein: float | None = None,
+    max_protein: float | None = None,
+    sort: SavedDaySort = SavedDaySort.updated_at,
+    descending: bool = True,
+) -> Any:
+    """
+    Retrieve saved day plans, filterable and sortable by their daily totals.
+    """
+    statement = days.saved_days_statement(
+        search=search,
+        min_calories=min_calories,
+        max_calories=max_calories,
+        min_protein=min_protein,
+        max_protein=max_protein,
+    )
+    saved_days = await paginate_async(
+        session, statement, page, days.saved_day_order(sort), descending=descending
+    )
+    return SavedDaysPublic(
+        data=[SavedDayPublic.model_validate(day) for day in saved_days.data],
+        count=saved_days.count,
+        next_cursor=saved_days.next_cursor,
+    )
+
+
+@router.get("/export")
+async def export_saved_days(
+    request: Request,
+    format: ExportFormat = ExportFormat.ndjson,
+    updated_since: datetime | None = None,
+) -> StreamingResponse:
+    """
+    Stream all saved day plans as NDJSON or CSV, oldest update first.
+    Pass updated_since for an incremental backup.
+    """
+    return async_export_response(
+        request,
+        days.saved_day_export_statement(updated_since),
+        SavedDayPublic.model_validate,
+        SavedDayPublic,
+        format,
+        "saved-days",
+    )
+
+
+@router.post("/optimize", response_model=DayOptimizeResult)
+async def optimize_saved_day(
+    *, session: AsyncSessionDep, optimize_in: DayOptimizeRequest
+) -> Any:
+    """
+    Solve for a day plan meeting calorie and macro goals, from the candidate
+    meals and the ingredient catalog. The plan is not saved.
+    """
+    snapshot, meals = await run_sync_route(
+        session, days.optimizer_inputs, optimize_in=optimize_in
+    )
+    # The solver is CPU-bound: keep it off the event loop
+    return await run_in_threadpool(days.optimized_day, optimize_in, snapshot, meals)
+
+
+@router.get("/{day_id}", response_model=SavedDayPublic)
+async def get_saved_day(session: AsyncSessionDep, day_id: uuid.UUID) -> Any:
+    """
+    Get saved day plan by ID.
+    """
+    saved_day = await session.get(SavedDay, day_id)
+    if not saved_day:
+        raise HTTPException(status_code=404, detail="Saved day not found")
+    return saved_day
+
+
+@router.post("/", response_model=SavedDayPublic)
+async def create_saved_day(*, session: AsyncSessionDep, day_in: SavedDayCreate) -> Any:
+    """
+    Create new saved day plan. Its nutrition totals are computed server-side.
+    """
+    return await run_sync_route(
+        session, days.create_saved_day, SavedDayPublic, day_in=day_in
+    )
+
+
+@router.put("/{day_id}", response_model=SavedDayPublic)
+async def update_saved_day(
+    *,
+    session: AsyncSessionDep,
+    day_id: uuid.UUID,
+    day_in: SavedDayUpdate,
+) -> Any:
+    """
+    Update a saved day plan.
+    """
+    return await run_sync_route(
+        session, days.update_saved_day, SavedDayPublic, day_id=day_id, day_in=day_in
+    )
+
+
+@router.delete("/{day_id}")
+async def delete_saved_day(session: AsyncSessionDep, day_id: uuid.UUID) -> Message:
+    """
+    Delete a saved day plan.
+    """
+    return await run_sync_route(session, days.delete_saved_day, day_id=day_id)
@@ -1,13 +1,33 @@
 import uuid
-from typing import Any
+from typing import Annotated, Any
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import ColumnElement
 from sqlalchemy.orm import selectinload
-from sqlmodel import func, select
+from sqlmodel import col, func, or_, select
+from sqlmodel.sql.expression import SelectOfScalar
 
+from app.api.caching import (
+    catalog_etag,
+    catalog_responses,
+    not_modified,
+    with_cache_headers,
+)
 from app.api.deps import SessionDep
+from app.api.fields import Fields, sparse_fields
+from app.api.pagination import (
+    PageParams,
+    PageParamsDep,
+    count_rows,
+    paginate,
+    paginate_sequence,
+)
+from app.api.responses import model_response
 from app.models.models import Message
 from app.models.nutrition import Category, Ingredient
+from app.nutrition.catalog import CatalogSnapshot, catalog
+from app.nutrition.recompute import enqueue_recompute, nutrition_key
+from app.nutrition.units import sync_ingredient_units
 from app.schemas.nutrition import (
     CategoryCreate,
     CategoryPublic,
@@ -16,23 +36,170 @@ from app.schemas.nutrition import (
     IngredientPublic,
     IngredientsPublic,
     IngredientUpdate,
+    SimilarIngredientPublic,
+    SimilarIngredientsPublic,
 )
 
 router = APIRouter(prefix="/ingredients", tags=["ingredients"])
 
+IngredientFieldsDep = Annotated[Fields, Depends(sparse_fields(IngredientPublic))]
+
+MAX_SIMILAR = 100
+
+INGREDIENT_ORDER = (Ingredient.created_at, Ingredient.id)
+
+
+def categories_response(
+    request: Request, page: PageParams, snapshot: CatalogSnapshot, etag: str
+) -> Response:
+    body = catalog_responses.get(snapshot.version, str(request.url))
+    if body is None:
+        categories = paginate_sequence(
+            snapshot.categories, page, (Category.created_at, Category.id)
+        )
+        body = catalog_responses.put(
+            snapshot.version,
+            str(request.url),
+            CategoriesPublic(
+                data=categories.data,
+                count=categories.count,
+                next_cursor=categories.next_cursor,
+            ),
+        )
+    return with_cache_headers(body.response(request), etag)
+
+
+def catalog_ingredients_response(
+    request: Request,
+    page: PageParams,
+    fields: Fields,
+    snapshot: CatalogSnapshot,
+    etag: str,
+    *,
+    category_id: uuid.UUID | None,
+    is_traditional: bool | None,
+    is_halal: bool | None,
+) -> Response:
+    """Ingredients listed without a search, served from the catalog snapshot."""
+    body = catalog_responses.get(snapshot.version, str(request.url))
+    if body is None:
+        rows = snapshot.filter(
+            category_id=category_id,
+            is_traditional=is_traditional,
+            is_halal=is_halal,
+        )
+        ingredients = paginate_sequence(
+            [snapshot.ingredients[row] for row in rows], page, INGREDIENT_ORDER
+        )
+        body = catalog_responses.put(
+            snapshot.version,
+            str(request.url),
+            IngredientsPublic(
+                data=ingredients.data,
+                count=ingredients.count,
+                next_cursor=ingredients.next_cursor,
+            ),
+            fields.page(),
+        )
+    return with_cache_headers(body.response(request), etag)
+
+
+def search_statement(
+    search: str,
+    *,
+    ranked: bool,
+    category_id: uuid.UUID | None,
+    is_traditional: bool | None,
+    is_halal: bool | None,
+) -> SelectOfScalar[Ingredient]:
+    """
+    Ingredients matching ``search`` and the filters. Ranked searches also
+    match typos: order them by :func:`search_rank`.
+    """
+    # Build the base query
+    statement = select(Ingredient)
+
+    # Apply filters
+    if category_id:
+        statement = statement.where(Ingredient.category_id == category_id)
+    if is_traditional is not None:
+        statement = statement.where(Ingredient.is_traditional == is_traditional)
+    if is_halal is not None:
+        statement = statement.where(Ingredient.is_halal == is_halal)
+    # Both predicates are served by the search_text trigram index
+    search_text = col(Ingredient.search_text)
+    # Normalizing leaves LIKE wildcards alone, so they are escaped beforehand
+    # (autoescape only applies to literal strings)
+    contains_search = search_text.contains(
+        func.ingredient_search_normalize(
+            search.replace("/", "//").replace("%", "/%").replace("_", "/_")
+        ),
+        escape="/",
+    )
+    if not ranked:
+        return statement.where(contains_search)
+    search_term = func.ingredient_search_normalize(search)
+    return statement.where(or_(contains_search, search_text.op("%>")(search_term)))
+
+
+def search_rank(search: str) -> ColumnElement[Any]:
+    """Order of ranked search results, most similar first."""
+    search_term = func.ingredient_search_normalize(search)
+    return func.word_similarity(search_term, col(Ingredient.search_text)).desc()
+
+
+def check_ranked_page(page: PageParams) -> None:
+    if page.cursor:
+        raise HTTPException(
+            status_code=400, detail="Ranked search does not support cursors"
+        )
+
+
+def ingredients_response(
+    ingredients: IngredientsPublic, fields: Fields, etag: str
+) -> Response:
+    return with_cache_headers(model_response(ingredients, fields.page()), etag)
+
+
+def similar_ingredients_response(
+    snapshot: CatalogSnapshot,
+    etag: str,
+    ingredient_id: uuid.UUID,
+    k: int,
+    *,
+    same_category: bool,
+    is_halal: bool | None,
+) -> Response:
+    if ingredient_id not in snapshot.table:
+        raise HTTPException(status_code=404, detail="Ingredient not found")
+    similar = snapshot.similar(
+        ingredient_id, k, same_category=same_category, is_halal=is_halal
+    )
+    return with_cache_headers(
+        model_response(
+            SimilarIngredientsPublic(
+                data=[
+                    SimilarIngredientPublic(
+                        **ingredient.model_dump(), distance=round(distance, 4)
+                    )
+                    for ingredient, distance in similar
+                ]
+            )
+        ),
+        etag,
+    )
+
 
 # ===== CATEGORIES =====
 @router.get("/categories", response_model=CategoriesPublic)
-def get_categories(session: SessionDep, skip: int = 0, limit: int = 100) -> Any:
+def get_categories(request: Request, session: SessionDep, page: PageParamsDep) -> Any:
     """
     Retrieve all categories.
     """
-    count_statement = select(func.count()).select_from(Category)
-    count = session.exec(count_statement).one()
-    statement = select(Category).offset(skip).limit(limit)
-    categories = session.exec(statement).all()
-
-    return CategoriesPublic(data=categories, count=count)
+    etag = catalog_etag(session)
+    if cached := not_modified(request, etag):
+        return cached
+    return categories_response(request, page, catalog.get(session), etag)
 
 
 @router.post("/categories", response_model=CategoryPublic)
@@ -42,7 +209,7 @@ def create_category(*, session: SessionDep, category_in: CategoryCreate) -> Any:
     """
     category = Category.model_validate(category_in)
     session.add(category)
-    session.commit()
+    catalog.commit(session)
     session.refresh(category)
     return category
 
@@ -50,55 +217,111 @@ def create_category(*, session: SessionDep, category_in: CategoryCreate) -> Any:
 # ===== INGREDIENTS =====
 @router.get("/", response_model=IngredientsPublic)
 def get_ingredients(
+    request: Request,
     session: SessionDep,
-    skip: int = 0,
-    limit: int = 100,
+    page: PageParamsDep,
+    fields: IngredientFieldsDep,
     category_id: uuid.UUID | None = None,
     is_traditional: bool | None = None,
     is_halal: bool | None = None,
     search: str | None = None,
+    ranked: bool = False,
 ) -> Any:
     """
     Retrieve ingredients with optional filters.
+    Search is accent-insensitive across the three names and tags.
+    With ranked=true it also tolerates typos and orders by similarity;
+    ranked results are paged with skip only.
+    Without a search, results are served from the in-memory catalog.
+    Pass fields to return only some fields of each ingredient.
     """
-    # Build the base query
-    statement = select(Ingredient)
-
-    # Apply filters
-    if category_id:
-        statement = statement.where(Ingredient.category_id == category_id)
-    if is_traditional is not None:
-        statement = statement.where(Ingredient.is_traditional == is_traditional)
-    if is_halal is not None:
-        statement = statement.where(Ingredient.is_halal == is_halal)
-    if search:
-        search_pattern = f"%{search}%"
-        statement = statement.where(
-            (Ingredient.name_en.ilike(search_pattern))
-            | (Ingredient.name_fr.ilike(search_pattern))
-            | (Ingredient.name_ar.ilike(search_pattern))
+    etag = catalog_etag(session)
+    if cached := not_modified(request, etag):
+        return cached
+    filters: dict[str, Any] = {
+        "category_id": category_id,
+        "is_traditional": is_traditional,
+        "is_halal": is_halal,
+    }
+    if not search:
+        return catalog_ingredients_response(
+            request, page, fields, catalog.get(session), etag, **filters
         )
 
-    # Count total
-    count_statement = select(func.count()).select_from(statement.subquery())
-    count = session.exec(count_statement).one()
-
-    # Get paginated results
-    statement = statement.offset(skip).limit(limit)
-    ingredients = session.exec(statement).all()
+    statement = search_statement(search, ranked=ranked, **filters)
+    if not ranked:
+        ingredients = paginate(session, statement, page, INGREDIENT_ORDER)
+        return ingredients_response(
+            IngredientsPublic(
+                data=[IngredientPublic.model_validate(i) for i in ingredients.data],
+                count=ingredients.count,
+                next_cursor=ingredients.next_cursor,
+            ),
+            fields,
+            etag,
+        )
 
-    return IngredientsPublic(data=ingredients, count=count)
+    check_ranked_page(page)
+    count = count_rows(session, statement, page)
+    statement = (
+        statement.order_by(search_rank(search)).offset(page.skip).limit(page.limit)
+    )
+    return ingredients_response(
+        IngredientsPublic(
+            data=[IngredientPublic.model_validate(i) for i in session.exec(statement)],
+            count=count,
+        ),
+        fields,
+        etag,
+    )
 
 
 @router.get("/{ingredient_id}", response_model=IngredientPublic)
-def get_ingredient(session: SessionDep, ingredient_id: uuid.UUID) -> Any:
+def get_ingredient(
+    request: Request, session: SessionDep, ingredient_id: uuid.UUID
+) -> Any:
     """
     Get ingredient by ID.
     """
-    ingredient = session.get(Ingredient, ingredient_id)
+    etag = catalog_etag(session)
+    if cached := not_modified(request, etag):
+        return cached
+    ingredient = catalog.get(session).get(ingredient_id) or session.get(
+        Ingredient, ingredient_id
+    )
     if not ingredient:
         raise HTTPException(status_code=404, detail="Ingredient not found")
-    return ingredient
+    return with_cache_headers(
+        model_response(IngredientPublic.model_validate(ingredient)), etag
+    )
+
+
+@router.get("/{ingredient_id}/similar", response_model=SimilarIngredientsPublic)
+def get_similar_ingredients(
+    request: Request,
+    session: SessionDep,
+    ingredient_id: uuid.UUID,
+    k: Annotated[int, Query(ge=1, le=MAX_SIMILAR)] = 10,
+    same_category: bool = False,
+    is_halal: bool | None = None,
+) -> Any:
+    """
+    Get the k ingredients with the closest per-100g nutrient profile,
+    closest first.
+    Filter to the ingredient's category with same_category=true,
+    and by is_halal.
+    """
+    etag = catalog_etag(session)
+    if cached := not_modified(request, etag):
+        return cached
+    return similar_ingredients_response(
+        catalog.get_including(session, [ingredient_id]),
+        etag,
+        ingredient_id,
+        k,
+        same_category=same_category,
+        is_halal=is_halal,
+    )
 
 
 @router.post("/", response_model=IngredientPublic)
@@ -112,8 +335,9 @@ def create_ingredient(*, session: SessionDep, ingredient_in: IngredientCreate) -
         raise HTTPException(status_code=404, detail="Category not found")
 
     ingredient = Ingredient.model_validate(ingredient_in)
+    sync_ingredient_units(ingredient)
     session.add(ingredient)
-    session.commit()
+    catalog.commit(session)
     session.refresh(ingredient)
     return ingredient
 
@@ -126,7 +350,8 @@ def update_ingredient(
     ingredient_in: IngredientUpdate,
 ) -> Any:
     """
-    Update an ingredient.
+    Update an ingredient. When its nutrients or unit conversions change, the
+    meals using it are recomputed in the background.
     """
     ingredient = session.get(Ingredient, ingredient_id)
     if not ingredient:
@@ -138,10 +363,14 @@ def update_ingredient(
         if not category:
             raise HTTPException(status_code=404, detail="Category not found")
 
+    before = nutrition_key(ingredient)
     update_dict = ingredient_in.model_dump(exclude_unset=True)
     ingredient.sqlmodel_update(update_dict)
+    sync_ingredient_units(ingredient)
     session.add(ingredient)
-    session.commit()
+    if nutrition_key(ingredient) != before:
+        enqueue_recompute(session, [ingredient.id])
+    catalog.commit(session)
     session.refresh(ingredient)
     return ingredient
 
@@ -156,5 +385,5 @@ def delete_ingredient(session: SessionDep, ingredient_id: uuid.UUID) -> Message:
         raise HTTPException(status_code=404, detail="Ingredient not found")
 
     session.delete(ingredient)
-    session.commit()
+    catalog.commit(session)
     return Message(message="Ingredient deleted successfully")
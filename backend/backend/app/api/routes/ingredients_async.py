@@ -0,0 +1,219 @@
+"""
+Ingredients router on the asyncio engine, served instead of ``ingredients``
+when ``ASYNC_DATABASE`` is set. Reads are served from the catalog snapshot,
+loaded off the event loop, or queried on the async session; writes await the
+sync route logic through ``AsyncSession.run_sync``.
+"""
+
+import uuid
+from typing import Annotated, Any
+
+from fastapi import APIRouter, HTTPException, Query, Request
+
+from app.api.caching import catalog_etag_async, not_modified, with_cache_headers
+from app.api.deps import AsyncSessionDep, run_sync_route
+from app.api.pagination import PageParamsDep, count_rows_async, paginate_async
+from app.api.responses import model_response
+from app.api.routes import ingredients
+from app.models.models import Message
+from app.models.nutrition import Ingredient
+from app.nutrition.catalog import catalog
+from app.schemas.nutrition import (
+    CategoriesPublic,
+    CategoryCreate,
+    CategoryPublic,
+    IngredientCreate,
+    IngredientPublic,
+    IngredientsPublic,
+    IngredientUpdate,
+    SimilarIngredientsPublic,
+)
+
+router = APIRouter(prefix="/ingredients", tags=["ingredients"])
+
+
+# ===== CATEGORIES =====
+@router.get("/categories", response_model=CategoriesPublic)
+async def get_categories(
+    request: Request, session: AsyncSessionDep, page: PageParamsDep
+) -> Any:
+    """
+    Retrieve all categories.
+    """
+    etag = await catalog_etag_async(session)
+    if cached := not_modified(request, etag):
+        return cached
+    return ingredients.categories_response(
+        request, page, await catalog.get_async(), etag
+    )
+
+
+@router.post("/categories", response_model=CategoryPublic)
+async def create_category(
+    *, session: AsyncSessionDep, category_in: CategoryCreate
+) -> Any:
+    """
+    Create new category.
+    """
+    return await run_sync_route(
+        session, ingredients.create_category, CategoryPublic, category_in=category_in
+    )
+
+
+# ===== INGREDIENTS =====
+@router.get("/", response_model=IngredientsPublic)
+async def get_ingredients(
+    request: Request,
+    session: AsyncSessionDep,
+    page: PageParamsDep,
+    fields: ingredients.IngredientFieldsDep,
+    category_id: uuid.UUID | None = None,
+    is_traditional: bool | None = None,
+    is_halal: bool | None = None,
+    search: str | None = None,
+    ranked: bool = False,
+) -> Any:
+    """
+    Retrieve ingredients with optional filters.
+    """
+    etag = await catalog_etag_async(session)
+    if cached := not_modified(request, etag):
+        return cached
+    filters: dict[str, Any] = {
+        "category_id": category_id,
+        "is_traditional": is_traditional,
+        "is_halal": is_halal,
+    }
+    if not search:
+        return ingredients.catalog_ingredients_response(
+            request, page, fields, await catalog.get_async(), etag, **filters
+        )
+
+    statement = ingredients.search_statement(search, ranked=ranked, **filters)
+    if not ranked:
+        found = await paginate_async(
+            session, statement, page, ingredients.INGREDIENT_ORDER
+        )
+        return ingredients.ingredients_response(
+            IngredientsPublic(
+                data=[IngredientPublic.model_validate(i) for i in found.data],
+                count=found.count,
+                next_cursor=found.next_cursor,
+            ),
+            fields,
+            etag,
+        )
+
+    ingredients.check_ranked_page(page)
+    count = await count_rows_async(session, statement, page)
+    statement = (
+        statement.order_by(ingredients.search_rank(search))
+        .offset(page.skip)
+        .limit(page.limit)
+    )
+    return ingredients.ingredients_response(
+        IngredientsPublic(
+            data=[
+                IngredientPublic.model_validate(i)
+                for i in await session.exec(statement)
+            ],
+            count=count,
+        ),
+        fields,
+        etag,
+    )
+
+
+@router.get("/{ingredient_id}", response_model=IngredientPublic)
+async def get_ingredient(
+    request: Request, session: AsyncSessionDep, ingredient_id: uuid.UUID
+) -> Any:
+    """
+    Get ingredient by ID.
+    """
+    etag = await catalog_etag_async(session)
+    if cached := not_modified(request, etag):
+        return cached
+    snapshot = await catalog.get_async()
+    ingredient: IngredientPublic | Ingredient | None = snapshot.get(ingredient_id)
+    if ingredient is None:
+        ingredient = await session.get(Ingredient, ingredient_id)
+    if not ingredient:
+        raise HTTPException(status_code=404, detail="Ingredient not found")
+    return with_cache_headers(
+        model_response(IngredientPublic.model_validate(ingredient)), etag
+    )
+
+
+@router.get("/{ingredient_id}/similar", response_model=SimilarIngredientsPublic)
+async def get_similar_ingredients(
+    request: Request,
+    session: AsyncSessionDep,
+    ingredient_id: uuid.UUID,
+    k: Annotated[int, Query(ge=1, le=ingredients.MAX_SIMILAR)] = 10,
+    same_category: bool = False,
+    is_halal: bool | None = None,
+) -> Any:
+    """
+    Get the k ingredients with the closest per-100g nutrient profile,
+    closest first.
+    Filter to the ingredient's category with same_category=true,
+    and by is_halal.
+    """
+    etag = await catalog_etag_async(session)
+    if cached := not_modified(request, etag):
+        return cached
+    return ingredients.similar_ingredients_response(
+        await catalog.get_including_async(session, [ingredient_id]),
+        etag,
+        ingredient_id,
+        k,
+        same_category=same_category,
+        is_halal=is_halal,
+    )
+
+
+@router.post("/", response_model=IngredientPublic)
+async def create_ingredient(
+    *, session: AsyncSessionDep, ingredient_in: IngredientCreate
+) -> Any:
+    """
+    Create new ingredient.
+    """
+    return await run_sync_route(
+        session,
+        ingredients.create_ingredient,
+        IngredientPublic,
+        ingredient_in=ingredient_in,
+    )
+
+
+@router.put("/{ingredient_id}", response_model=IngredientPublic)
+async def update_ingredient(
+    *,
+    session: AsyncSessionDep,
+    ingredient_id: uuid.UUID,
+    ingredient_in: IngredientUpdate,
+) -> Any:
+    """
+    Update an ingredient.
+    """
+    return await run_sync_route(
+        session,
+        ingredients.update_ingredient,
+        IngredientPublic,
+        ingredient_id=ingredient_id,
+        ingredient_in=ingredient_in,
+    )
+
+
+@router.delete("/{ingredient_id}")
+async def delete_ingredient(
+    session: AsyncSessionDep, ingredient_id: uuid.UUID
+) -> Message:
+    """
+    Delete an ingredient.
+    """
+    return await run_sync_route(
+        session, ingredients.delete_ingredient, ingredient_id=ingredient_id
+    )
@@ -2,9 +2,10 @@ import uuid
 from typing import Any
 
 from fastapi import APIRouter, HTTPException
-from sqlmodel import func, select
+from sqlmodel import select
 
 from app.api.deps import CurrentUser, SessionDep
+from app.api.pagination import PageParamsDep, paginate
 from app.models.models import (
     Item,
     ItemCreate,
@@ -19,33 +20,20 @@ router = APIRouter(prefix="/items", tags=["items"])
 
 @router.get("/", response_model=ItemsPublic)
 def read_items(
-    session: SessionDep, current_user: CurrentUser, skip: int = 0, limit: int = 100
+    session: SessionDep, current_user: CurrentUser, page: PageParamsDep
 ) -> Any:
     """
     Retrieve items.
     """
 
-    if current_user.is_superuser:
-        count_statement = select(func.count()).select_from(Item)
-        count = session.exec(count_statement).one()
-        statement = select(Item).offset(skip).limit(limit)
-        items = session.exec(statement).all()
-    else:
-        count_statement = (
-            select(func.count())
-            .select_from(Item)
-            .where(Item.owner_id == current_user.id)
-        )
-        count = session.exec(count_statement).one()
-        statement = (
-            select(Item)
-            .where(Item.owner_id == current_user.id)
-            .offset(skip)
-            .limit(limit)
-        )
-        items = session.exec(statement).all()
+    statement = select(Item)
+    if not current_user.is_superuser:
+        statement = statement.where(Item.owner_id == current_user.id)
+    items = paginate(session, statement, page, (Item.created_at, Item.id))
 
-    return ItemsPublic(data=items, count=count)
+    return ItemsPublic(
+        data=items.data, count=items.count, next_cursor=items.next_cursor
+    )
 
 
 @router.get("/{id}", response_model=ItemPublic)
@@ -3,6 +3,7 @@ from typing import Annotated, Any
 
 import jwt
 from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import HTMLResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from jwt.exceptions import ExpiredSignatureError, InvalidTokenError
@@ -10,11 +11,12 @@ from jwt.exceptions import ExpiredSignatureError, InvalidTokenError
 from app.api.deps import CurrentUser, SessionDep, get_current_active_superuser
 from app.core import security
 from app.core.config import settings
-from app.core.security import get_password_hash
+from app.core.security import get_password_hash_async
+from app.core.user_cache import user_cache
 from app.crud import crud
 from app.crud.refresh_token import (
-    get_refresh_token_by_jti,
     invalidate_refresh_token,
+    rotate_refresh_token,
     store_refresh_token,
 )
 from app.models.models import Message
@@ -31,12 +33,12 @@ router = APIRouter(tags=["login"])
 
 
 @router.post("/login/access-token")
-def login_access_token(
+async def login_access_token(
     response: Response,
     session: SessionDep,
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
 ) -> Token:  # Changed from Message to Token
-    user = crud.authenticate(
+    user = await crud.authenticate_async(
         session=session, email=form_data.username, password=form_data.password
     )
     if not user:
@@ -49,7 +51,7 @@ def login_access_token(
         user.id, expires_delta=access_token_expires
     )
     refresh_token, jti = security.create_refresh_token(user.id, return_jti=True)
-    store_refresh_token(session, user.id, jti)
+    await run_in_threadpool(store_refresh_token, session, user.id, jti)
 
     # Only set refresh token in httpOnly cookie
     response.set_cookie(
@@ -101,14 +103,14 @@ def recover_password(email: str, session: SessionDep) -> Message:
 
 
 @router.post("/reset-password/")
-def reset_password(session: SessionDep, body: NewPassword) -> Message:
+async def reset_password(session: SessionDep, body: NewPassword) -> Message:
     """
     Reset password
     """
     email = verify_password_reset_token(token=body.token)
     if not email:
         raise HTTPException(status_code=400, detail="Invalid token")
-    user = crud.get_user_by_email(session=session, email=email)
+    user = await run_in_threadpool(crud.get_user_by_email, session=session, email=email)
     if not user:
         raise HTTPException(
             status_code=404,
@@ -116,10 +118,11 @@ def reset_password(session: SessionDep, body: NewPassword) -> Message:
         )
     elif not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    hashed_password = get_password_hash(password=body.new_password)
+    hashed_password = await get_password_hash_async(body.new_password)
     user.hashed_password = hashed_password
     session.add(user)
-    session.commit()
+    await run_in_threadpool(session.commit)
+    user_cache.invalidate(user.id)
     return Message(message="Password updated successfully")
 
 
@@ -166,20 +169,14 @@ def refresh_access_token(request: Request, response: Response, session: SessionD
     except InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid refresh token")
 
-    db_token = get_refresh_token_by_jti(session, jti)
-    if not db_token:
-        raise HTTPException(status_code=401, detail="Token has been used or is invalid")
-
-    # Invalidate the old token (rotate)
-    invalidate_refresh_token(session, jti)
-
     user = crud.get_user_by_id(session=session, id=user_id)
     if not user or not user.is_active:
         raise HTTPException(status_code=401, detail="User not found or inactive")
 
-    # Create new tokens
+    # Rotate: deactivate the old token and store the new one atomically
     new_refresh_token, new_jti = security.create_refresh_token(user_id, return_jti=True)
-    store_refresh_token(session, user_id, new_jti)
+    if not rotate_refresh_token(session, user_id=user.id, jti=jti, new_jti=new_jti):
+        raise HTTPException(status_code=401, detail="Token has been used or is invalid")
     new_access_token = security.create_access_token(user_id, timedelta(minutes=20))
 
     # Only set refresh token in cookie
@@ -1,40 +1,208 @@
 import uuid
-from typing import Any
-
-from fastapi import APIRouter, HTTPException
+from collections import defaultdict
+from collections.abc import Sequence
+from datetime import datetime
+from typing import Annotated, Any
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import selectinload
-from sqlmodel import func, select
+from sqlmodel import Session, select
+from sqlmodel.sql.expression import SelectOfScalar
 
 from app.api.deps import SessionDep
+from app.api.export import ExportFormat, export_response
+from app.api.fields import Fields, sparse_fields
+from app.api.pagination import Page, PageParamsDep, paginate
+from app.api.responses import model_response
+from app.core.config import settings
 from app.models.models import Message
-from app.models.nutrition import Ingredient, Meal, MealIngredient
+from app.models.nutrition import Meal, MealIngredient
+from app.nutrition import meal_import, meal_similarity
+from app.nutrition.catalog import CatalogSnapshot, catalog
+from app.nutrition.day_plan import refresh_meal_days
+from app.nutrition.engine import (
+    TOTAL_FIELDS,
+    IngredientQuantity,
+    NutrientTable,
+    compute_meal,
+)
+from app.nutrition.units import unit_list
 from app.schemas.nutrition import (
     MealCreate,
+    MealCreatedPublic,
+    MealDuplicatesPublic,
+    MealExport,
+    MealImport,
+    MealImportError,
+    MealImportResult,
+    MealIngredientBase,
+    MealIngredientPublic,
+    MealIngredientQuantity,
+    MealIngredientsPatch,
+    MealNutritionCompute,
+    MealNutritionPublic,
     MealPublic,
     MealsPublic,
     MealUpdate,
+    SimilarMealsPublic,
 )
 
 router = APIRouter(prefix="/meals", tags=["meals"])
 
+MealFieldsDep = Annotated[Fields, Depends(sparse_fields(MealPublic))]
 
-@router.get("/", response_model=MealsPublic)
-def get_meals(
-    session: SessionDep,
-    skip: int = 0,
-    limit: int = 100,
-    is_favorite: bool | None = None,
-    is_traditional: bool | None = None,
-    search: str | None = None,
-) -> Any:
+MAX_SIMILAR = 100
+MEAL_ORDER = (Meal.created_at, Meal.id)
+# Possible duplicates reported when creating a meal
+MAX_DUPLICATE_WARNINGS = 5
+
+
+def _load_ingredients(
+    session: Session, items: Sequence[IngredientQuantity]
+) -> CatalogSnapshot:
     """
-    Retrieve meals with optional filters.
-    For now, returns all meals (user_id is nullable).
+    Catalog snapshot containing every ingredient referenced by a meal.
+    All missing ingredients are reported in a single 404, and all units that
+    don't convert to grams in a single 422.
     """
-    # Build the base query with eager loading of ingredients
-    statement = select(Meal).options(
-        selectinload(Meal.meal_ingredients).selectinload(MealIngredient.ingredient)
+    snapshot = catalog.get_including(
+        session, (ingredient_data.ingredient_id for ingredient_data in items)
+    )
+    missing_ids = [
+        ingredient_id
+        for ingredient_id in dict.fromkeys(i.ingredient_id for i in items)
+        if ingredient_id not in snapshot.table
+    ]
+    if missing_ids:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Ingredients not found: {', '.join(map(str, missing_ids))}",
+        )
+    unconvertible = snapshot.table.unconvertible(items)
+    if unconvertible:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Units without a conversion to grams: {unit_list(unconvertible)}",
+        )
+    return snapshot
+
+
+def _meal_public(
+    meal: Meal, snapshot: CatalogSnapshot | None, *, lines: bool = True
+) -> MealPublic:
+    """
+    Serialize a meal, embedding its ingredients from the catalog snapshot.
+    Without a snapshot the ingredient records are left out, and with
+    lines=False the meal's ingredients are not read at all.
+    """
+    meal_ingredients = meal.meal_ingredients if lines else []
+    return MealPublic.model_validate(
+        {
+            **meal.model_dump(),
+            "meal_ingredients": [
+                MealIngredientPublic.model_validate(
+                    {
+                        **meal_ingredient.model_dump(),
+                        "ingredient": snapshot.get(meal_ingredient.ingredient_id)
+                        if snapshot
+                        else None,
+                    }
+                )
+                for meal_ingredient in meal_ingredients
+            ],
+        }
+    )
+
+
+def _sync_meal_ingredients(
+    meal: Meal,
+    items: Sequence[IngredientQuantity],
+    table: NutrientTable,
+) -> None:
+    """
+    Recompute nutrition and diff the meal's ingredients against ``items``.
+    Rows are matched on (ingredient_id, unit): matches are updated in place,
+    new keys are inserted and leftovers are deleted (delete-orphan). Unchanged
+    rows emit no SQL, and the flush batches each statement type.
+    """
+    nutrition = compute_meal(items, table)
+    meal.sqlmodel_update(nutrition.meal_totals())
+    meal.fingerprint = meal_similarity.fingerprint(
+        ingredient_data.ingredient_id for ingredient_data in items
+    )
+
+    existing: defaultdict[tuple[uuid.UUID, str], list[MealIngredient]] = defaultdict(
+        list
+    )
+    for meal_ingredient in meal.meal_ingredients:
+        existing[(meal_ingredient.ingredient_id, meal_ingredient.unit)].append(
+            meal_ingredient
+        )
+
+    synced: list[MealIngredient] = []
+    for ingredient_data, values in zip(items, nutrition.meal_lines(), strict=True):
+        matches = existing.get((ingredient_data.ingredient_id, ingredient_data.unit))
+        if matches:
+            meal_ingredient = matches.pop(0)
+            meal_ingredient.sqlmodel_update(
+                {"quantity": ingredient_data.quantity, **values}
+            )
+        else:
+            meal_ingredient = MealIngredient(
+                meal_id=meal.id,
+                ingredient_id=ingredient_data.ingredient_id,
+                quantity=ingredient_data.quantity,
+                unit=ingredient_data.unit,
+                **values,
+            )
+        synced.append(meal_ingredient)
+    meal.meal_ingredients = synced
+
+
+def meal_export(meal: Meal) -> MealExport:
+    return MealExport.model_validate(
+        {
+            **meal.model_dump(),
+            "ingredients": [mi.model_dump() for mi in meal.meal_ingredients],
+        }
+    )
+
+
+def meal_export_statement(updated_since: datetime | None) -> SelectOfScalar[Meal]:
+    statement = select(Meal).options(selectinload(Meal.meal_ingredients))
+    if updated_since:
+        statement = statement.where(Meal.updated_at >= updated_since)
+    return statement.order_by(Meal.updated_at, Meal.id)
+
+
+async def read_import(
+    request: Request,
+) -> tuple[list[tuple[int, MealImport]], list[MealImportError]]:
+    body = await request.body()
+    ndjson = request.headers.get("content-type", "").startswith(
+        "application/x-ndjson"
     )
+    errors: list[MealImportError] = []
+    try:
+        records = meal_import.read_records(body, ndjson=ndjson, errors=errors)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return records, errors
+
+
+def meals_statement(
+    fields: Fields,
+    *,
+    is_favorite: bool | None,
+    is_traditional: bool | None,
+    search: str | None,
+) -> SelectOfScalar[Meal]:
+    # Ingredient records are embedded from the catalog, not joined
+    statement = select(Meal)
+    if fields.selects("meal_ingredients"):
+        statement = statement.options(selectinload(Meal.meal_ingredients))
 
     # Apply filters
     if is_favorite is not None:
@@ -44,19 +212,160 @@ def get_meals(
     if search:
         search_pattern = f"%{search}%"
         statement = statement.where(
-            (Meal.name.ilike(search_pattern))
-            | (Meal.description.ilike(search_pattern))
+            (Meal.name.ilike(search_pattern)) | (Meal.description.ilike(search_pattern))
         )
+    return statement
+
+
+def page_ingredient_ids(meals: Page[Meal]) -> list[uuid.UUID]:
+    return [mi.ingredient_id for meal in meals.data for mi in meal.meal_ingredients]
+
+
+def meals_response(
+    meals: Page[Meal], snapshot: CatalogSnapshot | None, fields: Fields
+) -> Response:
+    lines = fields.selects("meal_ingredients")
+    return model_response(
+        MealsPublic(
+            data=[_meal_public(meal, snapshot, lines=lines) for meal in meals.data],
+            count=meals.count,
+            next_cursor=meals.next_cursor,
+        ),
+        fields.page(),
+    )
+
+
+def meal_statement(meal_id: uuid.UUID) -> SelectOfScalar[Meal]:
+    return (
+        select(Meal)
+        .where(Meal.id == meal_id)
+        .options(
+            selectinload(Meal.meal_ingredients).selectinload(MealIngredient.ingredient)
+        )
+    )
+
+
+@router.get("/", response_model=MealsPublic)
+def get_meals(
+    session: SessionDep,
+    page: PageParamsDep,
+    fields: MealFieldsDep,
+    is_favorite: bool | None = None,
+    is_traditional: bool | None = None,
+    search: str | None = None,
+) -> Any:
+    """
+    Retrieve meals with optional filters.
+    For now, returns all meals (user_id is nullable).
+    Pass fields to return only some fields, e.g. without the embedded
+    ingredients.
+    """
+    statement = meals_statement(
+        fields, is_favorite=is_favorite, is_traditional=is_traditional, search=search
+    )
+    meals = paginate(session, statement, page, MEAL_ORDER, descending=True)
+    snapshot = None
+    if fields.selects("meal_ingredients.ingredient"):
+        snapshot = catalog.get_including(session, page_ingredient_ids(meals))
+    return meals_response(meals, snapshot, fields)
+
+
+@router.get("/export")
+def export_meals(
+    request: Request,
+    format: ExportFormat = ExportFormat.ndjson,
+    updated_since: datetime | None = None,
+) -> StreamingResponse:
+    """
+    Stream all meals with their ingredients as NDJSON or CSV, oldest update first.
+    Pass updated_since for an incremental backup.
+    """
+    return export_response(
+        request,
+        meal_export_statement(updated_since),
+        meal_export,
+        MealExport,
+        format,
+        "meals",
+    )
+
+
+@router.post("/import", response_model=MealImportResult)
+async def import_meals(
+    request: Request, session: SessionDep, upsert: bool = False
+) -> Any:
+    """
+    Import meals from NDJSON (Content-Type: application/x-ndjson), a JSON
+    array of meals or a meal export file. Nutrition is recomputed, valid meals
+    are written in one transaction and invalid ones reported by position.
+    With upsert=true, meals replace existing meals with the same name.
+    """
+    records, errors = await read_import(request)
+    return await run_in_threadpool(
+        meal_import.import_meals, session, records, errors=errors, upsert=upsert
+    )
 
-    # Count total
-    count_statement = select(func.count()).select_from(statement.subquery())
-    count = session.exec(count_statement).one()
 
-    # Get paginated results
-    statement = statement.order_by(Meal.created_at.desc()).offset(skip).limit(limit)
-    meals = session.exec(statement).all()
+@router.post("/compute", response_model=MealNutritionPublic)
+def compute_meal_nutrition(
+    *, session: SessionDep, meal_in: MealNutritionCompute
+) -> Any:
+    """
+    Preview the nutrition of a meal without saving it.
+    """
+    snapshot = _load_ingredients(session, meal_in.ingredients)
+    nutrition = compute_meal(meal_in.ingredients, snapshot.table)
+
+    return MealNutritionPublic(
+        ingredients=[
+            MealIngredientBase(**ingredient_data.model_dump(), **values)
+            for ingredient_data, values in zip(
+                meal_in.ingredients, nutrition.meal_lines(), strict=True
+            )
+        ],
+        **nutrition.meal_totals(),
+    )
 
-    return MealsPublic(data=meals, count=count)
+
+@router.get("/duplicates", response_model=MealDuplicatesPublic)
+def get_meal_duplicates(
+    session: SessionDep,
+    min_similarity: Annotated[float | None, Query(ge=0, le=1)] = None,
+) -> Any:
+    """
+    Report groups of near-identical meals over all meals, largest first.
+    Each group names its oldest meal and the similarity of the others to it.
+    min_similarity defaults to the threshold of the duplicate warning.
+    """
+    if min_similarity is None:
+        min_similarity = settings.MEAL_DUPLICATE_SIMILARITY
+    groups = meal_similarity.duplicate_groups(session, min_similarity)
+    return MealDuplicatesPublic(data=groups, count=len(groups))
+
+
+@router.get("/{meal_id}/similar", response_model=SimilarMealsPublic)
+def get_similar_meals(
+    session: SessionDep,
+    meal_id: uuid.UUID,
+    k: Annotated[int, Query(ge=1, le=MAX_SIMILAR)] = 10,
+    min_similarity: Annotated[float, Query(ge=0, le=1)] = 0.0,
+) -> Any:
+    """
+    Get up to k meals with the most similar ingredients and quantities,
+    most similar first.
+    """
+    if not session.get(Meal, meal_id):
+        raise HTTPException(status_code=404, detail="Meal not found")
+    compositions = meal_similarity.meal_compositions(session, [meal_id])
+    return SimilarMealsPublic(
+        data=meal_similarity.find_similar(
+            session,
+            compositions[meal_id],
+            exclude_id=meal_id,
+            min_similarity=min_similarity,
+            limit=k,
+        )
+    )
 
 
 @router.get("/{meal_id}", response_model=MealPublic)
@@ -64,55 +373,43 @@ def get_meal(session: SessionDep, meal_id: uuid.UUID) -> Any:
     """
     Get meal by ID with all ingredients.
     """
-    statement = select(Meal).where(Meal.id == meal_id).options(
-        selectinload(Meal.meal_ingredients).selectinload(MealIngredient.ingredient)
-    )
-    meal = session.exec(statement).first()
+    meal = session.exec(meal_statement(meal_id)).first()
 
     if not meal:
         raise HTTPException(status_code=404, detail="Meal not found")
 
-    return meal
+    return model_response(MealPublic.model_validate(meal))
 
 
-@router.post("/", response_model=MealPublic)
+@router.post("/", response_model=MealCreatedPublic)
 def create_meal(*, session: SessionDep, meal_in: MealCreate) -> Any:
     """
     Create new meal with ingredients.
+    Nutrition values are computed server-side from the ingredients.
+    Existing meals with nearly the same ingredients are listed in
+    possible_duplicates; the meal is created anyway.
     """
     # Verify all ingredients exist
-    for ingredient_data in meal_in.ingredients:
-        ingredient = session.get(Ingredient, ingredient_data.ingredient_id)
-        if not ingredient:
-            raise HTTPException(
-                status_code=404,
-                detail=f"Ingredient {ingredient_data.ingredient_id} not found",
-            )
+    snapshot = _load_ingredients(session, meal_in.ingredients)
+    duplicates = meal_similarity.find_similar(
+        session,
+        meal_similarity.composition(meal_in.ingredients, snapshot.table),
+        min_similarity=settings.MEAL_DUPLICATE_SIMILARITY,
+        limit=MAX_DUPLICATE_WARNINGS,
+    )
 
-    # Create the meal (without ingredients first)
+    # Create the meal with its ingredients
     meal_dict = meal_in.model_dump(exclude={"ingredients"})
     meal = Meal.model_validate(meal_dict)
+    _sync_meal_ingredients(meal, meal_in.ingredients, snapshot.table)
     session.add(meal)
-    session.flush()  # Get the meal ID
-
-    # Create meal ingredients
-    for ingredient_data in meal_in.ingredients:
-        meal_ingredient = MealIngredient(
-            meal_id=meal.id,
-            **ingredient_data.model_dump()
-        )
-        session.add(meal_ingredient)
+    session.flush()
 
+    # Serialize before commit expires the rows, so nothing is reloaded
+    meal_public = _meal_public(meal, snapshot)
     session.commit()
 
-    # Refresh and load relationships
-    session.refresh(meal)
-    statement = select(Meal).where(Meal.id == meal.id).options(
-        selectinload(Meal.meal_ingredients).selectinload(MealIngredient.ingredient)
-    )
-    meal = session.exec(statement).first()
-
-    return meal
+    return MealCreatedPublic(**dict(meal_public), possible_duplicates=duplicates)
 
 
 @router.put("/{meal_id}", response_model=MealPublic)
@@ -124,50 +421,106 @@ def update_meal(
 ) -> Any:
     """
     Update a meal.
+    Totals are only changed by recomputing them from new ingredients.
     """
-    meal = session.get(Meal, meal_id)
+    statement = (
+        select(Meal)
+        .where(Meal.id == meal_id)
+        .options(selectinload(Meal.meal_ingredients))
+    )
+    meal = session.exec(statement).first()
     if not meal:
         raise HTTPException(status_code=404, detail="Meal not found")
 
     # Update meal properties
-    update_dict = meal_in.model_dump(exclude_unset=True, exclude={"ingredients"})
+    update_dict = meal_in.model_dump(
+        exclude_unset=True, exclude={"ingredients", *TOTAL_FIELDS}
+    )
     meal.sqlmodel_update(update_dict)
 
-    # If ingredients are being updated, delete old ones and create new ones
+    # If ingredients are being updated, apply only the differences
     if meal_in.ingredients is not None:
         # Verify all ingredients exist
-        for ingredient_data in meal_in.ingredients:
-            ingredient = session.get(Ingredient, ingredient_data.ingredient_id)
-            if not ingredient:
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Ingredient {ingredient_data.ingredient_id} not found",
-                )
-
-        # Delete existing meal ingredients
-        statement = select(MealIngredient).where(MealIngredient.meal_id == meal_id)
-        existing_meal_ingredients = session.exec(statement).all()
-        for meal_ingredient in existing_meal_ingredients:
-            session.delete(meal_ingredient)
-
-        # Create new meal ingredients
-        for ingredient_data in meal_in.ingredients:
-            meal_ingredient = MealIngredient(
-                meal_id=meal.id,
-                **ingredient_data.model_dump()
-            )
-            session.add(meal_ingredient)
+        snapshot = _load_ingredients(session, meal_in.ingredients)
+        _sync_meal_ingredients(meal, meal_in.ingredients, snapshot.table)
+    else:
+        snapshot = catalog.get(session)
 
     session.add(meal)
+    session.flush()
+    if meal_in.ingredients is not None:
+        refresh_meal_days(session, [meal.id])
+
+    # Serialize before commit expires the rows, so nothing is reloaded
+    meal_public = _meal_public(meal, snapshot)
     session.commit()
 
-    # Refresh and load relationships
-    statement = select(Meal).where(Meal.id == meal_id).options(
-        selectinload(Meal.meal_ingredients).selectinload(MealIngredient.ingredient)
+    return meal_public
+
+
+@router.patch("/{meal_id}/ingredients", response_model=MealPublic)
+def patch_meal_ingredients(
+    *,
+    session: SessionDep,
+    meal_id: uuid.UUID,
+    patch_in: MealIngredientsPatch,
+) -> Any:
+    """
+    Add, change or remove meal ingredients, keyed by ingredient and unit.
+    """
+    statement = (
+        select(Meal)
+        .where(Meal.id == meal_id)
+        .options(selectinload(Meal.meal_ingredients))
     )
     meal = session.exec(statement).first()
+    if not meal:
+        raise HTTPException(status_code=404, detail="Meal not found")
 
-    return meal
+    # Current ingredients keyed by (ingredient_id, unit); duplicates are merged
+    items: dict[tuple[uuid.UUID, str], MealIngredientQuantity] = {}
+    for meal_ingredient in meal.meal_ingredients:
+        key = (meal_ingredient.ingredient_id, meal_ingredient.unit)
+        quantity = meal_ingredient.quantity
+        if key in items:
+            quantity += items[key].quantity
+        items[key] = MealIngredientQuantity(
+            ingredient_id=meal_ingredient.ingredient_id,
+            unit=meal_ingredient.unit,
+            quantity=quantity,
+        )
+
+    for ingredient_key in [*patch_in.remove, *patch_in.change]:
+        if (ingredient_key.ingredient_id, ingredient_key.unit) not in items:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Ingredient {ingredient_key.ingredient_id} ({ingredient_key.unit}) is not in this meal",
+            )
+    for ingredient_key in patch_in.remove:
+        items.pop((ingredient_key.ingredient_id, ingredient_key.unit), None)
+    for ingredient_data in patch_in.change:
+        items[(ingredient_data.ingredient_id, ingredient_data.unit)] = ingredient_data
+    for ingredient_data in patch_in.add:
+        key = (ingredient_data.ingredient_id, ingredient_data.unit)
+        if key in items:
+            raise HTTPException(
+                status_code=409,
+                detail=f"Ingredient {ingredient_data.ingredient_id} ({ingredient_data.unit}) is already in this meal",
+            )
+        items[key] = ingredient_data
+
+    snapshot = _load_ingredients(session, list(items.values()))
+    _sync_meal_ingredients(meal, list(items.values()), snapshot.table)
+
+    session.add(meal)
+    session.flush()
+    refresh_meal_days(session, [meal.id])
+
+    # Serialize before commit expires the rows, so nothing is reloaded
+    meal_public = _meal_public(meal, snapshot)
+    session.commit()
+
+    return meal_public
 
 
 @router.delete("/{meal_id}")
@@ -180,6 +533,9 @@ def delete_meal(session: SessionDep, meal_id: uuid.UUID) -> Message:
         raise HTTPException(status_code=404, detail="Meal not found")
 
     session.delete(meal)
+    session.flush()
+    # Days keep the deleted meal's items, which now count for nothing
+    refresh_meal_days(session, [meal_id])
     session.commit()
     return Message(message="Meal deleted successfully")
 
@@ -0,0 +1,214 @@
+"""
+Meals router on the asyncio engine, served instead of ``meals`` when
+``ASYNC_DATABASE`` is set. Reads run their queries on the async session;
+writes and the similarity routes await the sync route logic through
+``AsyncSession.run_sync``. Imports and the duplicate report are CPU-bound, so
+they run the sync logic in the threadpool instead. Both stacks return
+identical responses.
+"""
+
+import uuid
+from datetime import datetime
+from typing import Annotated, Any
+
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+
+from app.api.deps import AsyncSessionDep, run_route_in_threadpool, run_sync_route
+from app.api.export import ExportFormat, async_export_response
+from app.api.pagination import PageParamsDep, paginate_async
+from app.api.responses import model_response
+from app.api.routes import meals
+from app.models.models import Message
+from app.nutrition import meal_import
+from app.nutrition.catalog import catalog
+from app.schemas.nutrition import (
+    MealCreate,
+    MealCreatedPublic,
+    MealDuplicatesPublic,
+    MealExport,
+    MealImportResult,
+    MealIngredientsPatch,
+    MealNutritionCompute,
+    MealNutritionPublic,
+    MealPublic,
+    MealsPublic,
+    MealUpdate,
+    SimilarMealsPublic,
+)
+
+router = APIRouter(prefix="/meals", tags=["meals"])
+
+
+@router.get("/", response_model=MealsPublic)
+async def get_meals(
+    session: AsyncSessionDep,
+    page: PageParamsDep,
+    fields: meals.MealFieldsDep,
+    is_favorite: bool | None = None,
+    is_traditional: bool | None = None,
+    search: str | None = None,
+) -> Any:
+    """
+    Retrieve meals with optional filters.
+    """
+    statement = meals.meals_statement(
+        fields, is_favorite=is_favorite, is_traditional=is_traditional, search=search
+    )
+    page_meals = await paginate_async(
+        session, statement, page, meals.MEAL_ORDER, descending=True
+    )
+    snapshot = None
+    if fields.selects("meal_ingredients.ingredient"):
+        snapshot = await catalog.get_including_async(
+            session, meals.page_ingredient_ids(page_meals)
+        )
+    return meals.meals_response(page_meals, snapshot, fields)
+
+
+@router.get("/export")
+async def export_meals(
+    request: Request,
+    format: ExportFormat = ExportFormat.ndjson,
+    updated_since: datetime | None = None,
+) -> StreamingResponse:
+    """
+    Stream all meals with their ingredients as NDJSON or CSV, oldest update first.
+    Pass updated_since for an incremental backup.
+    """
+    return async_export_response(
+        request,
+        meals.meal_export_statement(updated_since),
+        meals.meal_export,
+        MealExport,
+        format,
+        "meals",
+    )
+
+
+@router.post("/import", response_model=MealImportResult)
+async def import_meals(request: Request, upsert: bool = False) -> Any:
+    """
+    Import meals from NDJSON (Content-Type: application/x-ndjson), a JSON
+    array of meals or a meal export file.
+    """
+    records, errors = await meals.read_import(request)
+    return await run_route_in_threadpool(
+        meal_import.import_meals, records=records, errors=errors, upsert=upsert
+    )
+
+
+@router.post("/compute", response_model=MealNutritionPublic)
+async def compute_meal_nutrition(
+    *, session: AsyncSessionDep, meal_in: MealNutritionCompute
+) -> Any:
+    """
+    Preview the nutrition of a meal without saving it.
+    """
+    return await run_sync_route(session, meals.compute_meal_nutrition, meal_in=meal_in)
+
+
+@router.get("/duplicates", response_model=MealDuplicatesPublic)
+async def get_meal_duplicates(
+    min_similarity: Annotated[float | None, Query(ge=0, le=1)] = None,
+) -> Any:
+    """
+    Report groups of near-identical meals over all meals, largest first.
+    """
+    return await run_route_in_threadpool(
+        meals.get_meal_duplicates, min_similarity=min_similarity
+    )
+
+
+@router.get("/{meal_id}/similar", response_model=SimilarMealsPublic)
+async def get_similar_meals(
+    session: AsyncSessionDep,
+    meal_id: uuid.UUID,
+    k: Annotated[int, Query(ge=1, le=meals.MAX_SIMILAR)] = 10,
+    min_similarity: Annotated[float, Query(ge=0, le=1)] = 0.0,
+) -> Any:
+    """
+    Get up to k meals with the most similar ingredients and quantities.
+    """
+    return await run_sync_route(
+        session,
+        meals.get_similar_meals,
+        meal_id=meal_id,
+        k=k,
+        min_similarity=min_similarity,
+    )
+
+
+@router.get("/{meal_id}", response_model=MealPublic)
+async def get_meal(session: AsyncSessionDep, meal_id: uuid.UUID) -> Any:
+    """
+    Get meal by ID with all ingredients.
+    """
+    meal = (await session.exec(meals.meal_statement(meal_id))).first()
+
+    if not meal:
+        raise HTTPException(status_code=404, detail="Meal not found")
+
+    return model_response(MealPublic.model_validate(meal))
+
+
+@router.post("/", response_model=MealCreatedPublic)
+async def create_meal(*, session: AsyncSessionDep, meal_in: MealCreate) -> Any:
+    """
+    Create new meal with ingredients.
+    """
+    return await run_sync_route(session, meals.create_meal, meal_in=meal_in)
+
+
+@router.put("/{meal_id}", response_model=MealPublic)
+async def update_meal(
+    *,
+    session: AsyncSessionDep,
+    meal_id: uuid.UUID,
+    meal_in: MealUpdate,
+) -> Any:
+    """
+    Update a meal.
+    """
+    return await run_sync_route(
+        session, meals.update_meal, meal_id=meal_id, meal_in=meal_in
+    )
+
+
+@router.patch("/{meal_id}/ingredients", response_model=MealPublic)
+async def patch_meal_ingredients(
+    *,
+    session: AsyncSessionDep,
+    meal_id: uuid.UUID,
+    patch_in: MealIngredientsPatch,
+) -> Any:
+    """
+    Add, change or remove meal ingredients, keyed by ingredient and unit.
+    """
+    return await run_sync_route(
+        session, meals.patch_meal_ingredients, meal_id=meal_id, patch_in=patch_in
+    )
+
+
+@router.delete("/{meal_id}")
+async def delete_meal(session: AsyncSessionDep, meal_id: uuid.UUID) -> Message:
+    """
+    Delete a meal.
+    """
+    return await run_sync_route(session, meals.delete_meal, meal_id=meal_id)
+
+
+@router.patch("/{meal_id}/favorite", response_model=MealPublic)
+async def toggle_meal_favorite(
+    session: AsyncSessionDep, meal_id: uuid.UUID, is_favorite: bool
+) -> Any:
+    """
+    Toggle meal favorite status.
+    """
+    return await run_sync_route(
+        session,
+        meals.toggle_meal_favorite,
+        MealPublic,
+        meal_id=meal_id,
+        is_favorite=is_favorite,
+    )
@@ -0,0 +1,116 @@
+import uuid
+from datetime import date
+from typing import Annotated, Any
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import select
+
+from app.api.deps import SessionDep, get_current_active_superuser
+from app.api.pagination import Page, PageParamsDep, paginate
+from app.models.nutrition import MealRecomputeJob
+from app.nutrition.recompute import enqueue_recompute
+from app.nutrition.rollup import read_stats
+from app.schemas.nutrition import (
+    MealRecomputeJobCreate,
+    MealRecomputeJobPublic,
+    MealRecomputeJobsPublic,
+    NutritionStatsPublic,
+    StatsGranularity,
+)
+
+router = APIRouter(prefix="/nutrition", tags=["nutrition"])
+
+# Longest range served in one request
+MAX_STATS_DAYS = 366 * 5
+
+RECOMPUTE_JOB_ORDER = (MealRecomputeJob.created_at, MealRecomputeJob.id)
+
+
+def check_stats_range(start: date, end: date) -> None:
+    if end < start:
+        raise HTTPException(status_code=400, detail="'to' is before 'from'")
+    if (end - start).days >= MAX_STATS_DAYS:
+        raise HTTPException(
+            status_code=400, detail=f"Range is longer than {MAX_STATS_DAYS} days"
+        )
+
+
+def recompute_jobs_public(jobs: Page[MealRecomputeJob]) -> MealRecomputeJobsPublic:
+    return MealRecomputeJobsPublic(
+        data=[MealRecomputeJobPublic.model_validate(job) for job in jobs.data],
+        count=jobs.count,
+        next_cursor=jobs.next_cursor,
+    )
+
+
+@router.get(
+    "/stats",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=NutritionStatsPublic,
+)
+def get_nutrition_stats(
+    session: SessionDep,
+    start: Annotated[date, Query(alias="from")],
+    end: Annotated[date, Query(alias="to")],
+    granularity: StatsGranularity = StatsGranularity.day,
+    user_id: uuid.UUID | None = None,
+) -> Any:
+    """
+    Nutrition totals of the saved days planned from `from` to `to` included,
+    summed per day, week (starting on Monday) or month. Periods without any
+    saved day are left out. Read from the daily rollups only.
+    Saved days aren't owned by users yet, so the stats are for superusers;
+    they cover every user's days unless user_id is given.
+    """
+    check_stats_range(start, end)
+    return NutritionStatsPublic(
+        granularity=granularity,
+        data=read_stats(session, start, end, granularity, user_id),
+    )
+
+
+@router.get(
+    "/recompute-jobs",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=MealRecomputeJobsPublic,
+)
+def get_recompute_jobs(session: SessionDep, page: PageParamsDep) -> Any:
+    """
+    Meal recomputations queued after ingredient nutrient edits, most recent
+    first, with their progress.
+    """
+    jobs = paginate(
+        session, select(MealRecomputeJob), page, RECOMPUTE_JOB_ORDER, descending=True
+    )
+    return recompute_jobs_public(jobs)
+
+
+@router.post(
+    "/recompute-jobs",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=MealRecomputeJobPublic,
+)
+def create_recompute_job(session: SessionDep, job_in: MealRecomputeJobCreate) -> Any:
+    """
+    Queue a recomputation of the meals using any of the given ingredients,
+    or of every meal when none is given.
+    """
+    job = enqueue_recompute(session, job_in.ingredient_ids)
+    session.commit()
+    session.refresh(job)
+    return job
+
+
+@router.get(
+    "/recompute-jobs/{job_id}",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=MealRecomputeJobPublic,
+)
+def get_recompute_job(session: SessionDep, job_id: uuid.UUID) -> Any:
+    """
+    Get a meal recomputation and its progress.
+    """
+    job = session.get(MealRecomputeJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Recompute job not found")
+    return job
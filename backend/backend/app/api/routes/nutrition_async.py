@@ -0,0 +1,102 @@
+"""
+Nutrition stats router on the asyncio engine, served instead of ``nutrition``
+when ``ASYNC_DATABASE`` is set. Reads run their queries on the async session;
+queueing a job awaits the sync route through ``AsyncSession.run_sync``.
+"""
+
+import uuid
+from datetime import date
+from typing import Annotated, Any
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlmodel import select
+
+from app.api.deps import AsyncSessionDep, get_current_active_superuser, run_sync_route
+from app.api.pagination import PageParamsDep, paginate_async
+from app.api.routes import nutrition
+from app.models.nutrition import MealRecomputeJob
+from app.nutrition.rollup import read_stats_async
+from app.schemas.nutrition import (
+    MealRecomputeJobCreate,
+    MealRecomputeJobPublic,
+    MealRecomputeJobsPublic,
+    NutritionStatsPublic,
+    StatsGranularity,
+)
+
+router = APIRouter(prefix="/nutrition", tags=["nutrition"])
+
+
+@router.get(
+    "/stats",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=NutritionStatsPublic,
+)
+async def get_nutrition_stats(
+    session: AsyncSessionDep,
+    start: Annotated[date, Query(alias="from")],
+    end: Annotated[date, Query(alias="to")],
+    granularity: StatsGranularity = StatsGranularity.day,
+    user_id: uuid.UUID | None = None,
+) -> Any:
+    """
+    Nutrition totals of the saved days planned from `from` to `to` included,
+    summed per day, week (starting on Monday) or month.
+    """
+    nutrition.check_stats_range(start, end)
+    return NutritionStatsPublic(
+        granularity=granularity,
+        data=await read_stats_async(session, start, end, granularity, user_id),
+    )
+
+
+@router.get(
+    "/recompute-jobs",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=MealRecomputeJobsPublic,
+)
+async def get_recompute_jobs(session: AsyncSessionDep, page: PageParamsDep) -> Any:
+    """
+    Meal recomputations queued after ingredient nutrient edits, most recent
+    first, with their progress.
+    """
+    jobs = await paginate_async(
+        session,
+        select(MealRecomputeJob),
+        page,
+        nutrition.RECOMPUTE_JOB_ORDER,
+        descending=True,
+    )
+    return nutrition.recompute_jobs_public(jobs)
+
+
+@router.post(
+    "/recompute-jobs",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=MealRecomputeJobPublic,
+)
+async def create_recompute_job(
+    session: AsyncSessionDep, job_in: MealRecomputeJobCreate
+) -> Any:
+    """
+    Queue a recomputation of the meals using any of the given ingredients,
+    or of every meal when none is given.
+    """
+    return await run_sync_route(
+        session, nutrition.create_recompute_job, MealRecomputeJobPublic, job_in=job_in
+    )
+
+
+@router.get(
+    "/recompute-jobs/{job_id}",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=MealRecomputeJobPublic,
+)
+async def get_recompute_job(session: AsyncSessionDep, job_id: uuid.UUID) -> Any:
+    """
+    Get a meal recomputation and its progress.
+    """
+    job = await session.get(MealRecomputeJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Recompute job not found")
+    return job
@@ -2,15 +2,21 @@ import uuid
 from typing import Any
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import col, delete, func, select
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import col, delete, select
 
 from app.api.deps import (
     CurrentUser,
     SessionDep,
     get_current_active_superuser,
 )
+from app.api.pagination import PageParamsDep, paginate
 from app.core.config import settings
-from app.core.security import get_password_hash, verify_password
+from app.core.security import (
+    get_password_hash_async,
+    verify_and_update_password_async,
+)
+from app.core.user_cache import user_cache
 from app.crud import crud
 from app.models.models import (
     Avatar,
@@ -42,40 +48,47 @@ router = APIRouter(prefix="/users", tags=["users"])
     dependencies=[Depends(get_current_active_superuser)],
     response_model=UsersPublic,
 )
-def read_users(session: SessionDep, skip: int = 0, limit: int = 100) -> Any:
+def read_users(session: SessionDep, page: PageParamsDep) -> Any:
     """
     Retrieve users.
     """
 
-    count_statement = select(func.count()).select_from(User)
-    count = session.exec(count_statement).one()
-
-    statement = select(User).offset(skip).limit(limit)
-    users = session.exec(statement).all()
+    users = paginate(session, select(User), page, (User.created_at, User.id))
 
-    return UsersPublic(data=users, count=count)
+    return UsersPublic(
+        data=users.data, count=users.count, next_cursor=users.next_cursor
+    )
 
 
 @router.post(
     "/", dependencies=[Depends(get_current_active_superuser)], response_model=UserPublic
 )
-def create_user(*, session: SessionDep, user_in: UserCreate) -> Any:
+async def create_user(*, session: SessionDep, user_in: UserCreate) -> Any:
     """
     Create new user.
     """
-    user = crud.get_user_by_email(session=session, email=user_in.email)
+    user = await run_in_threadpool(
+        crud.get_user_by_email, session=session, email=user_in.email
+    )
     if user:
         raise HTTPException(
             status_code=400,
             detail="The user with this email already exists in the system.",
         )
 
-    user = crud.create_user(session=session, user_create=user_in)
+    hashed_password = await get_password_hash_async(user_in.password)
+    user = await run_in_threadpool(
+        crud.create_user,
+        session=session,
+        user_create=user_in,
+        hashed_password=hashed_password,
+    )
     if settings.emails_enabled and user_in.email:
         email_data = generate_new_account_email(
             email_to=user_in.email, username=user_in.email, password=user_in.password
         )
-        send_email(
+        await run_in_threadpool(
+            send_email,
             email_to=user_in.email,
             subject=email_data.subject,
             html_content=email_data.html_content,
@@ -109,27 +122,34 @@ def update_user_me(
     current_user.sqlmodel_update(user_data)
     session.add(current_user)
     session.commit()
+    user_cache.invalidate(current_user.id)
     session.refresh(current_user)
     return current_user
 
 
 @router.patch("/me/password", response_model=Message)
-def update_password_me(
+async def update_password_me(
     *, session: SessionDep, body: UpdatePassword, current_user: CurrentUser
 ) -> Any:
     """
     Update own password.
     """
-    if not verify_password(body.current_password, current_user.hashed_password):
+    # Not part of the cached user snapshot, so reading it may query
+    stored_hash = await run_in_threadpool(lambda: current_user.hashed_password)
+    verified, _ = await verify_and_update_password_async(
+        body.current_password, stored_hash
+    )
+    if not verified:
         raise HTTPException(status_code=400, detail="Incorrect password")
     if body.current_password == body.new_password:
         raise HTTPException(
             status_code=400, detail="New password cannot be the same as the current one"
         )
-    hashed_password = get_password_hash(body.new_password)
+    hashed_password = await get_password_hash_async(body.new_password)
     current_user.hashed_password = hashed_password
     session.add(current_user)
-    session.commit()
+    await run_in_threadpool(session.commit)
+    user_cache.invalidate(current_user.id)
     return Message(message="Password updated successfully")
 
 
@@ -157,6 +177,7 @@ def select_user_avatar(
     current_user.avatar_id = avatar_id
     session.add(current_user)
     session.commit()
+    user_cache.invalidate(current_user.id)
     session.refresh(current_user)
 
     return current_user
@@ -170,6 +191,7 @@ def reset_user_avatar(session: SessionDep, current_user: CurrentUser) -> Any:
     current_user.avatar_id = None
     session.add(current_user)
     session.commit()
+    user_cache.invalidate(current_user.id)
     session.refresh(current_user)
 
     return current_user
@@ -188,6 +210,7 @@ def deactivate_user_account(session: SessionDep, current_user: CurrentUser) -> A
     current_user.is_active = False
     session.add(current_user)
     session.commit()
+    user_cache.invalidate(current_user.id)
 
     return Message(message="Account deactivated successfully")
 
@@ -221,24 +244,31 @@ def delete_user_me(session: SessionDep, current_user: CurrentUser) -> Any:
         )
     session.delete(current_user)
     session.commit()
+    user_cache.invalidate(current_user.id)
     return Message(message="User deleted successfully")
 
 
 @router.post("/signup", response_model=UserPublic)
-def register_user(session: SessionDep, user_in: UserRegister) -> Any:
+async def register_user(session: SessionDep, user_in: UserRegister) -> Any:
     """
     Create new user without the need to be logged in.
     """
-    user = crud.get_user_by_email(session=session, email=user_in.email)
+    user = await run_in_threadpool(
+        crud.get_user_by_email, session=session, email=user_in.email
+    )
     if user:
         raise HTTPException(
             status_code=400,
             detail="The user with this email already exists in the system",
         )
     user_create = UserCreate.model_validate(user_in)
-    user = crud.create_user(session=session, user_create=user_create)
-
-    session.commit()
+    hashed_password = await get_password_hash_async(user_in.password)
+    user = await run_in_threadpool(
+        crud.create_user,
+        session=session,
+        user_create=user_create,
+        hashed_password=hashed_password,
+    )
     return user
 
 
@@ -265,7 +295,7 @@ def read_user_by_id(
     dependencies=[Depends(get_current_active_superuser)],
     response_model=UserPublic,
 )
-def update_user(
+async def update_user(
     *,
     session: SessionDep,
     user_id: uuid.UUID,
@@ -275,20 +305,32 @@ def update_user(
     Update a user.
     """
 
-    db_user = session.get(User, user_id)
+    db_user = await run_in_threadpool(session.get, User, user_id)
     if not db_user:
         raise HTTPException(
             status_code=404,
             detail="The user with this id does not exist in the system",
         )
     if user_in.email:
-        existing_user = crud.get_user_by_email(session=session, email=user_in.email)
+        existing_user = await run_in_threadpool(
+            crud.get_user_by_email, session=session, email=user_in.email
+        )
         if existing_user and existing_user.id != user_id:
             raise HTTPException(
                 status_code=409, detail="User with this email already exists"
             )
 
-    db_user = crud.update_user(session=session, db_user=db_user, user_in=user_in)
+    hashed_password = None
+    if user_in.password:
+        hashed_password = await get_password_hash_async(user_in.password)
+    db_user = await run_in_threadpool(
+        crud.update_user,
+        session=session,
+        db_user=db_user,
+        user_in=user_in,
+        hashed_password=hashed_password,
+    )
+    user_cache.invalidate(user_id)
     return db_user
 
 
@@ -310,4 +352,5 @@ def delete_user(
     session.exec(statement)  # type: ignore
     session.delete(user)
     session.commit()
+    user_cache.invalidate(user_id)
     return Message(message="User deleted successfully")
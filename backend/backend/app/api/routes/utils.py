@@ -1,8 +1,14 @@
+import os
+
 from fastapi import APIRouter, Depends
 from pydantic.networks import EmailStr
 
 from app.api.deps import get_current_active_superuser
+from app.core.db import async_engine, engine
+from app.core.pool import pool_stats
+from app.core.user_cache import user_cache
 from app.models.models import Message
+from app.schemas.metrics import Metrics
 from app.utils import generate_test_email, send_email
 
 router = APIRouter(prefix="/utils", tags=["utils"])
@@ -29,3 +35,19 @@ def test_email(email_to: EmailStr) -> Message:
 @router.get("/health-check/")
 async def health_check() -> bool:
     return True
+
+
+@router.get("/metrics/", dependencies=[Depends(get_current_active_superuser)])
+def metrics() -> Metrics:
+    """
+    Connection pool and auth cache metrics of the worker that serves the
+    request.
+    """
+    return Metrics(
+        pid=os.getpid(),
+        pools={
+            "sync": pool_stats(engine),
+            "async": pool_stats(async_engine.sync_engine),
+        },
+        auth_cache=user_cache.stats(),
+    )
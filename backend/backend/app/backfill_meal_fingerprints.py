@@ -0,0 +1,30 @@
+import argparse
+import logging
+
+from sqlmodel import Session
+
+from app.core.db import engine
+from app.nutrition.meal_similarity import rebuild_fingerprints
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compute the composition fingerprint of every meal."
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=5000, help="meals updated at a time"
+    )
+    args = parser.parse_args()
+
+    logger.info("Computing meal fingerprints")
+    with Session(engine) as session:
+        count = rebuild_fingerprints(session, chunk_size=args.chunk_size)
+        session.commit()
+    logger.info("Fingerprints computed for %d meals", count)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+import argparse
+import logging
+
+from sqlmodel import Session
+
+from app.core.db import engine
+from app.nutrition.rollup import rebuild_rollups
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Rebuild the daily nutrition rollups from the saved days."
+    )
+    parser.add_argument(
+        "--chunk-size", type=int, default=5000, help="saved days read at a time"
+    )
+    args = parser.parse_args()
+
+    logger.info("Rebuilding nutrition rollups")
+    with Session(engine) as session:
+        count = rebuild_rollups(session, chunk_size=args.chunk_size)
+    logger.info("Nutrition rollups rebuilt from %d saved days", count)
+
+
+if __name__ == "__main__":
+    main()
@@ -81,6 +81,71 @@ class Settings(BaseSettings):
             path=self.POSTGRES_DB,
         )
 
+    # Connection pool, per engine and per worker process
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    # Seconds before a connection is replaced; -1 keeps connections forever
+    DB_POOL_RECYCLE: int = -1
+    DB_POOL_PRE_PING: bool = False
+    # Server-side statement_timeout in milliseconds; 0 disables it
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+
+    # Count each request's SQL statements and report them in a Server-Timing
+    # header. A statement run this many times in one request is logged as a
+    # likely N+1; 0 disables the warning. Off by default: every statement pays
+    # for the cursor events. Local development and load tests turn it on
+    SQL_STATS: bool = False
+    SQL_REPEATED_STATEMENT_THRESHOLD: int = 10
+
+    # bcrypt cost factor; stored hashes are migrated to it on login
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    # Per worker process: hashing threads, and hashes queued or running
+    # before password endpoints answer 429
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 16
+
+    # Every worker deletes expired and deactivated refresh tokens this often;
+    # 0 disables the sweeper
+    REFRESH_TOKEN_SWEEP_INTERVAL_SECONDS: float = 3600.0
+    REFRESH_TOKEN_SWEEP_BATCH_SIZE: int = 1000
+
+    # Per-worker cache of authenticated users; a size of 0 disables it
+    AUTH_CACHE_MAX_SIZE: int = 10_000
+    AUTH_CACHE_TTL_SECONDS: float = 30.0
+
+    # Seconds browsers and CDNs may reuse catalog responses (ingredients,
+    # categories) before revalidating them with their ETag
+    CATALOG_CACHE_MAX_AGE: int = 60
+    # Serialized and precompressed catalog responses kept per worker for the
+    # current catalog version, one per distinct query string
+    CATALOG_RESPONSE_CACHE_SIZE: int = 256
+
+    # Responses smaller than this many bytes are sent uncompressed
+    COMPRESSION_MIN_SIZE: int = 1000
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+
+    # POST /days/optimize: solver time budget, and how many of the most
+    # recent meals are candidates next to the ingredient catalog
+    DAY_OPTIMIZER_TIME_LIMIT_SECONDS: float = 0.5
+    DAY_OPTIMIZER_MAX_MEALS: int = 200
+
+    # Similarity from which a new meal is reported as a possible duplicate
+    # of an existing one, and the default of the duplicates report. A new
+    # meal is compared to the 500 meals sharing the most fingerprint bands
+    # with it (meal_similarity.MAX_CANDIDATES)
+    MEAL_DUPLICATE_SIMILARITY: float = 0.9
+
+    # Polling interval of the job recomputing meals after ingredient edits
+    # (0 disables it), and meals recomputed per transaction
+    MEAL_RECOMPUTE_INTERVAL_SECONDS: float = 10.0
+    MEAL_RECOMPUTE_CHUNK_SIZE: int = 1000
+
+    # Serve the nutrition routers (meals, ingredients, days) from the asyncio
+    # engine instead of the threadpool + sync engine
+    ASYNC_DATABASE: bool = False
+
     SMTP_TLS: bool = True
     SMTP_SSL: bool = False
     SMTP_PORT: int = 587
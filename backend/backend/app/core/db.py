@@ -1,6 +1,11 @@
+from typing import Any
+
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import Session, create_engine, select
 
 from app.core.config import settings
+from app.core.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool, instrument
+from app.core.query_stats import instrument_queries
 from app.crud import crud
 from app.models.models import (
     User,
@@ -9,7 +14,38 @@ from app.schemas.users import (
     UserCreate,
 )
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+
+def _engine_options() -> dict[str, Any]:
+    options: dict[str, Any] = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        options["connect_args"] = {
+            "options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+        }
+    return options
+
+
+engine = create_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI),
+    poolclass=InstrumentedQueuePool,
+    **_engine_options(),
+)
+# psycopg 3 serves both engines; the async one uses its asyncio connection
+async_engine = create_async_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI),
+    poolclass=InstrumentedAsyncQueuePool,
+    **_engine_options(),
+)
+instrument(engine)
+instrument(async_engine.sync_engine)
+if settings.SQL_STATS:
+    instrument_queries(engine)
+    instrument_queries(async_engine.sync_engine)
 
 
 # make sure all SQLModel models are imported (app.models) before initializing DB
@@ -0,0 +1,140 @@
+"""
+Connection pool telemetry.
+
+Both engines use a ``QueuePool`` subclass that times every checkout (queue
+wait, overflow connect and pre-ping included) and counts the callers
+currently waiting for a connection. Pool events count new and invalidated
+connections; in-use and overflow counts are read from the pool when the
+metrics are collected. Every worker process has its own pools, so the
+numbers are per worker.
+"""
+
+import bisect
+import threading
+import time
+from typing import Any
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection, QueuePool
+
+from app.schemas.metrics import PoolStats
+
+# Upper bounds (seconds) of the checkout latency histogram
+CHECKOUT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class PoolMetrics:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.checkout_seconds_total = 0.0
+        self.checkout_seconds_max = 0.0
+        # Last slot counts checkouts slower than every bucket
+        self.checkout_buckets = [0] * (len(CHECKOUT_BUCKETS) + 1)
+
+    def checkout_started(self) -> None:
+        with self._lock:
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+
+    def checkout_finished(self, seconds: float) -> None:
+        with self._lock:
+            self.waiting -= 1
+            self.checkouts += 1
+            self.checkout_seconds_total += seconds
+            self.checkout_seconds_max = max(self.checkout_seconds_max, seconds)
+            self.checkout_buckets[bisect.bisect_left(CHECKOUT_BUCKETS, seconds)] += 1
+
+    def checkout_failed(self, *, timed_out: bool) -> None:
+        with self._lock:
+            self.waiting -= 1
+            if timed_out:
+                self.timeouts += 1
+
+    def connected(self) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def invalidated(self) -> None:
+        with self._lock:
+            self.invalidations += 1
+
+
+class InstrumentedQueuePool(QueuePool):
+    metrics: PoolMetrics
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def connect(self) -> PoolProxiedConnection:
+        self.metrics.checkout_started()
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except BaseException as e:
+            self.metrics.checkout_failed(timed_out=isinstance(e, exc.TimeoutError))
+            raise
+        self.metrics.checkout_finished(time.perf_counter() - start)
+        return connection
+
+    def recreate(self) -> QueuePool:
+        # engine.dispose() replaces the pool; keep counting into the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics  # type: ignore[attr-defined]
+        return pool
+
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument(engine: Engine) -> None:
+    """Count new and invalidated connections of ``engine``'s pool."""
+
+    @event.listens_for(engine, "connect")
+    def _connect(*_args: Any) -> None:
+        _metrics(engine).connected()
+
+    @event.listens_for(engine, "invalidate")
+    def _invalidate(*_args: Any) -> None:
+        _metrics(engine).invalidated()
+
+
+def _metrics(engine: Engine) -> PoolMetrics:
+    return engine.pool.metrics  # type: ignore[attr-defined, no-any-return]
+
+
+def pool_stats(engine: Engine) -> PoolStats:
+    pool = engine.pool
+    metrics = _metrics(engine)
+    with metrics._lock:
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(
+            CHECKOUT_BUCKETS, metrics.checkout_buckets, strict=False
+        ):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = cumulative + metrics.checkout_buckets[-1]
+        return PoolStats(
+            size=pool.size(),  # type: ignore[attr-defined]
+            in_use=pool.checkedout(),  # type: ignore[attr-defined]
+            idle=pool.checkedin(),  # type: ignore[attr-defined]
+            overflow=max(pool.overflow(), 0),  # type: ignore[attr-defined]
+            waiting=metrics.waiting,
+            max_waiting=metrics.max_waiting,
+            checkouts=metrics.checkouts,
+            timeouts=metrics.timeouts,
+            connects=metrics.connects,
+            invalidations=metrics.invalidations,
+            checkout_seconds_total=metrics.checkout_seconds_total,
+            checkout_seconds_max=metrics.checkout_seconds_max,
+            checkout_seconds_buckets=buckets,
+        )
@@ -0,0 +1,147 @@
+"""
+Per-request SQL statement statistics.
+
+Cursor events on both engines count the statements issued while handling a
+request and the time spent in them. ``QueryStatsMiddleware`` reports both in a
+``Server-Timing`` header (``db;dur=<ms>;desc="<n> queries"``) and logs a
+warning when one statement runs ``SQL_REPEATED_STATEMENT_THRESHOLD`` times or
+more in a request, the mark of an N+1 load. Streamed responses (no
+``Content-Length``) get no header: it is sent before the body's queries run,
+so only the warning covers them. Statements are grouped by their
+SQL text, where bound values are placeholders, so the same query with other
+values counts as the same statement.
+
+:func:`observe_queries` records every statement of the process while it is
+active, whichever request or thread runs it. Tests use it to bound the
+queries of an endpoint.
+"""
+
+import logging
+import threading
+import time
+from collections import Counter
+from collections.abc import Generator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Counter[str] = Counter()
+
+    def record(self, statement: str, seconds: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.seconds += seconds
+            self.statements[statement] += 1
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        """Statements run at least ``threshold`` times, most frequent first."""
+        with self._lock:
+            return [
+                (statement, count)
+                for statement, count in self.statements.most_common()
+                if count >= threshold
+            ]
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.seconds * 1000:.1f};desc="{self.count} queries"'
+
+    def report(self) -> str:
+        with self._lock:
+            return "\n".join(
+                f"{count} x {statement}"
+                for statement, count in self.statements.most_common()
+            )
+
+
+_request_stats: ContextVar[QueryStats | None] = ContextVar(
+    "request_query_stats", default=None
+)
+_observers: list[QueryStats] = []
+_observers_lock = threading.Lock()
+
+
+def _record(statement: str, seconds: float) -> None:
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.record(statement, seconds)
+    for observer in tuple(_observers):
+        observer.record(statement, seconds)
+
+
+@contextmanager
+def observe_queries() -> Generator[QueryStats, None, None]:
+    """Record every statement run on the instrumented engines in the block."""
+    stats = QueryStats()
+    with _observers_lock:
+        _observers.append(stats)
+    try:
+        yield stats
+    finally:
+        with _observers_lock:
+            _observers.remove(stats)
+
+
+def instrument_queries(engine: Engine) -> None:
+    """Time and record every statement run on ``engine``."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn: Any, *_args: Any) -> None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn: Any, _cursor: Any, statement: str, *_args: Any) -> None:
+        _record(statement, time.perf_counter() - conn.info["query_started"].pop())
+
+    @event.listens_for(engine, "handle_error")
+    def _error(context: Any) -> None:
+        started = context.connection and context.connection.info.get("query_started")
+        if started:
+            started.pop()
+
+
+class QueryStatsMiddleware:
+    def __init__(self, app: ASGIApp, repeated_threshold: int) -> None:
+        self.app = app
+        self.repeated_threshold = repeated_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                if "content-length" in headers:
+                    headers.append("Server-Timing", stats.server_timing())
+            await send(message)
+
+        token = _request_stats.set(stats)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_stats.reset(token)
+            if self.repeated_threshold > 0:
+                for statement, count in stats.repeated(self.repeated_threshold):
+                    logger.warning(
+                        "%s %s ran the same statement %d times (N+1?): %s",
+                        scope["method"],
+                        scope["path"],
+                        count,
+                        statement,
+                    )
@@ -0,0 +1,73 @@
+"""Periodic maintenance jobs, run in a daemon thread by every worker."""
+
+import logging
+import threading
+from collections.abc import Callable
+
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.db import engine
+from app.crud.refresh_token import delete_stale_refresh_tokens
+from app.nutrition.recompute import run_recompute_jobs
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicJob:
+    def __init__(self, name: str, interval: float, func: Callable[[], None]) -> None:
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is not None or self.interval <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.func()
+            except Exception:
+                logger.exception("Periodic job %s failed", self.name)
+
+
+def sweep_refresh_tokens() -> None:
+    """Delete expired and deactivated refresh tokens."""
+    with Session(engine) as session:
+        deleted = delete_stale_refresh_tokens(
+            session, batch_size=settings.REFRESH_TOKEN_SWEEP_BATCH_SIZE
+        )
+    if deleted:
+        logger.info("Deleted %d stale refresh tokens", deleted)
+
+
+refresh_token_sweeper = PeriodicJob(
+    "refresh-token-sweeper",
+    settings.REFRESH_TOKEN_SWEEP_INTERVAL_SECONDS,
+    sweep_refresh_tokens,
+)
+
+
+def recompute_meals() -> None:
+    """Work through the queued meal recomputations."""
+    with Session(engine) as session:
+        run_recompute_jobs(session, chunk_size=settings.MEAL_RECOMPUTE_CHUNK_SIZE)
+
+
+meal_recomputer = PeriodicJob(
+    "meal-recompute",
+    settings.MEAL_RECOMPUTE_INTERVAL_SECONDS,
+    recompute_meals,
+)
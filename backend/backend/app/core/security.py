@@ -1,16 +1,42 @@
+import asyncio
+import threading
 import uuid
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from typing import Any, TypeVar
 
 import jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+T = TypeVar("T")
+
+# Hashes with another cost factor are replaced on the next successful login
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+)
+
+# bcrypt releases the GIL, so a few dedicated threads hash in parallel without
+# holding the request threadpool. Hashes beyond the pending limit are refused
+# (PasswordHashBusy -> 429) instead of queueing behind a login storm.
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+_hash_slots = threading.BoundedSemaphore(settings.PASSWORD_HASH_MAX_PENDING)
+
+
+class PasswordHashBusy(Exception):
+    """Too many password hashes are already pending in this worker."""
 
 
 ALGORITHM = "HS256"
+REFRESH_TOKEN_EXPIRE = timedelta(days=15)
 
 
 def create_access_token(
@@ -23,7 +49,9 @@ def create_access_token(
 
 
 def create_refresh_token(
-    subject: str | Any, expires_delta: timedelta = timedelta(days=15), return_jti=False
+    subject: str | Any,
+    expires_delta: timedelta = REFRESH_TOKEN_EXPIRE,
+    return_jti=False,
 ) -> str:
     jti = str(uuid.uuid4())
     expire = datetime.now(timezone.utc) + expires_delta
@@ -40,3 +68,34 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
+
+
+def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    """Verify a password and return a new hash if the stored one is outdated."""
+    valid, new_hash = pwd_context.verify_and_update(plain_password, hashed_password)
+    return bool(valid), new_hash
+
+
+async def _run_hash(func: Callable[..., T], *args: Any) -> T:
+    if not _hash_slots.acquire(blocking=False):
+        raise PasswordHashBusy()
+    try:
+        future = _hash_executor.submit(func, *args)
+    except BaseException:
+        _hash_slots.release()
+        raise
+    # Released when the hash finishes, even if the request is cancelled
+    future.add_done_callback(lambda _: _hash_slots.release())
+    return await asyncio.wrap_future(future)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_hash(get_password_hash, password)
+
+
+async def verify_and_update_password_async(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    return await _run_hash(verify_and_update_password, plain_password, hashed_password)
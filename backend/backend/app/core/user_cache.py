@@ -0,0 +1,142 @@
+"""
+Per-worker cache of authenticated users.
+
+``get_current_user`` decodes the access token and loads its user on every
+request. This bounded LRU cache maps a token (signature included) to its
+decoded payload and a slim snapshot of the user's columns, so a repeat request
+skips both. Entries live for ``AUTH_CACHE_TTL_SECONDS``, never past the
+token's own expiry.
+
+Routes that change or remove a user call :meth:`UserCache.invalidate` after
+committing. Other workers keep serving their copy until it expires, so the TTL
+bounds how long a change takes to reach every worker.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy.orm import make_transient_to_detached
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.models.models import User
+from app.schemas.metrics import CacheStats
+from app.schemas.users import TokenPayload
+
+# Loaded on first access instead of being kept in memory
+SNAPSHOT_EXCLUDE = {"hashed_password"}
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    payload: TokenPayload
+    user: dict[str, Any]
+    expires_at: float
+    token_expires_at: float
+
+    def to_user(self, session: Session) -> User:
+        """
+        Attach the snapshot to ``session`` as a persistent, unmodified user
+        without querying it. Changes are flushed as usual and columns left
+        out of the snapshot are loaded on first access.
+        """
+        user = User(**self.user)
+        make_transient_to_detached(user)
+        session.add(user)
+        return user
+
+
+class UserCache:
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[str, CachedUser] = OrderedDict()
+        self._tokens: dict[uuid.UUID, set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, token: str) -> CachedUser | None:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None and (
+                entry.expires_at <= time.monotonic()
+                or entry.token_expires_at <= time.time()
+            ):
+                self._remove(token)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry
+
+    def put(
+        self, token: str, payload: TokenPayload, exp: float | None, user: User
+    ) -> None:
+        if self.max_size <= 0:
+            return
+        entry = CachedUser(
+            payload=payload,
+            user={
+                column.key: getattr(user, column.key)
+                for column in User.__table__.columns  # type: ignore[attr-defined]
+                if column.key not in SNAPSHOT_EXCLUDE
+            },
+            expires_at=time.monotonic() + self.ttl,
+            token_expires_at=exp if exp is not None else float("inf"),
+        )
+        with self._lock:
+            self._remove(token)
+            self._entries[token] = entry
+            self._tokens.setdefault(user.id, set()).add(token)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, user_id: uuid.UUID) -> None:
+        """Drop every cached token of a user."""
+        with self._lock:
+            tokens = self._tokens.pop(user_id, set())
+            for token in tokens:
+                self._entries.pop(token, None)
+            self.invalidations += len(tokens)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tokens.clear()
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                size=len(self._entries),
+                max_size=self.max_size,
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                invalidations=self.invalidations,
+            )
+
+    def _remove(self, token: str) -> None:
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        user_id = entry.user["id"]
+        tokens = self._tokens.get(user_id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens[user_id]
+
+
+user_cache = UserCache(
+    max_size=settings.AUTH_CACHE_MAX_SIZE, ttl=settings.AUTH_CACHE_TTL_SECONDS
+)
@@ -1,9 +1,14 @@
 import uuid
 from typing import Any
 
+from fastapi.concurrency import run_in_threadpool
 from sqlmodel import Session, select
 
-from app.core.security import get_password_hash, verify_password
+from app.core.security import (
+    get_password_hash,
+    verify_and_update_password,
+    verify_and_update_password_async,
+)
 from app.models.models import (
     Item,
     ItemCreate,
@@ -15,9 +20,19 @@ from app.schemas.users import (
 )
 
 
-def create_user(*, session: Session, user_create: UserCreate) -> User:
+def create_user(
+    *, session: Session, user_create: UserCreate, hashed_password: str | None = None
+) -> User:
+    """
+    Create a user. Async routes pass a ``hashed_password`` computed off the
+    threadpool; otherwise the password is hashed here.
+    """
     db_obj = User.model_validate(
-        user_create, update={"hashed_password": get_password_hash(user_create.password)}
+        user_create,
+        update={
+            "hashed_password": hashed_password
+            or get_password_hash(user_create.password)
+        },
     )
     session.add(db_obj)
     session.commit()
@@ -25,13 +40,18 @@ def create_user(*, session: Session, user_create: UserCreate) -> User:
     return db_obj
 
 
-def update_user(*, session: Session, db_user: User, user_in: UserUpdate) -> Any:
+def update_user(
+    *,
+    session: Session,
+    db_user: User,
+    user_in: UserUpdate,
+    hashed_password: str | None = None,
+) -> Any:
     user_data = user_in.model_dump(exclude_unset=True)
     extra_data = {}
     if "password" in user_data:
         password = user_data["password"]
-        hashed_password = get_password_hash(password)
-        extra_data["hashed_password"] = hashed_password
+        extra_data["hashed_password"] = hashed_password or get_password_hash(password)
     db_user.sqlmodel_update(user_data, update=extra_data)
     session.add(db_user)
     session.commit()
@@ -51,12 +71,44 @@ def get_user_by_id(*, session: Session, id: uuid.UUID) -> User | None:
     return session_user
 
 
+def _rehash_password(*, session: Session, db_user: User, hashed_password: str) -> None:
+    db_user.hashed_password = hashed_password
+    session.add(db_user)
+    session.commit()
+    session.refresh(db_user)
+
+
 def authenticate(*, session: Session, email: str, password: str) -> User | None:
     db_user = get_user_by_email(session=session, email=email)
     if not db_user:
         return None
-    if not verify_password(password, db_user.hashed_password):
+    verified, new_hash = verify_and_update_password(password, db_user.hashed_password)
+    if not verified:
+        return None
+    if new_hash:
+        _rehash_password(session=session, db_user=db_user, hashed_password=new_hash)
+    return db_user
+
+
+async def authenticate_async(
+    *, session: Session, email: str, password: str
+) -> User | None:
+    """
+    :func:`authenticate` for async routes: queries run in the threadpool and
+    bcrypt in the password hashing executor.
+    """
+    db_user = await run_in_threadpool(get_user_by_email, session=session, email=email)
+    if not db_user:
+        return None
+    verified, new_hash = await verify_and_update_password_async(
+        password, db_user.hashed_password
+    )
+    if not verified:
         return None
+    if new_hash:
+        await run_in_threadpool(
+            _rehash_password, session=session, db_user=db_user, hashed_password=new_hash
+        )
     return db_user
 
 
@@ -0,0 +1,55 @@
+import uuid
+from collections.abc import Iterable
+
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, col, select
+
+from app.models.nutrition import Ingredient, Meal
+
+
+def get_ingredients_by_ids(
+    *, session: Session, ids: Iterable[uuid.UUID]
+) -> dict[uuid.UUID, Ingredient]:
+    """
+    Load ingredients in one query, keyed by id. Missing ids are absent.
+    """
+    unique_ids = set(ids)
+    if not unique_ids:
+        return {}
+    statement = select(Ingredient).where(col(Ingredient.id).in_(unique_ids))
+    return {ingredient.id: ingredient for ingredient in session.exec(statement)}
+
+
+def get_meals_by_ids(
+    *, session: Session, ids: Iterable[uuid.UUID]
+) -> dict[uuid.UUID, Meal]:
+    """
+    Load meals with their ingredient lines, keyed by id. Missing ids are absent.
+    """
+    unique_ids = set(ids)
+    if not unique_ids:
+        return {}
+    statement = (
+        select(Meal)
+        .where(col(Meal.id).in_(unique_ids))
+        .options(selectinload(Meal.meal_ingredients))
+    )
+    return {meal.id: meal for meal in session.exec(statement)}
+
+
+def get_recent_meals(
+    *, session: Session, user_id: uuid.UUID | None, limit: int
+) -> list[Meal]:
+    """
+    The most recently created meals of a user (ownerless meals for None),
+    with their ingredient lines.
+    """
+    owner = col(Meal.user_id).is_(None) if user_id is None else Meal.user_id == user_id
+    statement = (
+        select(Meal)
+        .where(owner)
+        .order_by(col(Meal.created_at).desc(), col(Meal.id).desc())
+        .limit(limit)
+        .options(selectinload(Meal.meal_ingredients))
+    )
+    return list(session.exec(statement))
@@ -1,9 +1,13 @@
+import uuid
+
+from sqlalchemy import delete, func, or_, update
 from sqlalchemy.orm import Session
+from sqlmodel import col, select
 
 from app.models.models import RefreshToken
 
 
-def store_refresh_token(session: Session, user_id: str, jti: str):
+def store_refresh_token(session: Session, user_id: uuid.UUID, jti: str) -> RefreshToken:
     token_entry = RefreshToken(user_id=user_id, token=jti)
     session.add(token_entry)
     session.commit()
@@ -15,7 +19,68 @@ def get_refresh_token_by_jti(session: Session, jti: str):
 
 
 def invalidate_refresh_token(session: Session, jti: str):
-    token = session.query(RefreshToken).filter_by(token=jti).first()
-    if token:
-        token.is_active = False
+    session.execute(
+        update(RefreshToken)
+        .where(col(RefreshToken.token) == jti)
+        .values(is_active=False)
+    )
+    session.commit()
+
+
+def rotate_refresh_token(
+    session: Session, *, user_id: uuid.UUID, jti: str, new_jti: str
+) -> bool:
+    """
+    Deactivate the active token ``jti`` of ``user_id`` and store ``new_jti``
+    in the same transaction. The conditional UPDATE lets only one of two
+    concurrent refreshes with the same token succeed; returns False when the
+    token was already used or is unknown.
+    """
+    rotated = session.execute(
+        update(RefreshToken)
+        .where(
+            col(RefreshToken.token) == jti,
+            col(RefreshToken.user_id) == user_id,
+            col(RefreshToken.is_active),
+        )
+        .values(is_active=False)
+        .returning(col(RefreshToken.id))
+    ).first()
+    if rotated is None:
+        session.rollback()
+        return False
+    session.add(RefreshToken(user_id=user_id, token=new_jti))
+    session.commit()
+    return True
+
+
+def delete_stale_refresh_tokens(session: Session, *, batch_size: int = 1000) -> int:
+    """
+    Delete expired and deactivated tokens in batches of ``batch_size``, each
+    in its own short transaction. Rows locked by a concurrent sweep (another
+    worker) are skipped. Returns the number of deleted rows.
+    """
+    stale = (
+        select(RefreshToken.id)
+        .where(
+            or_(
+                ~col(RefreshToken.is_active),
+                col(RefreshToken.expires_at) < func.now(),
+            )
+        )
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    deleted = 0
+    while True:
+        count = len(
+            session.execute(
+                delete(RefreshToken)
+                .where(col(RefreshToken.id).in_(stale.scalar_subquery()))
+                .returning(col(RefreshToken.id))
+            ).all()
+        )
         session.commit()
+        deleted += count
+        if count < batch_size:
+            return deleted
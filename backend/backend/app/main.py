@@ -1,10 +1,20 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 import sentry_sdk
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.routing import APIRoute
 from starlette.middleware.cors import CORSMiddleware
 
+from app.api.compression import CompressionMiddleware
 from app.api.main import api_router
+from app.api.responses import ORJSONResponse
 from app.core.config import settings
+from app.core.query_stats import QueryStatsMiddleware
+from app.core.scheduler import meal_recomputer, refresh_token_sweeper
+from app.core.security import PasswordHashBusy
+from app.nutrition.catalog import catalog
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
@@ -22,9 +32,23 @@ if settings.ENVIRONMENT == "local":
 scheduler = None
 
 
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    # Loads the ingredient catalog and keeps it in sync with other workers
+    catalog.start_listener()
+    refresh_token_sweeper.start()
+    meal_recomputer.start()
+    yield
+    meal_recomputer.stop()
+    refresh_token_sweeper.stop()
+    catalog.stop_listener()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
+    lifespan=lifespan,
     generate_unique_id_function=custom_generate_unique_id,
+    default_response_class=ORJSONResponse,
     docs_url=None if settings.ENVIRONMENT == "production" else "/docs",
     redoc_url=None if settings.ENVIRONMENT == "production" else "/redoc",
     openapi_url=None
@@ -33,6 +57,18 @@ app = FastAPI(
 )
 
 
+@app.exception_handler(PasswordHashBusy)
+async def password_hash_busy_handler(
+    _request: Request, _exc: PasswordHashBusy
+) -> JSONResponse:
+    # Shed login and password load instead of letting it queue
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Too many password requests, try again shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+
 # Set all CORS enabled origins
 if settings.all_cors_origins:
     print(settings.FRONTEND_HOSTS)
@@ -44,4 +80,13 @@ if settings.all_cors_origins:
         allow_headers=["*"],
     )
 
+# Compresses large responses; precompressed ones are passed through
+app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE)
+
+if settings.SQL_STATS:
+    app.add_middleware(
+        QueryStatsMiddleware,
+        repeated_threshold=settings.SQL_REPEATED_STATEMENT_THRESHOLD,
+    )
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
@@ -5,6 +5,7 @@ from typing import Optional
 from uuid import UUID, uuid4
 
 from pydantic import EmailStr
+from sqlalchemy import Index
 from sqlmodel import (
     Field,
     Relationship,
@@ -32,6 +33,12 @@ class ItemBase(SQLModel):
 
 # Database model, database table inferred from class name
 class Item(ItemBase, table=True):
+    __table_args__ = (
+        # Keyset pagination: (sort key, id) cursors of the list endpoints
+        Index("ix_item_created_at_id", "created_at", "id"),
+        Index("ix_item_owner_id_created_at_id", "owner_id", "created_at", "id"),
+    )
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     title: str = Field(max_length=255)
     owner_id: uuid.UUID = Field(
@@ -64,7 +71,8 @@ class ItemPublic(ItemBase):
 
 class ItemsPublic(SQLModel):
     data: list[ItemPublic] = []
-    count: int
+    count: int | None = None
+    next_cursor: str | None = None
 
 
 # Generic message
@@ -94,6 +102,8 @@ class UserBase(SQLModel):
 
 
 class User(UserBase, table=True):  # type: ignore
+    __table_args__ = (Index("ix_user_created_at_id", "created_at", "id"),)
+
     id: UUID = Field(default_factory=uuid4, primary_key=True)
     hashed_password: str
     items: list["Item"] = Relationship(back_populates="owner", cascade_delete=True)
@@ -130,6 +140,12 @@ class User(UserBase, table=True):  # type: ignore
 
 class RefreshToken(SQLModel, table=True):
     __tablename__ = "refresh_tokens"
+    __table_args__ = (
+        Index("ix_refresh_tokens_token", "token", unique=True),
+        Index("ix_refresh_tokens_user_id_is_active", "user_id", "is_active"),
+        # Lets the sweeper find expired rows without a full scan
+        Index("ix_refresh_tokens_expires_at", "expires_at"),
+    )
 
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     user_id: uuid.UUID | None = Field(default=None, foreign_key="user.id")
@@ -138,8 +154,9 @@ class RefreshToken(SQLModel, table=True):
     created_at: datetime | None = Field(
         default_factory=lambda: datetime.now(timezone.utc)
     )
+    # Matches the refresh token's own lifetime (security.REFRESH_TOKEN_EXPIRE)
     expires_at: datetime | None = Field(
-        default_factory=lambda: datetime.now(timezone.utc) + timedelta(days=7)
+        default_factory=lambda: datetime.now(timezone.utc) + timedelta(days=15)
     )
 
     user: User = Relationship(back_populates="refresh_tokens")
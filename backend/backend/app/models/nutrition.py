@@ -1,8 +1,9 @@
 import uuid
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 from typing import Optional
 
-from sqlalchemy import Column, JSON
+from sqlalchemy import JSON, BigInteger, Column, Computed, Index, Text, Uuid
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlmodel import Field, Relationship, SQLModel
 
 
@@ -28,6 +29,14 @@ class Category(CategoryBase, table=True):
 
 
 # ===== INGREDIENT MODEL =====
+# Accent-insensitive text searched by the pg_trgm index (see the
+# ingredient_trigram_search migration for ingredient_search_normalize)
+INGREDIENT_SEARCH_TEXT = (
+    "ingredient_search_normalize("
+    "name_en || ' ' || name_fr || ' ' || name_ar || ' ' || tags::text)"
+)
+
+
 class IngredientBase(SQLModel):
     category_id: uuid.UUID = Field(foreign_key="categories.id")
     name_fr: str = Field(max_length=255)
@@ -47,11 +56,25 @@ class IngredientBase(SQLModel):
 
 class Ingredient(IngredientBase, table=True):
     __tablename__ = "ingredients"
+    __table_args__ = (
+        Index(
+            "ix_ingredients_search_text_trgm",
+            "search_text",
+            postgresql_using="gin",
+            postgresql_ops={"search_text": "gin_trgm_ops"},
+        ),
+        # Keyset pagination: (sort key, id) cursors of the list endpoints
+        Index("ix_ingredients_created_at_id", "created_at", "id"),
+    )
 
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     measurement_units: list[str] = Field(default=[], sa_column=Column(JSON))
     unit_conversions: dict[str, float] = Field(default={}, sa_column=Column(JSON))
     tags: list[str] = Field(default=[], sa_column=Column(JSON))
+    search_text: Optional[str] = Field(
+        default=None,
+        sa_column=Column(Text, Computed(INGREDIENT_SEARCH_TEXT, persisted=True)),
+    )
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(
         default_factory=lambda: datetime.now(timezone.utc),
@@ -61,6 +84,35 @@ class Ingredient(IngredientBase, table=True):
     # Relationships
     category: Optional[Category] = Relationship(back_populates="ingredients")
     meal_ingredients: list["MealIngredient"] = Relationship(back_populates="ingredient")
+    units: list["IngredientUnit"] = Relationship(
+        back_populates="ingredient",
+        sa_relationship_kwargs={"cascade": "all, delete-orphan", "passive_deletes": True},
+    )
+
+
+# ===== INGREDIENT UNIT MODEL =====
+# Grams per unit, derived from Ingredient.unit_conversions on every write
+# (see app.nutrition.units)
+class IngredientUnit(SQLModel, table=True):
+    __tablename__ = "ingredient_units"
+
+    ingredient_id: uuid.UUID = Field(
+        foreign_key="ingredients.id", primary_key=True, ondelete="CASCADE"
+    )
+    # Canonical unit name
+    unit: str = Field(primary_key=True, max_length=50)
+    grams_per_unit: float
+
+    # Relationships
+    ingredient: Optional[Ingredient] = Relationship(back_populates="units")
+
+
+# ===== CATALOG VERSION MODEL =====
+class CatalogVersion(SQLModel, table=True):
+    __tablename__ = "catalog_versions"
+
+    name: str = Field(primary_key=True, max_length=50)
+    version: int = Field(default=0)
 
 
 # ===== MEAL MODEL =====
@@ -80,9 +132,19 @@ class MealBase(SQLModel):
 
 class Meal(MealBase, table=True):
     __tablename__ = "meals"
+    __table_args__ = (
+        Index("ix_meals_fingerprint", "fingerprint", postgresql_using="gin"),
+        Index("ix_meals_created_at_id", "created_at", "id"),
+    )
 
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     user_id: Optional[uuid.UUID] = Field(default=None, foreign_key="user.id", nullable=True)
+    # Composition fingerprint set on every ingredient write
+    # (see app.nutrition.meal_similarity)
+    fingerprint: list[int] = Field(
+        default=[],
+        sa_column=Column(ARRAY(BigInteger), nullable=False, server_default="{}"),
+    )
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(
         default_factory=lambda: datetime.now(timezone.utc),
@@ -130,10 +192,33 @@ class SavedDayBase(SQLModel):
 
 class SavedDay(SavedDayBase, table=True):
     __tablename__ = "saved_days"
+    __table_args__ = (
+        Index("ix_saved_days_updated_at_id", "updated_at", "id"),
+        Index("ix_saved_days_total_calories_id", "total_calories", "id"),
+        Index("ix_saved_days_meal_ids", "meal_ids", postgresql_using="gin"),
+        Index("ix_saved_days_ingredient_ids", "ingredient_ids", postgresql_using="gin"),
+    )
 
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     user_id: Optional[uuid.UUID] = Field(default=None, foreign_key="user.id", nullable=True)
     day_plan: dict = Field(default={}, sa_column=Column(JSON))
+    # Meals and ingredients the plan's items reference, set on every write,
+    # to find the days to recompute when those change
+    meal_ids: list[uuid.UUID] = Field(
+        default=[],
+        sa_column=Column(ARRAY(Uuid), nullable=False, server_default="{}"),
+    )
+    ingredient_ids: list[uuid.UUID] = Field(
+        default=[],
+        sa_column=Column(ARRAY(Uuid), nullable=False, server_default="{}"),
+    )
+    # Computed from day_plan on every write (see app.nutrition.day_plan)
+    total_calories: float = Field(default=0.0)
+    total_protein: float = Field(default=0.0)
+    total_carbohydrates: float = Field(default=0.0)
+    total_fat: float = Field(default=0.0)
+    total_fiber: float = Field(default=0.0)
+    total_sodium: float = Field(default=0.0)
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(
         default_factory=lambda: datetime.now(timezone.utc),
@@ -144,5 +229,69 @@ class SavedDay(SavedDayBase, table=True):
     user: Optional["User"] = Relationship(back_populates="saved_days")
 
 
+# ===== NUTRITION DAILY ROLLUP =====
+# Saved day totals summed per user and date (see app.nutrition.rollup)
+class NutritionDailyRollup(SQLModel, table=True):
+    __tablename__ = "nutrition_daily_rollup"
+    __table_args__ = (
+        # Days are not owned by a user yet; those share the NULL user's rows
+        Index(
+            "ix_nutrition_daily_rollup_user_id_day",
+            "user_id",
+            "day",
+            unique=True,
+            postgresql_nulls_not_distinct=True,
+        ),
+    )
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    user_id: Optional[uuid.UUID] = Field(
+        default=None, foreign_key="user.id", nullable=True, ondelete="CASCADE"
+    )
+    day: date
+    # Saved days planned for that date
+    day_count: int = Field(default=0)
+    total_calories: float = Field(default=0.0)
+    total_protein: float = Field(default=0.0)
+    total_carbohydrates: float = Field(default=0.0)
+    total_fat: float = Field(default=0.0)
+    total_fiber: float = Field(default=0.0)
+    total_sodium: float = Field(default=0.0)
+    updated_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column_kwargs={"onupdate": lambda: datetime.now(timezone.utc)},
+    )
+
+
+# ===== MEAL RECOMPUTE JOB =====
+# Recomputation of stored meal values after ingredient nutrients change
+# (see app.nutrition.recompute)
+class MealRecomputeJob(SQLModel, table=True):
+    __tablename__ = "meal_recompute_jobs"
+
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    # Meals using any of these ingredients; every meal when empty
+    ingredient_ids: list[uuid.UUID] = Field(
+        default=[], sa_column=Column(ARRAY(Uuid), nullable=False)
+    )
+    # pending, running, done or failed
+    status: str = Field(default="pending", max_length=20)
+    # Meals are processed in id order; the last one processed
+    last_meal_id: Optional[uuid.UUID] = Field(default=None)
+    total_meals: int = Field(default=0)
+    processed_meals: int = Field(default=0)
+    # Processed meals whose stored values were stale
+    updated_meals: int = Field(default=0)
+    # Then the saved days using the ingredients directly, in id order
+    meals_done: bool = Field(default=False)
+    last_day_id: Optional[uuid.UUID] = Field(default=None)
+    # Saved days whose totals changed, through their meals or directly
+    updated_days: int = Field(default=0)
+    error: Optional[str] = Field(default=None)
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    started_at: Optional[datetime] = Field(default=None)
+    finished_at: Optional[datetime] = Field(default=None)
+
+
 # Update User model to include nutrition relationships
 # This will be imported in models.py to add the relationships
@@ -5,6 +5,8 @@ from sqlmodel import Session, select
 
 from app.core.db import engine
 from app.models.nutrition import Category, Ingredient
+from app.nutrition.catalog import bump_catalog_version
+from app.nutrition.units import sync_ingredient_units
 
 
 def seed_nutrition_data():
@@ -369,8 +371,10 @@ def seed_nutrition_data():
         ]
 
         for ingredient in ingredients:
+            sync_ingredient_units(ingredient)
             session.add(ingredient)
 
+        bump_catalog_version(session)
         session.commit()
         print("✅ Nutrition data seeded successfully!")
         print(f"   - Categories: {len(categories)}")
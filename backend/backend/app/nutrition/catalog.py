@@ -0,0 +1,334 @@
+"""In-process snapshot of the ingredient catalog.
+
+Ingredients and categories are read-mostly reference data, so each worker
+keeps them in memory: public rows for serving, plus a struct-of-arrays view
+(nutrient matrix, filter columns, id -> row index, grams per unit) for
+filtering and for the nutrition engine. The nutrient similarity index is
+derived from the snapshot on first use.
+
+Writes bump the ``catalog_versions`` counter and ``NOTIFY`` the
+``ingredient_catalog`` channel in the same transaction. Every worker LISTENs on
+that channel and drops its snapshot when a newer version is announced; the
+next read reloads it.
+
+Async routes load a missing snapshot with :meth:`IngredientCatalog.get_async`,
+on a threadpool connection, so a load never holds the event loop.
+"""
+
+import asyncio
+import logging
+import threading
+import uuid
+from collections.abc import Iterable
+from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
+import psycopg
+from fastapi.concurrency import run_in_threadpool
+from numpy.typing import NDArray
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, col, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import SelectOfScalar
+
+from app.core.db import engine
+from app.crud.nutrition import get_ingredients_by_ids
+from app.models.nutrition import CatalogVersion, Category, Ingredient, IngredientUnit
+from app.nutrition.engine import NutrientTable
+from app.nutrition.similarity import NutrientIndex
+from app.schemas.nutrition import CategoryPublic, IngredientPublic
+
+logger = logging.getLogger(__name__)
+
+CATALOG_NAME = "ingredients"
+CATALOG_CHANNEL = "ingredient_catalog"
+LISTEN_POLL_SECONDS = 1.0
+LISTEN_RETRY_SECONDS = 5.0
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    version: int
+    ingredients: list[IngredientPublic]
+    categories: list[CategoryPublic]
+    table: NutrientTable
+    category_index: dict[uuid.UUID, int]
+    category_codes: NDArray[np.intp]
+    is_traditional: NDArray[np.bool_]
+    is_halal: NDArray[np.bool_]
+
+    def get(self, ingredient_id: uuid.UUID) -> IngredientPublic | None:
+        row = self.table.index.get(ingredient_id)
+        return None if row is None else self.ingredients[row]
+
+    def filter(
+        self,
+        *,
+        category_id: uuid.UUID | None = None,
+        is_traditional: bool | None = None,
+        is_halal: bool | None = None,
+    ) -> NDArray[np.intp]:
+        """Rows matching the filters, in catalog order."""
+        mask = np.ones(len(self.ingredients), dtype=np.bool_)
+        if category_id:
+            mask &= self.category_codes == self.category_index.get(category_id, -1)
+        if is_traditional is not None:
+            mask &= self.is_traditional == is_traditional
+        if is_halal is not None:
+            mask &= self.is_halal == is_halal
+        return np.flatnonzero(mask)
+
+    @cached_property
+    def similarity(self) -> NutrientIndex:
+        return NutrientIndex.build(self.table.nutrients)
+
+    def similar(
+        self,
+        ingredient_id: uuid.UUID,
+        k: int,
+        *,
+        same_category: bool = False,
+        is_halal: bool | None = None,
+    ) -> list[tuple[IngredientPublic, float]]:
+        """
+        The ``k`` ingredients closest to ``ingredient_id`` by nutrient profile,
+        with their distances, closest first. Empty when it isn't in the
+        snapshot.
+        """
+        row = self.table.index.get(ingredient_id)
+        if row is None:
+            return []
+        candidates = None
+        if same_category or is_halal is not None:
+            candidates = self.filter(is_halal=is_halal)
+            if same_category:
+                code = self.category_codes[row]
+                candidates = candidates[self.category_codes[candidates] == code]
+        rows, distances = self.similarity.nearest(row, k, candidates)
+        return [
+            (self.ingredients[i], distance)
+            for i, distance in zip(rows.tolist(), distances.tolist(), strict=True)
+        ]
+
+
+def _version_statement() -> SelectOfScalar[int]:
+    return select(CatalogVersion.version).where(CatalogVersion.name == CATALOG_NAME)
+
+
+def read_catalog_version(session: Session) -> int:
+    version = session.exec(_version_statement()).first()
+    return version or 0
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def load_snapshot(session: Session) -> CatalogSnapshot:
+    # Read the version first: a concurrent write can only make it too old,
+    # which costs one extra reload when its notification arrives.
+    version = read_catalog_version(session)
+    ingredients = session.exec(
+        select(Ingredient).order_by(col(Ingredient.created_at), col(Ingredient.id))
+    ).all()
+    categories = session.exec(
+        select(Category).order_by(col(Category.created_at), col(Category.id))
+    ).all()
+    unit_factors = {
+        (ingredient_id, unit): grams
+        for ingredient_id, unit, grams in session.exec(
+            select(
+                IngredientUnit.ingredient_id,
+                IngredientUnit.unit,
+                IngredientUnit.grams_per_unit,
+            )
+        )
+    }
+
+    category_index = {category.id: row for row, category in enumerate(categories)}
+    return CatalogSnapshot(
+        version=version,
+        ingredients=[IngredientPublic.model_validate(i) for i in ingredients],
+        categories=[CategoryPublic.model_validate(c) for c in categories],
+        table=NutrientTable.from_ingredients(ingredients, unit_factors),
+        category_index=category_index,
+        category_codes=np.array(
+            [category_index.get(i.category_id, -1) for i in ingredients],
+            dtype=np.intp,
+        ),
+        is_traditional=np.array(
+            [i.is_traditional for i in ingredients], dtype=np.bool_
+        ),
+        is_halal=np.array([i.is_halal for i in ingredients], dtype=np.bool_),
+    )
+
+
+def bump_catalog_version(session: Session) -> int:
+    """
+    Increment the catalog version and notify every worker when the
+    surrounding transaction commits.
+    """
+    statement = (
+        insert(CatalogVersion)
+        .values(name=CATALOG_NAME, version=1)
+        .on_conflict_do_update(
+            index_elements=[col(CatalogVersion.name)],
+            set_={"version": col(CatalogVersion.version) + 1},
+        )
+        .returning(col(CatalogVersion.version))
+    )
+    version: int = session.execute(statement).scalar_one()
+    session.execute(select(func.pg_notify(CATALOG_CHANNEL, str(version))))
+    return version
+
+
+class IngredientCatalog:
+    def __init__(self) -> None:
+        self._snapshot: CatalogSnapshot | None = None
+        self._generation = 0
+        # Single-flight: concurrent readers wait for one load
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._listener: threading.Thread | None = None
+
+    def get(self, session: Session) -> CatalogSnapshot:
+        """Current snapshot, loading it with ``session`` if needed."""
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+        if _on_event_loop():
+            # A sync route run by an async one (AsyncSession.run_sync) after
+            # an invalidation: waiting for the lock could block the loop on a
+            # load that needs the loop, so load without it
+            return self._load(session)
+        with self._lock:
+            if self._snapshot is not None:
+                return self._snapshot
+            return self._load(session)
+
+    async def get_async(self) -> CatalogSnapshot:
+        """Current snapshot, loading it in the threadpool if needed."""
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot
+        return await run_in_threadpool(self._get_with_own_session)
+
+    def _get_with_own_session(self) -> CatalogSnapshot:
+        with Session(engine) as session:
+            return self.get(session)
+
+    def _load(self, session: Session) -> CatalogSnapshot:
+        generation = self._generation
+        snapshot = load_snapshot(session)
+        # Don't publish a snapshot that was invalidated while loading
+        if generation == self._generation:
+            self._snapshot = snapshot
+        return snapshot
+
+    def version(self, session: Session) -> int:
+        """
+        Version of the current snapshot, read from the database without
+        loading the snapshot when there is none.
+        """
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot.version
+        return read_catalog_version(session)
+
+    async def version_async(self, session: AsyncSession) -> int:
+        """:meth:`version` on an async session."""
+        snapshot = self._snapshot
+        if snapshot is not None:
+            return snapshot.version
+        version = (await session.exec(_version_statement())).first()
+        return version or 0
+
+    def get_including(
+        self, session: Session, ingredient_ids: Iterable[uuid.UUID]
+    ) -> CatalogSnapshot:
+        """
+        Current snapshot, reloaded first if it lacks any of ``ingredient_ids``
+        that exist in the database (a write from another worker whose
+        notification hasn't arrived yet). Checking costs one query, and only
+        when ids are missing.
+        """
+        snapshot = self.get(session)
+        missing_ids = [
+            i for i in dict.fromkeys(ingredient_ids) if i not in snapshot.table
+        ]
+        if missing_ids and get_ingredients_by_ids(session=session, ids=missing_ids):
+            self.invalidate()
+            snapshot = self.get(session)
+        return snapshot
+
+    async def get_including_async(
+        self, session: AsyncSession, ingredient_ids: Iterable[uuid.UUID]
+    ) -> CatalogSnapshot:
+        """:meth:`get_including` on an async session."""
+        snapshot = await self.get_async()
+        missing_ids = [
+            i for i in dict.fromkeys(ingredient_ids) if i not in snapshot.table
+        ]
+        if missing_ids:
+            statement = select(Ingredient.id).where(col(Ingredient.id).in_(missing_ids))
+            if (await session.exec(statement.limit(1))).first() is not None:
+                self.invalidate()
+                snapshot = await self.get_async()
+        return snapshot
+
+    def invalidate(self, version: int | None = None) -> None:
+        """Drop the snapshot, or only if it is older than ``version``."""
+        snapshot = self._snapshot
+        if version is not None and snapshot is not None and snapshot.version >= version:
+            return
+        self._generation += 1
+        self._snapshot = None
+
+    def commit(self, session: Session) -> None:
+        """Commit a catalog write and invalidate the snapshot in every worker."""
+        bump_catalog_version(session)
+        session.commit()
+        self.invalidate()
+
+    def start_listener(self) -> None:
+        if self._listener is not None:
+            return
+        self._stop.clear()
+        self._listener = threading.Thread(
+            target=self._listen, name="ingredient-catalog-listener", daemon=True
+        )
+        self._listener.start()
+
+    def stop_listener(self) -> None:
+        self._stop.set()
+        if self._listener is not None:
+            self._listener.join(timeout=LISTEN_POLL_SECONDS * 2)
+            self._listener = None
+
+    def _listen(self) -> None:
+        conninfo = engine.url.set(drivername="postgresql").render_as_string(
+            hide_password=False
+        )
+        while not self._stop.is_set():
+            try:
+                with psycopg.connect(conninfo, autocommit=True) as connection:
+                    connection.execute(f"LISTEN {CATALOG_CHANNEL}")
+                    # Writes may have been missed while not listening
+                    self.invalidate()
+                    with Session(engine) as session:
+                        self.get(session)
+                    while not self._stop.is_set():
+                        for notify in connection.notifies(timeout=LISTEN_POLL_SECONDS):
+                            self.invalidate(int(notify.payload))
+            except Exception:
+                logger.exception("Ingredient catalog listener failed, retrying")
+                self.invalidate()
+                self._stop.wait(LISTEN_RETRY_SECONDS)
+
+
+catalog = IngredientCatalog()
@@ -0,0 +1,179 @@
+"""Server-side nutrition totals for saved day plans.
+
+Mirrors the frontend planner: a meal item scales the meal's totals by
+servings, or by grams over the meal's total weight; an ingredient item is
+computed from per-100g values like a meal line. Items are rounded to two
+decimals, then summed per slot (``DayMeal``) and for the whole day.
+
+Saved days store the ids of the meals and ingredients they reference. When a
+meal changes, :func:`refresh_days` recomputes the days using it and moves
+their rollup contributions in the same transaction, so neither the stored
+totals nor the daily rollups lag behind the meals.
+"""
+
+import uuid
+from collections.abc import Mapping, Sequence
+from typing import Any
+
+import numpy as np
+from numpy.typing import NDArray
+from sqlalchemy import ColumnElement
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlmodel import Session, Uuid, cast, col, select
+
+from app.crud.nutrition import get_meals_by_ids
+from app.models.nutrition import Meal, SavedDay
+from app.nutrition.catalog import catalog
+from app.nutrition.engine import TOTAL_FIELDS, NutrientTable, compute_meals
+from app.nutrition.rollup import apply_day_changes, rollup_entry
+from app.nutrition.units import canonical_unit
+from app.schemas.nutrition import DayMealItem, DayNutrition, DayPlan
+
+# DayNutrition field for each of engine.NUTRIENTS
+DAY_NUTRITION_FIELDS = tuple(DayNutrition.model_fields)
+
+
+def meal_weight(meal: Meal, table: NutrientTable) -> float:
+    """Total grams of a meal's ingredient lines."""
+    return sum(table.grams(line) for line in meal.meal_ingredients)
+
+
+def meal_item_factor(meal: Meal, item: DayMealItem, table: NutrientTable) -> float:
+    """Fraction of the meal's totals eaten by a day plan item."""
+    if canonical_unit(item.unit) == "g":
+        weight = meal_weight(meal, table)
+        return item.quantity / weight if weight > 0 else 0.0
+    return item.quantity / meal.servings if meal.servings > 0 else 0.0
+
+
+def _day_nutrition(values: NDArray[np.float64]) -> DayNutrition:
+    return DayNutrition(**dict(zip(DAY_NUTRITION_FIELDS, values.tolist(), strict=True)))
+
+
+def compute_day_plan(
+    plan: DayPlan, meals: Mapping[uuid.UUID, Meal], table: NutrientTable
+) -> dict[str, float]:
+    """
+    Fill in the per-slot and per-day ``total_nutrition`` of ``plan`` and return
+    the day totals as ``total_*`` values.
+
+    ``meals`` holds the referenced meals with their ingredient lines, and
+    ``table`` the ingredients referenced by the plan or by those meals. Items
+    whose meal or ingredient no longer exists count for nothing.
+    """
+    # Ingredient items of every slot in one vectorized pass; they are
+    # validated to have an ingredient_id
+    ingredient_items = [
+        [
+            item
+            for item in slot.items
+            if item.type == "ingredient" and item.ingredient_id in table
+        ]
+        for slot in plan.day_meals
+    ]
+    nutrition = compute_meals(ingredient_items, table)  # type: ignore[arg-type]
+    slot_totals = nutrition.totals.copy()
+    for row, slot in enumerate(plan.day_meals):
+        for item in slot.items:
+            meal = meals.get(item.meal_id) if item.meal_id else None
+            if item.type == "meal" and meal is not None:
+                meal_totals = np.array([getattr(meal, field) for field in TOTAL_FIELDS])
+                slot_totals[row] += np.round(
+                    meal_totals * meal_item_factor(meal, item, table), 2
+                )
+    slot_totals = np.round(slot_totals, 2)
+    day_totals = np.round(slot_totals.sum(axis=0), 2)
+
+    for slot, totals in zip(plan.day_meals, slot_totals, strict=True):
+        slot.total_nutrition = _day_nutrition(totals)
+    plan.total_nutrition = _day_nutrition(day_totals)
+    return dict(zip(TOTAL_FIELDS, day_totals.tolist(), strict=True))
+
+
+def plan_references(plan: DayPlan) -> dict[str, list[uuid.UUID]]:
+    """The ``meal_ids`` and ``ingredient_ids`` columns of a saved day."""
+    items = [item for slot in plan.day_meals for item in slot.items]
+    return {
+        f"{kind}_ids": list(
+            dict.fromkeys(
+                item_id
+                for item in items
+                if item.type == kind
+                and (item_id := getattr(item, f"{kind}_id")) is not None
+            )
+        )
+        for kind in ("meal", "ingredient")
+    }
+
+
+def references_any(column: Any, ids: Sequence[uuid.UUID]) -> ColumnElement[bool]:
+    """Whether a ``meal_ids``/``ingredient_ids`` column overlaps ``ids``."""
+    return col(column).op("&&")(cast(list(ids), ARRAY(Uuid)))
+
+
+def refresh_days(
+    session: Session,
+    condition: ColumnElement[bool],
+    batch_size: int = 500,
+) -> int:
+    """
+    Recompute the totals of the saved days matching ``condition``, e.g.
+    ``references_any(SavedDay.meal_ids, meal_ids)``, ``batch_size`` days at
+    a time. Days are locked until the caller commits, and only days whose
+    values changed are written, along with their rollups. Returns the number
+    of days updated.
+    """
+    updated = 0
+    last_id: uuid.UUID | None = None
+    while True:
+        statement = select(SavedDay).where(condition)
+        if last_id is not None:
+            statement = statement.where(col(SavedDay.id) > last_id)
+        days = list(
+            session.exec(
+                statement.order_by(col(SavedDay.id)).limit(batch_size).with_for_update()
+            )
+        )
+        if not days:
+            return updated
+        last_id = days[-1].id
+
+        plans = [DayPlan.model_validate(day.day_plan) for day in days]
+        meals = get_meals_by_ids(
+            session=session,
+            ids=(
+                meal_id
+                for plan in plans
+                for meal_id in plan_references(plan)["meal_ids"]
+            ),
+        )
+        snapshot = catalog.get_including(
+            session,
+            [
+                *(i for plan in plans for i in plan_references(plan)["ingredient_ids"]),
+                *(
+                    line.ingredient_id
+                    for meal in meals.values()
+                    for line in meal.meal_ingredients
+                ),
+            ],
+        )
+        changes = []
+        for day, plan in zip(days, plans, strict=True):
+            totals = compute_day_plan(plan, meals, snapshot.table)
+            values = {"day_plan": plan.model_dump(mode="json"), **totals}
+            if any(getattr(day, field) != value for field, value in values.items()):
+                before = rollup_entry(day)
+                day.sqlmodel_update(values)
+                session.add(day)
+                changes.append((before, rollup_entry(day)))
+        apply_day_changes(session, changes)
+        session.flush()
+        updated += len(changes)
+
+
+def refresh_meal_days(session: Session, meal_ids: Sequence[uuid.UUID]) -> int:
+    """Recompute the saved days using any of ``meal_ids``."""
+    if not meal_ids:
+        return 0
+    return refresh_days(session, references_any(SavedDay.meal_ids, meal_ids))
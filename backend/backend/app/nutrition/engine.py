@@ -0,0 +1,172 @@
+"""Server-side nutrition computation for meals.
+
+Nutrient values are computed from ``Ingredient.*_per_100g`` and the grams per
+unit of ``ingredient_units`` (see ``app.nutrition.units``). Every line of
+every meal in a batch is evaluated in a single vectorized pass over a
+(lines x nutrients) matrix.
+"""
+
+import uuid
+from collections.abc import Iterable, Mapping, Sequence
+from dataclasses import dataclass
+from typing import Protocol, TypedDict
+
+import numpy as np
+from numpy.typing import NDArray
+
+from app.nutrition.units import MASS_UNITS, canonical_unit
+
+NUTRIENTS = ("calories", "protein", "carbohydrates", "fat", "fiber", "sodium")
+TOTAL_FIELDS = tuple(f"total_{nutrient}" for nutrient in NUTRIENTS)
+PER_100G_FIELDS = tuple(f"{nutrient}_per_100g" for nutrient in NUTRIENTS)
+
+
+class IngredientQuantity(Protocol):
+    ingredient_id: uuid.UUID
+    quantity: float
+    unit: str
+
+
+class IngredientNutrients(Protocol):
+    """Anything shaped like an ingredient row (ORM model or public schema)."""
+
+    id: uuid.UUID
+    calories_per_100g: float
+    protein_per_100g: float
+    carbohydrates_per_100g: float
+    fat_per_100g: float
+    fiber_per_100g: float
+    sodium_per_100g: float
+
+
+@dataclass(frozen=True)
+class NutrientTable:
+    """
+    Per-100g nutrient matrix with an id -> row index, and the grams per
+    canonical unit of each ingredient.
+    """
+
+    index: Mapping[uuid.UUID, int]
+    nutrients: NDArray[np.float64]
+    unit_factors: Mapping[tuple[uuid.UUID, str], float]
+
+    @classmethod
+    def from_ingredients(
+        cls,
+        ingredients: Iterable[IngredientNutrients],
+        unit_factors: Mapping[tuple[uuid.UUID, str], float],
+    ) -> "NutrientTable":
+        rows = list(ingredients)
+        nutrients = np.empty((len(rows), len(NUTRIENTS)), dtype=np.float64)
+        for row, ingredient in enumerate(rows):
+            nutrients[row] = [getattr(ingredient, field) for field in PER_100G_FIELDS]
+        return cls(
+            index={ingredient.id: row for row, ingredient in enumerate(rows)},
+            nutrients=nutrients,
+            unit_factors=unit_factors,
+        )
+
+    def __contains__(self, ingredient_id: object) -> bool:
+        return ingredient_id in self.index
+
+    def grams_per_unit(self, ingredient_id: uuid.UUID, unit: str) -> float | None:
+        """Grams in one ``unit`` of an ingredient, None if it doesn't convert."""
+        canonical = canonical_unit(unit)
+        if canonical in MASS_UNITS:
+            return MASS_UNITS[canonical]
+        return self.unit_factors.get((ingredient_id, canonical))
+
+    def grams(self, item: IngredientQuantity) -> float:
+        """
+        Grams of an ingredient line. Lines saved before units were checked
+        may not convert; their quantity counts as grams, as it did then.
+        """
+        factor = self.grams_per_unit(item.ingredient_id, item.unit)
+        return item.quantity * (1.0 if factor is None else factor)
+
+    def unconvertible(
+        self, items: Iterable[IngredientQuantity]
+    ) -> list[IngredientQuantity]:
+        """Items of known ingredients whose unit doesn't convert to grams."""
+        return [
+            item
+            for item in items
+            if item.ingredient_id in self.index
+            and self.grams_per_unit(item.ingredient_id, item.unit) is None
+        ]
+
+
+class LineNutrients(TypedDict):
+    """Nutrient values of one ingredient line, keyed like ``NUTRIENTS``."""
+
+    calories: float
+    protein: float
+    carbohydrates: float
+    fat: float
+    fiber: float
+    sodium: float
+
+
+@dataclass
+class NutritionResult:
+    """Per-line and per-meal nutrient values for a batch of meals."""
+
+    lines: NDArray[np.float64]
+    totals: NDArray[np.float64]
+    offsets: NDArray[np.intp]
+
+    def meal_lines(self, meal_index: int = 0) -> list[LineNutrients]:
+        start, end = self.offsets[meal_index], self.offsets[meal_index + 1]
+        return [
+            LineNutrients(
+                calories=calories,
+                protein=protein,
+                carbohydrates=carbohydrates,
+                fat=fat,
+                fiber=fiber,
+                sodium=sodium,
+            )
+            for calories, protein, carbohydrates, fat, fiber, sodium in self.lines[
+                start:end
+            ].tolist()
+        ]
+
+    def meal_totals(self, meal_index: int = 0) -> dict[str, float]:
+        return dict(zip(TOTAL_FIELDS, self.totals[meal_index].tolist(), strict=True))
+
+
+def compute_meals(
+    meals: Sequence[Sequence[IngredientQuantity]], table: NutrientTable
+) -> NutritionResult:
+    """Compute nutrient values for every ingredient line of every meal.
+
+    ``table`` must contain every referenced ingredient id.
+    Values are rounded to two decimals per line, and totals are the sum of the
+    rounded lines, matching ``frontend/lib/utils/nutrition-calculator.ts``.
+    """
+    counts = np.fromiter((len(meal) for meal in meals), dtype=np.intp, count=len(meals))
+    offsets = np.zeros(len(meals) + 1, dtype=np.intp)
+    np.cumsum(counts, out=offsets[1:])
+    n_lines = int(offsets[-1])
+
+    rows = np.empty(n_lines, dtype=np.intp)
+    grams = np.empty(n_lines, dtype=np.float64)
+    line = 0
+    for meal in meals:
+        for item in meal:
+            rows[line] = table.index[item.ingredient_id]
+            grams[line] = table.grams(item)
+            line += 1
+
+    lines = np.round(table.nutrients[rows] * (grams / 100.0)[:, np.newaxis], 2)
+    totals = np.zeros((len(meals), len(NUTRIENTS)), dtype=np.float64)
+    np.add.at(totals, np.repeat(np.arange(len(meals)), counts), lines)
+
+    return NutritionResult(lines=lines, totals=np.round(totals, 2), offsets=offsets)
+
+
+def compute_meal(
+    items: Sequence[IngredientQuantity], table: NutrientTable
+) -> NutritionResult:
+    """Compute nutrient values for a single meal."""
+    return compute_meals([items], table)
@@ -0,0 +1,207 @@
+"""Bulk meal import.
+
+Records are validated individually so one bad meal doesn't reject the file.
+Ingredient ids are checked against the catalog snapshot, nutrition for every
+valid meal is computed in one vectorized pass, and meals and their ingredient
+lines are written with multi-row INSERTs in a single transaction.
+"""
+
+import json
+import uuid
+from collections.abc import Iterable
+from datetime import datetime, timezone
+from typing import Any
+
+from pydantic import ValidationError
+from sqlalchemy import delete, insert, update
+from sqlmodel import Session, col, select
+
+from app.models.nutrition import Meal, MealIngredient
+from app.nutrition.catalog import catalog
+from app.nutrition.day_plan import refresh_meal_days
+from app.nutrition.engine import compute_meals
+from app.nutrition.meal_similarity import fingerprint
+from app.nutrition.units import unit_list
+from app.schemas.nutrition import MealImport, MealImportError, MealImportResult
+
+
+def _record_name(raw: Any) -> str | None:
+    name = raw.get("name") if isinstance(raw, dict) else None
+    return name if isinstance(name, str) else None
+
+
+def _validation_messages(exc: ValidationError) -> list[str]:
+    return [
+        f"{'.'.join(map(str, error['loc']))}: {error['msg']}"
+        if error["loc"]
+        else error["msg"]
+        for error in exc.errors()
+    ]
+
+
+def _validate(
+    raw_records: Iterable[Any], errors: list[MealImportError]
+) -> list[tuple[int, MealImport]]:
+    records = []
+    for index, raw in enumerate(raw_records):
+        if isinstance(raw, json.JSONDecodeError):
+            errors.append(
+                MealImportError(index=index, errors=[f"Invalid JSON: {raw.msg}"])
+            )
+            continue
+        try:
+            records.append((index, MealImport.model_validate(raw)))
+        except ValidationError as exc:
+            errors.append(
+                MealImportError(
+                    index=index,
+                    name=_record_name(raw),
+                    errors=_validation_messages(exc),
+                )
+            )
+    return records
+
+
+def _ndjson_records(body: bytes) -> Iterable[Any]:
+    for line in body.splitlines():
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield exc
+
+
+def read_records(
+    body: bytes, *, ndjson: bool, errors: list[MealImportError]
+) -> list[tuple[int, MealImport]]:
+    """
+    Parse an NDJSON body, a JSON array of meals or a frontend meal export
+    (``{"meals": [...]}``). Invalid records are appended to ``errors`` with
+    their position; a body that isn't a list of meals raises ValueError.
+    """
+    if ndjson:
+        return _validate(_ndjson_records(body), errors)
+
+    try:
+        data = json.loads(body)
+    except json.JSONDecodeError as exc:
+        raise ValueError(f"Invalid JSON: {exc.msg}") from exc
+    if isinstance(data, dict):
+        data = data.get("meals")
+    if not isinstance(data, list):
+        raise ValueError("Expected a list of meals or an export with a meals list")
+    return _validate(data, errors)
+
+
+def import_meals(
+    session: Session,
+    records: list[tuple[int, MealImport]],
+    *,
+    errors: list[MealImportError],
+    upsert: bool = False,
+) -> MealImportResult:
+    """
+    Write valid ``records`` in one transaction. With ``upsert``, a record
+    replaces the meal (and its ingredients) that already has its name.
+    """
+    snapshot = catalog.get_including(
+        session,
+        (item.ingredient_id for _, record in records for item in record.ingredients),
+    )
+    valid = []
+    for index, record in records:
+        missing_ids = [
+            str(ingredient_id)
+            for ingredient_id in dict.fromkeys(
+                i.ingredient_id for i in record.ingredients
+            )
+            if ingredient_id not in snapshot.table
+        ]
+        unconvertible = snapshot.table.unconvertible(record.ingredients)
+        if missing_ids:
+            errors.append(
+                MealImportError(
+                    index=index,
+                    name=record.name,
+                    errors=[f"Ingredients not found: {', '.join(missing_ids)}"],
+                )
+            )
+        elif unconvertible:
+            errors.append(
+                MealImportError(
+                    index=index,
+                    name=record.name,
+                    errors=[
+                        "Units without a conversion to grams: "
+                        f"{unit_list(unconvertible)}"
+                    ],
+                )
+            )
+        else:
+            valid.append(record)
+
+    nutrition = compute_meals([record.ingredients for record in valid], snapshot.table)
+
+    meal_ids: dict[str, uuid.UUID] = {}
+    if upsert:
+        # When names repeat, the most recently updated meal is the one replaced
+        statement = (
+            select(Meal.id, Meal.name)
+            .where(col(Meal.name).in_({record.name for record in valid}))
+            .order_by(col(Meal.updated_at))
+        )
+        meal_ids = {name: meal_id for meal_id, name in session.exec(statement)}
+
+    now = datetime.now(timezone.utc)
+    inserts: dict[uuid.UUID, dict[str, Any]] = {}
+    updates: dict[uuid.UUID, dict[str, Any]] = {}
+    lines: dict[uuid.UUID, list[dict[str, Any]]] = {}
+    for meal_index, record in enumerate(valid):
+        values = {
+            **record.model_dump(exclude={"ingredients"}),
+            **nutrition.meal_totals(meal_index),
+            "fingerprint": fingerprint(i.ingredient_id for i in record.ingredients),
+        }
+        meal_id = meal_ids.get(record.name)
+        if meal_id in inserts:
+            inserts[meal_id].update(values)
+        elif meal_id:
+            updates[meal_id] = {"id": meal_id, **values, "updated_at": now}
+        else:
+            meal = Meal.model_validate(values)
+            meal_id = meal.id
+            inserts[meal_id] = meal.model_dump()
+            if upsert:
+                meal_ids[record.name] = meal_id
+        lines[meal_id] = [
+            MealIngredient(
+                meal_id=meal_id,
+                ingredient_id=item.ingredient_id,
+                quantity=item.quantity,
+                unit=item.unit,
+                **line,
+            ).model_dump()
+            for item, line in zip(
+                record.ingredients, nutrition.meal_lines(meal_index), strict=True
+            )
+        ]
+
+    if updates:
+        session.execute(
+            delete(MealIngredient).where(col(MealIngredient.meal_id).in_(updates))
+        )
+        session.execute(update(Meal), list(updates.values()))
+    if inserts:
+        session.execute(insert(Meal), list(inserts.values()))
+    rows = [row for meal_lines in lines.values() for row in meal_lines]
+    if rows:
+        session.execute(insert(MealIngredient), rows)
+    refresh_meal_days(session, list(updates))
+    session.commit()
+
+    return MealImportResult(
+        created=len(inserts),
+        updated=len(updates),
+        errors=sorted(errors, key=lambda error: error.index),
+    )
@@ -0,0 +1,324 @@
+"""
+Meal composition fingerprints, for similar and duplicate meals.
+
+A meal's composition is the grams of each ingredient it contains, and two
+meals are as similar as the weighted Jaccard index of their compositions
+(grams in common over grams in either), from 0 to 1.
+
+Comparing every pair of meals doesn't scale, so each meal stores a
+fingerprint: the MinHash signature of its ingredient set, cut into bands and
+each band hashed to a bigint (locality-sensitive hashing). Meals sharing a
+band are likely to share most of their ingredients; with 8 bands of 4
+hashes, meals with 80% of their ingredients in common share one with 98%
+probability, and meals with 30% in common with 6%. Only meals sharing a band
+are compared, through the GIN index on ``meals.fingerprint``.
+
+Fingerprints are set whenever a meal's ingredients are written;
+``python -m app.backfill_meal_fingerprints`` computes them for existing
+meals.
+"""
+
+import hashlib
+import random
+import uuid
+from collections import defaultdict
+from collections.abc import Iterable, Sequence
+from typing import Any
+
+from sqlalchemy import BigInteger, ColumnElement, any_, case, cast, literal, update
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
+from sqlmodel import Session, col, func, select
+
+from app.models.nutrition import Meal, MealIngredient
+from app.nutrition.catalog import catalog
+from app.nutrition.engine import IngredientQuantity, NutrientTable
+from app.schemas.nutrition import MealDuplicateGroup, SimilarMealPublic
+
+SIGNATURE_SIZE = 32
+BAND_SIZE = 4
+# Meals sharing a band that are compared to a meal, those sharing the most
+# bands first
+MAX_CANDIDATES = 500
+# Meals read per query, below the bind parameter limit
+READ_CHUNK_SIZE = 5000
+
+_PRIME = (1 << 61) - 1
+# Fixed seed: fingerprints are stored, so the hash functions must not change
+_rng = random.Random(20261018)
+_HASHES = [
+    (_rng.randrange(1, _PRIME), _rng.randrange(_PRIME)) for _ in range(SIGNATURE_SIZE)
+]
+
+# ingredient_id -> grams
+Composition = dict[uuid.UUID, float]
+
+
+def composition(
+    items: Iterable[IngredientQuantity], table: NutrientTable
+) -> Composition:
+    grams: Composition = defaultdict(float)
+    for item in items:
+        grams[item.ingredient_id] += table.grams(item)
+    return dict(grams)
+
+
+def fingerprint(ingredient_ids: Iterable[uuid.UUID]) -> list[int]:
+    """LSH band hashes of the MinHash signature of a set of ingredients."""
+    keys = [ingredient_id.int % _PRIME for ingredient_id in set(ingredient_ids)]
+    if not keys:
+        return []
+    signature = [min((a * key + b) % _PRIME for key in keys) for a, b in _HASHES]
+    return [
+        int.from_bytes(
+            hashlib.blake2b(
+                repr((band, signature[start : start + BAND_SIZE])).encode(),
+                digest_size=8,
+            ).digest(),
+            "big",
+            signed=True,
+        )
+        for band, start in enumerate(range(0, SIGNATURE_SIZE, BAND_SIZE))
+    ]
+
+
+def similarity(a: Composition, b: Composition) -> float:
+    """Weighted Jaccard index of two compositions."""
+    shared = sum(
+        min(grams, b.get(ingredient_id, 0.0)) for ingredient_id, grams in a.items()
+    )
+    combined = sum(a.values()) + sum(b.values()) - shared
+    if combined <= 0:
+        return float(a.keys() == b.keys())
+    return shared / combined
+
+
+LINE_COLUMNS = (
+    MealIngredient.meal_id,
+    MealIngredient.ingredient_id,
+    MealIngredient.quantity,
+    MealIngredient.unit,
+)
+
+
+def _compositions(
+    session: Session, meal_ids: Iterable[uuid.UUID], lines: Sequence[Any]
+) -> dict[uuid.UUID, Composition]:
+    snapshot = catalog.get_including(session, (line.ingredient_id for line in lines))
+    meal_lines: dict[uuid.UUID, list[Any]] = {meal_id: [] for meal_id in meal_ids}
+    for line in lines:
+        meal_lines[line.meal_id].append(line)
+    return {
+        meal_id: composition(items, snapshot.table)
+        for meal_id, items in meal_lines.items()
+    }
+
+
+def meal_compositions(
+    session: Session, meal_ids: Sequence[uuid.UUID]
+) -> dict[uuid.UUID, Composition]:
+    lines = [
+        line
+        for start in range(0, len(meal_ids), READ_CHUNK_SIZE)
+        for line in session.execute(
+            select(*LINE_COLUMNS).where(
+                col(MealIngredient.meal_id).in_(
+                    meal_ids[start : start + READ_CHUNK_SIZE]
+                )
+            )
+        )
+    ]
+    return _compositions(session, meal_ids, lines)
+
+
+def _shared_bands(bands: Sequence[int]) -> ColumnElement[int]:
+    """Number of ``bands`` in a meal's fingerprint."""
+    fingerprint_bands = any_(col(Meal.fingerprint))
+    return sum(
+        (
+            case((literal(band, BigInteger) == fingerprint_bands, 1), else_=0)
+            for band in bands
+        ),
+        start=literal(0),
+    )
+
+
+def find_similar(
+    session: Session,
+    meal_composition: Composition,
+    *,
+    exclude_id: uuid.UUID | None = None,
+    min_similarity: float = 0.0,
+    limit: int = 10,
+) -> list[SimilarMealPublic]:
+    """
+    Meals sharing a fingerprint band with ``meal_composition`` and at least
+    ``min_similarity`` similar to it, most similar first. Candidates are read
+    with their ingredient lines in one query.
+
+    Only the ``MAX_CANDIDATES`` meals sharing the most bands are compared, so
+    near-identical meals are kept when many meals share a band.
+    """
+    bands = fingerprint(meal_composition)
+    if not bands:
+        return []
+    candidates = (
+        select(Meal.id)
+        .where(col(Meal.fingerprint).op("&&")(cast(bands, ARRAY(BigInteger))))
+        .order_by(_shared_bands(bands).desc(), col(Meal.id))
+        .limit(MAX_CANDIDATES)
+    )
+    if exclude_id is not None:
+        candidates = candidates.where(Meal.id != exclude_id)
+    lines = session.execute(
+        select(  # type: ignore[call-overload]
+            Meal.name,
+            MealIngredient.meal_id,
+            MealIngredient.ingredient_id,
+            MealIngredient.quantity,
+            MealIngredient.unit,
+        )
+        .join(Meal, col(Meal.id) == MealIngredient.meal_id)
+        .where(col(MealIngredient.meal_id).in_(candidates.scalar_subquery()))
+    ).all()
+    names = {line.meal_id: line.name for line in lines}
+    compositions = _compositions(session, names, lines)
+    similar = [
+        SimilarMealPublic(
+            id=meal_id,
+            name=name,
+            similarity=round(similarity(meal_composition, compositions[meal_id]), 4),
+        )
+        for meal_id, name in names.items()
+    ]
+    similar.sort(key=lambda meal: (-meal.similarity, meal.name, meal.id))
+    return [meal for meal in similar if meal.similarity >= min_similarity][:limit]
+
+
+def duplicate_groups(
+    session: Session, min_similarity: float
+) -> list[MealDuplicateGroup]:
+    """
+    Groups of meals at least ``min_similarity`` similar, over the whole table.
+
+    Within each band, meals are compared to the oldest meal of the band, and
+    matches are merged across bands (union-find). That is one comparison per
+    meal per band instead of one per pair, at the cost of missing two meals
+    that match each other but not the oldest meal of any band they share.
+    Each group lists its oldest meal and the other meals' similarity to it.
+    """
+    bands = select(
+        Meal.id, Meal.created_at, func.unnest(Meal.fingerprint).label("band")
+    ).subquery()
+    buckets: list[list[uuid.UUID]] = [
+        list(meal_ids)
+        for meal_ids in session.execute(
+            select(
+                func.array_agg(
+                    aggregate_order_by(bands.c.id, bands.c.created_at, bands.c.id)
+                )
+            )
+            .group_by(bands.c.band)
+            .having(func.count() > 1)
+        ).scalars()
+    ]
+    meal_ids = list(dict.fromkeys(i for bucket in buckets for i in bucket))
+    if not meal_ids:
+        return []
+    compositions = meal_compositions(session, meal_ids)
+
+    parents = {meal_id: meal_id for meal_id in meal_ids}
+
+    def find(meal_id: uuid.UUID) -> uuid.UUID:
+        while parents[meal_id] != meal_id:
+            parents[meal_id] = parents[parents[meal_id]]
+            meal_id = parents[meal_id]
+        return meal_id
+
+    for oldest, *others in buckets:
+        for meal_id in others:
+            root, other_root = find(oldest), find(meal_id)
+            if root == other_root:
+                continue
+            if (
+                similarity(compositions[oldest], compositions[meal_id])
+                >= min_similarity
+            ):
+                parents[other_root] = root
+
+    groups: defaultdict[uuid.UUID, list[uuid.UUID]] = defaultdict(list)
+    for meal_id in meal_ids:
+        groups[find(meal_id)].append(meal_id)
+    grouped = [group for group in groups.values() if len(group) > 1]
+    grouped_ids = [meal_id for group in grouped for meal_id in group]
+    meals = {
+        meal.id: meal
+        for start in range(0, len(grouped_ids), READ_CHUNK_SIZE)
+        for meal in session.execute(
+            select(Meal.id, Meal.name, Meal.created_at).where(
+                col(Meal.id).in_(grouped_ids[start : start + READ_CHUNK_SIZE])
+            )
+        )
+    }
+    report = []
+    for group in grouped:
+        kept, *duplicates = sorted(
+            group, key=lambda meal_id: (meals[meal_id].created_at, meal_id)
+        )
+        report.append(
+            MealDuplicateGroup(
+                id=kept,
+                name=meals[kept].name,
+                duplicates=[
+                    SimilarMealPublic(
+                        id=meal_id,
+                        name=meals[meal_id].name,
+                        similarity=round(
+                            similarity(compositions[kept], compositions[meal_id]), 4
+                        ),
+                    )
+                    for meal_id in duplicates
+                ],
+            )
+        )
+    report.sort(key=lambda group: (-len(group.duplicates), group.id))
+    return report
+
+
+def rebuild_fingerprints(session: Session, chunk_size: int = 5000) -> int:
+    """
+    Recompute the fingerprint of every meal, ``chunk_size`` meals at a time.
+    Returns the number of meals.
+    """
+    count = 0
+    last_id: uuid.UUID | None = None
+    while True:
+        statement = (
+            select(
+                Meal.id,
+                Meal.updated_at,
+                func.array_remove(
+                    func.array_agg(MealIngredient.ingredient_id), None
+                ).label("ingredient_ids"),
+            )
+            .outerjoin(MealIngredient, col(MealIngredient.meal_id) == Meal.id)
+            .group_by(col(Meal.id), col(Meal.updated_at))
+        )
+        if last_id is not None:
+            statement = statement.where(col(Meal.id) > last_id)
+        rows = session.execute(statement.order_by(col(Meal.id)).limit(chunk_size)).all()
+        if not rows:
+            return count
+        session.execute(
+            update(Meal),
+            [
+                # Passing updated_at keeps it from being bumped
+                {
+                    "id": row.id,
+                    "fingerprint": fingerprint(row.ingredient_ids),
+                    "updated_at": row.updated_at,
+                }
+                for row in rows
+            ],
+        )
+        count += len(rows)
+        last_id = rows[-1].id
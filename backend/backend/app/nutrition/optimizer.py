@@ -0,0 +1,388 @@
+"""Day plans solved for nutrition goals.
+
+Candidates are the ingredient catalog (in units of 100 g) and a set of meals
+(in servings). The solver picks how much of each to eat so the day's
+calories and macros land as close as possible to the goals:
+
+    minimize    sum_k |A_k x - t_k| / t_k       (calories, protein, carbs, fat)
+              + fiber shortfall / fiber goal
+              + sodium above the goal / sodium goal
+              + a small cost per calorie, lower for meals and, when asked,
+                for traditional items
+    subject to  A_sodium x <= max_sodium        (when given)
+                0 <= x <= 3 (300 g) for ingredients
+                x in {0, 1, 2} servings for meals
+
+The absolute deviations are split into nonnegative over/under variables, so
+the problem is a mixed-integer LP over the (nutrients x candidates) matrix,
+solved by HiGHS within a time budget (see :func:`solve`). LP optima sit on a
+vertex, so only a handful of candidates (about one per constraint) end up in
+the plan. Amounts are rounded to whole servings and ``GRAM_STEP`` grams
+without going over ``max_sodium`` (see :func:`round_amounts`). Chosen items are then spread over the day's slots, largest first,
+each into the slot furthest below its share of calories.
+"""
+
+import time
+import uuid
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any, Literal
+
+import numpy as np
+from numpy.typing import NDArray
+from scipy.optimize import Bounds, LinearConstraint, milp
+
+from app.models.nutrition import Meal
+from app.nutrition.catalog import CatalogSnapshot
+from app.nutrition.day_plan import compute_day_plan
+from app.nutrition.engine import NUTRIENTS, TOTAL_FIELDS
+from app.schemas.nutrition import (
+    DayMeal,
+    DayMealItem,
+    DayNutrition,
+    DayOptimizeRequest,
+    DayOptimizeResult,
+    DayPlan,
+    NutritionGoals,
+)
+
+MAX_INGREDIENT_UNITS = 3.0  # x 100 g
+MAX_MEAL_SERVINGS = 2
+# Ingredient amounts are rounded to this many grams; smaller ones are dropped
+GRAM_STEP = 5.0
+# Weight of the per-calorie cost next to the relative goal deviations: only
+# breaks ties between plans that fit about as well
+ITEM_COST = 0.01
+MEAL_COST_FACTOR = 0.5
+TRADITIONAL_COST_FACTOR = 0.5
+# Time given to the integer search even when the relaxation used the budget
+MIN_TIME_LIMIT = 0.1
+
+CALORIES, PROTEIN, CARBS, FAT, FIBER, SODIUM = range(len(NUTRIENTS))
+# Nutrients aimed at exactly, as (row, kcal per gram)
+MACROS = ((PROTEIN, 4.0), (CARBS, 4.0), (FAT, 9.0))
+
+
+class OptimizerError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Candidates:
+    """Items the solver can pick, one column each."""
+
+    # (nutrients x candidates), per 100 g or per serving
+    nutrients: NDArray[np.float64]
+    is_meal: NDArray[np.bool_]
+    is_traditional: NDArray[np.bool_]
+    ids: list[uuid.UUID]
+
+
+def goal_targets(goals: NutritionGoals) -> NDArray[np.float64]:
+    """Daily amount of each of engine.NUTRIENTS the goals aim at."""
+    targets = np.zeros(len(NUTRIENTS))
+    targets[CALORIES] = goals.daily_calories
+    percentages = (
+        goals.protein_percentage,
+        goals.carbs_percentage,
+        goals.fat_percentage,
+    )
+    for (row, kcal), percentage in zip(MACROS, percentages, strict=True):
+        targets[row] = goals.daily_calories * percentage / 100 / kcal
+    targets[FIBER] = goals.fiber_grams
+    targets[SODIUM] = goals.sodium_mg
+    return targets
+
+
+def build_candidates(
+    request: DayOptimizeRequest, snapshot: CatalogSnapshot, meals: Sequence[Meal]
+) -> Candidates:
+    table = snapshot.table
+    rows = (
+        snapshot.filter(is_halal=True if request.halal_only else None)
+        if request.use_ingredients
+        else np.zeros(0, dtype=np.intp)
+    )
+
+    usable = []
+    for meal in meals:
+        ids = [line.ingredient_id for line in meal.meal_ingredients]
+        if meal.servings <= 0 or not ids or not all(i in table for i in ids):
+            continue
+        lines = [table.index[i] for i in ids]
+        if request.halal_only and not snapshot.is_halal[lines].all():
+            continue
+        usable.append(meal)
+    meal_nutrients = np.array(
+        [
+            [getattr(meal, field) / meal.servings for field in TOTAL_FIELDS]
+            for meal in usable
+        ]
+    ).reshape(len(usable), len(NUTRIENTS))
+
+    return Candidates(
+        nutrients=np.vstack([table.nutrients[rows], meal_nutrients]).T,
+        is_meal=np.concatenate(
+            [np.zeros(len(rows), dtype=np.bool_), np.ones(len(usable), dtype=np.bool_)]
+        ),
+        is_traditional=np.concatenate(
+            [
+                snapshot.is_traditional[rows],
+                np.array([meal.is_traditional for meal in usable], dtype=np.bool_),
+            ]
+        ),
+        ids=[snapshot.ingredients[row].id for row in rows]
+        + [meal.id for meal in usable],
+    )
+
+
+def _solve_columns(
+    candidates: Candidates,
+    columns: NDArray[np.intp],
+    targets: NDArray[np.float64],
+    *,
+    max_sodium: float | None,
+    prefer_traditional: bool,
+    integral: bool,
+    time_limit: float,
+) -> Any:
+    """HiGHS on the candidates in ``columns``, meals integral if asked."""
+    nutrients = candidates.nutrients[:, columns]
+    is_meal = candidates.is_meal[columns]
+    size = len(columns)
+    aimed = [CALORIES, PROTEIN, CARBS, FAT]
+    # Columns: candidates, over and under per aimed nutrient, fiber shortfall,
+    # sodium above the goal
+    extra = 2 * len(aimed) + 2
+    over = size + np.arange(len(aimed))
+    under = over + len(aimed)
+    fiber_short, sodium_over = size + extra - 2, size + extra - 1
+
+    cost = np.zeros(size + extra)
+    factor = np.where(is_meal, MEAL_COST_FACTOR, 1.0)
+    if prefer_traditional:
+        traditional = candidates.is_traditional[columns]
+        factor *= np.where(traditional, TRADITIONAL_COST_FACTOR, 1.0)
+    cost[:size] = ITEM_COST * factor * nutrients[CALORIES] / targets[CALORIES]
+    weights = 1.0 / np.maximum(targets[aimed], 1.0)
+    cost[over] = weights
+    cost[under] = weights
+    cost[fiber_short] = 1.0 / max(targets[FIBER], 1.0)
+    cost[sodium_over] = 1.0 / max(targets[SODIUM], 1.0)
+
+    # A_k x - over_k + under_k = t_k
+    aimed_rows = np.zeros((len(aimed), size + extra))
+    aimed_rows[:, :size] = nutrients[aimed]
+    aimed_rows[np.arange(len(aimed)), over] = -1.0
+    aimed_rows[np.arange(len(aimed)), under] = 1.0
+    constraints = [LinearConstraint(aimed_rows, targets[aimed], targets[aimed])]
+    # A_fiber x + shortfall >= fiber goal
+    fiber_row = np.zeros(size + extra)
+    fiber_row[:size] = nutrients[FIBER]
+    fiber_row[fiber_short] = 1.0
+    constraints.append(LinearConstraint(fiber_row, targets[FIBER], np.inf))
+    # A_sodium x - excess <= sodium goal, and A_sodium x <= max_sodium
+    sodium_row = np.zeros(size + extra)
+    sodium_row[:size] = nutrients[SODIUM]
+    if max_sodium is not None:
+        constraints.append(LinearConstraint(sodium_row.copy(), -np.inf, max_sodium))
+    sodium_row[sodium_over] = -1.0
+    constraints.append(LinearConstraint(sodium_row, -np.inf, targets[SODIUM]))
+
+    upper = np.full(size + extra, np.inf)
+    upper[:size] = np.where(is_meal, MAX_MEAL_SERVINGS, MAX_INGREDIENT_UNITS)
+    integrality = np.zeros(size + extra)
+    if integral:
+        integrality[:size] = is_meal
+    return milp(
+        cost,
+        constraints=constraints,
+        bounds=Bounds(np.zeros(size + extra), upper),
+        integrality=integrality,
+        options={"time_limit": max(time_limit, MIN_TIME_LIMIT)},
+    )
+
+
+def round_amounts(
+    candidates: Candidates,
+    amounts: NDArray[np.float64],
+    max_sodium: float | None = None,
+) -> NDArray[np.float64]:
+    """
+    ``amounts`` as they are eaten: whole meal servings and ingredients in
+    ``GRAM_STEP`` steps, rounded to the nearest. When rounding up pushes the
+    day's sodium over ``max_sodium``, the items rounded up are rounded down
+    instead, saltiest first, until it fits. Rounding every item down stays
+    within ``max_sodium`` whenever ``amounts`` did.
+    """
+    step = np.where(candidates.is_meal, 1.0, GRAM_STEP / 100)
+    rounded: NDArray[np.float64] = np.round(amounts / step) * step
+    if max_sodium is None:
+        return rounded
+    sodium = candidates.nutrients[SODIUM]
+    excess = float(sodium @ rounded) - max_sodium
+    rounded_up = np.flatnonzero(rounded > amounts)
+    for column in rounded_up[np.argsort(-sodium[rounded_up] * step[rounded_up])]:
+        if excess <= 0:
+            break
+        rounded[column] -= step[column]
+        excess -= float(sodium[column] * step[column])
+    return rounded
+
+
+def solve(
+    candidates: Candidates,
+    targets: NDArray[np.float64],
+    *,
+    max_sodium: float | None = None,
+    prefer_traditional: bool = False,
+    time_limit: float = 1.0,
+) -> tuple[NDArray[np.float64], Literal["optimal", "time_limit"]]:
+    """
+    Amount of each candidate in the best plan found, rounded with
+    :func:`round_amounts`, and how the search ended.
+
+    The LP relaxation runs over every candidate. When it eats fractions of
+    meals, the integer problem is solved over a small set instead of the
+    whole catalog (which HiGHS cannot do in bounded time): every meal, the
+    ingredients of the relaxed plan, and for each of protein, carbs, fat and
+    fiber the ingredient richest in it per calorie, to make up the difference
+    integer servings leave. It stops at the time left and keeps the best plan
+    found; when there is none, the relaxed plan is rounded.
+    """
+    started = time.perf_counter()
+    everything = np.arange(len(candidates.ids))
+    relaxed = _solve_columns(
+        candidates,
+        everything,
+        targets,
+        max_sodium=max_sodium,
+        prefer_traditional=prefer_traditional,
+        integral=False,
+        time_limit=time_limit,
+    )
+    if relaxed.x is None:
+        raise OptimizerError("No day plan found within the time limit")
+    amounts: NDArray[np.float64] = relaxed.x[: len(everything)]
+    status: Literal["optimal", "time_limit"] = (
+        "optimal" if relaxed.status == 0 else "time_limit"
+    )
+    meals = candidates.is_meal
+    fractional = np.abs(amounts[meals] - np.round(amounts[meals])) > 1e-6
+    if not fractional.any():
+        return round_amounts(candidates, amounts, max_sodium), status
+
+    ingredients = np.flatnonzero(~meals)
+    per_calorie = candidates.nutrients[[PROTEIN, CARBS, FAT, FIBER]][
+        :, ingredients
+    ] / np.maximum(candidates.nutrients[CALORIES, ingredients], 1.0)
+    fillers = ingredients[per_calorie.argmax(axis=1)] if len(ingredients) else []
+    columns = np.unique(
+        np.concatenate(
+            [np.flatnonzero(meals | (amounts > 1e-9)), np.asarray(fillers, np.intp)]
+        )
+    )
+    integral = _solve_columns(
+        candidates,
+        columns,
+        targets,
+        max_sodium=max_sodium,
+        prefer_traditional=prefer_traditional,
+        integral=True,
+        time_limit=time_limit - (time.perf_counter() - started),
+    )
+    if integral.x is None:
+        return round_amounts(candidates, amounts, max_sodium), "time_limit"
+    amounts = np.zeros(len(everything))
+    amounts[columns] = integral.x[: len(columns)]
+    status = "optimal" if integral.status == 0 else "time_limit"
+    return round_amounts(candidates, amounts, max_sodium), status
+
+
+def _slot_id(name: str) -> str:
+    return "-".join(name.lower().split())
+
+
+def build_day_plan(
+    candidates: Candidates,
+    amounts: NDArray[np.float64],
+    slots: Sequence[str],
+    daily_calories: float,
+) -> DayPlan:
+    """Day plan eating ``amounts`` of the candidates, spread over ``slots``."""
+    items: list[tuple[float, DayMealItem]] = []
+    for column in np.flatnonzero(amounts > 1e-6):
+        calories_per_unit = float(candidates.nutrients[CALORIES, column])
+        item_id = candidates.ids[column]
+        if candidates.is_meal[column]:
+            servings = round(float(amounts[column]))
+            if servings <= 0:
+                continue
+            item = DayMealItem(
+                id=str(uuid.uuid4()),
+                type="meal",
+                meal_id=item_id,
+                quantity=servings,
+                unit="servings",
+            )
+            items.append((calories_per_unit * servings, item))
+        else:
+            grams = round(float(amounts[column]) * 100 / GRAM_STEP) * GRAM_STEP
+            if grams <= 0:
+                continue
+            item = DayMealItem(
+                id=str(uuid.uuid4()),
+                type="ingredient",
+                ingredient_id=item_id,
+                quantity=grams,
+                unit="g",
+            )
+            items.append((calories_per_unit * grams / 100, item))
+
+    share = daily_calories / len(slots)
+    remaining = [share] * len(slots)
+    day_meals = [DayMeal(id=_slot_id(name), name=name) for name in slots]
+    for calories, item in sorted(items, key=lambda pair: -pair[0]):
+        slot = max(range(len(slots)), key=lambda i: remaining[i])
+        remaining[slot] -= calories
+        day_meals[slot].items.append(item)
+    return DayPlan(day_meals=day_meals)
+
+
+def targets_nutrition(targets: NDArray[np.float64]) -> DayNutrition:
+    return DayNutrition(
+        **dict(
+            zip(DayNutrition.model_fields, np.round(targets, 2).tolist(), strict=True)
+        )
+    )
+
+
+def optimize_day(
+    request: DayOptimizeRequest,
+    snapshot: CatalogSnapshot,
+    meals: Sequence[Meal],
+    time_limit: float,
+) -> DayOptimizeResult:
+    """
+    Solve for a day plan over the catalog and ``meals``, which must have their
+    ingredient lines loaded. CPU-bound: run it off the event loop.
+    """
+    candidates = build_candidates(request, snapshot, meals)
+    if not candidates.ids:
+        raise OptimizerError("No meals or ingredients to plan the day from")
+    targets = goal_targets(request.goals)
+    amounts, status = solve(
+        candidates,
+        targets,
+        max_sodium=request.max_sodium,
+        prefer_traditional=request.prefer_traditional,
+        time_limit=time_limit,
+    )
+    plan = build_day_plan(
+        candidates, amounts, request.slots, request.goals.daily_calories
+    )
+    # Totals exactly as saving the plan computes them
+    compute_day_plan(plan, {meal.id: meal for meal in meals}, snapshot.table)
+    return DayOptimizeResult(
+        status=status, day_plan=plan, targets=targets_nutrition(targets)
+    )
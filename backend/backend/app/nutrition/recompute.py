@@ -0,0 +1,259 @@
+"""
+Recomputation of stored meal values after ingredient nutrients change.
+
+Meal lines and meal totals are computed when the meal is written, so editing
+an ingredient's per-100g values or unit conversions leaves every meal using
+it stale. Such an edit queues a ``meal_recompute_jobs`` row in the same
+transaction; the ``meal-recompute`` periodic job (see ``app.core.scheduler``)
+works through the queue, one chunk of meals per transaction:
+
+- the next meals, in id order after the job's ``last_meal_id``, are found
+  through ``ix_meal_ingredients_ingredient_id`` and locked, so meal edits
+  running meanwhile are not overwritten;
+- their lines are computed in one vectorized pass of the nutrition engine
+  against the current catalog;
+- lines and meals whose stored values differ are written back with bulk
+  UPDATEs;
+- the saved days using the updated meals are recomputed, with their rollups
+  (``app.nutrition.day_plan.refresh_days``), and the job's cursor and
+  counters are advanced.
+
+Once every meal is processed, the saved days using the ingredients directly
+are recomputed the same way, a chunk at a time after ``last_day_id``.
+
+A job is resumed from its cursor after a crash or restart, and recomputing a
+meal or day twice writes nothing the second time. Jobs are claimed with
+``FOR UPDATE SKIP LOCKED``, so every worker can run the periodic job.
+"""
+
+import logging
+import uuid
+from collections import defaultdict
+from collections.abc import Sequence
+from datetime import datetime, timezone
+from typing import Any
+
+import numpy as np
+from sqlalchemy import ColumnElement, update
+from sqlmodel import Session, col, func, select
+
+from app.models.nutrition import (
+    Ingredient,
+    Meal,
+    MealIngredient,
+    MealRecomputeJob,
+    SavedDay,
+)
+from app.nutrition.catalog import catalog, read_catalog_version
+from app.nutrition.day_plan import references_any, refresh_days, refresh_meal_days
+from app.nutrition.engine import NUTRIENTS, PER_100G_FIELDS, TOTAL_FIELDS, compute_meals
+
+logger = logging.getLogger(__name__)
+
+# Jobs still to be worked on, oldest first
+UNFINISHED = ("pending", "running")
+
+
+def nutrition_key(ingredient: Ingredient) -> tuple[Any, ...]:
+    """What a meal's stored values depend on in an ingredient."""
+    return (
+        tuple(getattr(ingredient, field) for field in PER_100G_FIELDS),
+        frozenset((row.unit, row.grams_per_unit) for row in ingredient.units),
+    )
+
+
+def enqueue_recompute(
+    session: Session, ingredient_ids: Sequence[uuid.UUID] = ()
+) -> MealRecomputeJob:
+    """
+    Queue a recomputation of the meals using any of ``ingredient_ids``, or of
+    every meal when empty. Added to the caller's transaction.
+    """
+    job = MealRecomputeJob(ingredient_ids=list(dict.fromkeys(ingredient_ids)))
+    session.add(job)
+    return job
+
+
+def _affected_meals(job: MealRecomputeJob) -> Any:
+    """Ids of the meals a job recomputes (a select of one column)."""
+    if not job.ingredient_ids:
+        return select(Meal.id)
+    return (
+        select(MealIngredient.meal_id)
+        .where(col(MealIngredient.ingredient_id).in_(job.ingredient_ids))
+        .distinct()
+    )
+
+
+def _next_meal_ids(
+    session: Session, job: MealRecomputeJob, chunk_size: int
+) -> list[uuid.UUID]:
+    statement = _affected_meals(job)
+    (meal_id,) = statement.selected_columns
+    if job.last_meal_id is not None:
+        statement = statement.where(meal_id > job.last_meal_id)
+    return list(session.exec(statement.order_by(meal_id).limit(chunk_size)))
+
+
+def _affected_days(job: MealRecomputeJob) -> ColumnElement[bool]:
+    """The saved days using a job's ingredients directly."""
+    if not job.ingredient_ids:
+        return func.cardinality(col(SavedDay.ingredient_ids)) > 0
+    return references_any(SavedDay.ingredient_ids, job.ingredient_ids)
+
+
+def _next_day_ids(
+    session: Session, job: MealRecomputeJob, chunk_size: int
+) -> list[uuid.UUID]:
+    statement = select(SavedDay.id).where(_affected_days(job))
+    if job.last_day_id is not None:
+        statement = statement.where(col(SavedDay.id) > job.last_day_id)
+    return list(session.exec(statement.order_by(col(SavedDay.id)).limit(chunk_size)))
+
+
+def recompute_meals(session: Session, meal_ids: Sequence[uuid.UUID]) -> list[uuid.UUID]:
+    """
+    Recompute the lines and totals of ``meal_ids`` from the current catalog,
+    writing back only stale values. Returns the ids of the meals updated.
+
+    The meals are locked, in id order, before their lines are read: an edit
+    of one of them meanwhile either waits for this transaction or is read by
+    it, and is never overwritten with values of its previous ingredients.
+    """
+    meals = session.execute(
+        select(Meal.id, *(getattr(Meal, field) for field in TOTAL_FIELDS))
+        .where(col(Meal.id).in_(meal_ids))
+        .order_by(col(Meal.id))
+        .with_for_update(of=Meal)
+    ).all()
+    lines = session.execute(
+        select(  # type: ignore[call-overload]
+            MealIngredient.id,
+            MealIngredient.meal_id,
+            MealIngredient.ingredient_id,
+            MealIngredient.quantity,
+            MealIngredient.unit,
+            *(getattr(MealIngredient, nutrient) for nutrient in NUTRIENTS),
+        ).where(col(MealIngredient.meal_id).in_(meal_ids))
+    ).all()
+    snapshot = catalog.get_including(session, (line.ingredient_id for line in lines))
+
+    meal_lines = defaultdict(list)
+    for line in lines:
+        meal_lines[line.meal_id].append(line)
+    items = [meal_lines[meal.id] for meal in meals]
+    result = compute_meals(items, snapshot.table)
+
+    # Stored values in the engine's layout, compared to the computed ones
+    stored_lines = np.array(
+        [[getattr(line, n) for n in NUTRIENTS] for meal in items for line in meal],
+        dtype=np.float64,
+    ).reshape(-1, len(NUTRIENTS))
+    stored_totals = np.array(
+        [[getattr(meal, field) for field in TOTAL_FIELDS] for meal in meals],
+        dtype=np.float64,
+    ).reshape(-1, len(TOTAL_FIELDS))
+    stale_lines = np.flatnonzero((stored_lines != result.lines).any(axis=1))
+    stale_meals = np.flatnonzero((stored_totals != result.totals).any(axis=1))
+
+    flat_lines = [line for meal in items for line in meal]
+    if len(stale_lines):
+        session.execute(
+            update(MealIngredient),
+            [
+                {
+                    "id": flat_lines[i].id,
+                    **dict(zip(NUTRIENTS, result.lines[i].tolist(), strict=True)),
+                }
+                for i in stale_lines
+            ],
+        )
+    if len(stale_meals):
+        now = datetime.now(timezone.utc)
+        session.execute(
+            update(Meal),
+            [
+                # Bumped so incremental exports pick the new totals up
+                {"id": meals[i].id, "updated_at": now, **result.meal_totals(i)}
+                for i in stale_meals.tolist()
+            ],
+        )
+    return [meals[i].id for i in stale_meals.tolist()]
+
+
+def run_next_chunk(session: Session, chunk_size: int = 1000) -> MealRecomputeJob | None:
+    """
+    Process the next chunk of the oldest unfinished job not claimed by
+    another worker, and commit. Returns the job, or None when there is
+    nothing to do.
+    """
+    job = session.exec(
+        select(MealRecomputeJob)
+        .where(col(MealRecomputeJob.status).in_(UNFINISHED))
+        .order_by(col(MealRecomputeJob.created_at))
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    ).first()
+    if job is None:
+        session.rollback()
+        return None
+
+    # The ingredient write that queued the job may come from another worker
+    catalog.invalidate(read_catalog_version(session))
+    now = datetime.now(timezone.utc)
+    try:
+        if job.status == "pending":
+            job.status = "running"
+            job.started_at = now
+            job.total_meals = session.exec(
+                select(func.count()).select_from(_affected_meals(job).subquery())
+            ).one()
+        meal_ids = [] if job.meals_done else _next_meal_ids(session, job, chunk_size)
+        day_ids = _next_day_ids(session, job, chunk_size) if job.meals_done else []
+        if meal_ids:
+            updated = recompute_meals(session, meal_ids)
+            job.updated_meals += len(updated)
+            job.updated_days += refresh_meal_days(session, updated)
+            job.processed_meals += len(meal_ids)
+            job.last_meal_id = meal_ids[-1]
+        elif not job.meals_done:
+            job.meals_done = True
+            # Meals created while the job ran are counted when processed
+            job.total_meals = job.processed_meals
+        elif day_ids:
+            job.updated_days += refresh_days(
+                session, col(SavedDay.id).in_(day_ids), batch_size=chunk_size
+            )
+            job.last_day_id = day_ids[-1]
+        else:
+            job.status = "done"
+            job.finished_at = now
+    except Exception as exc:
+        job_id = job.id
+        session.rollback()
+        failed = session.get(MealRecomputeJob, job_id, with_for_update=True)
+        if failed is not None:
+            failed.status = "failed"
+            failed.error = repr(exc)
+            failed.finished_at = now
+            session.commit()
+        raise
+    session.commit()
+    return job
+
+
+def run_recompute_jobs(session: Session, chunk_size: int = 1000) -> int:
+    """Work through the queue until it is empty. Returns the chunks processed."""
+    chunks = 0
+    while (job := run_next_chunk(session, chunk_size)) is not None:
+        if job.status == "done":
+            logger.info(
+                "Meal recompute job %s done: %d meals, %d updated, %d days updated",
+                job.id,
+                job.processed_meals,
+                job.updated_meals,
+                job.updated_days,
+            )
+        else:
+            chunks += 1
+    return chunks
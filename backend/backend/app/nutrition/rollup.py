@@ -0,0 +1,313 @@
+"""
+Per-user daily nutrition rollups.
+
+``nutrition_daily_rollup`` holds, for each user and date, the number of saved
+days planned on that date and the sum of their totals, so nutrition over a
+date range is read without loading a single day plan. Routes writing a saved
+day apply the change in the same transaction with :func:`apply_day_change`:
+the old day is subtracted and the new one added through an upsert, so
+concurrent writes to the same date add up instead of overwriting each other.
+Meals reach the rollups through the days that use them: a meal edit
+recomputes those days (``app.nutrition.day_plan.refresh_days``), which moves
+their contributions with :func:`apply_day_changes`.
+
+:func:`rebuild_rollups` recomputes the whole table from the saved days, for
+the backfill command (``python -m app.backfill_nutrition_rollup``), one month
+per transaction. Writers hold the advisory lock of each month they change in
+shared mode and the rebuild holds it exclusively, so only writes to the
+month being rebuilt wait for it.
+
+A day counts on the date of its plan, or on the date it was created when the
+plan has no valid date.
+"""
+
+import uuid
+from collections.abc import Iterable, Iterator
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, NamedTuple
+
+from sqlalchemy import Date, Numeric, and_, cast, delete, or_, true
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session, col, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.nutrition import NutritionDailyRollup, SavedDay
+from app.nutrition.engine import TOTAL_FIELDS
+from app.schemas.nutrition import NutritionStatsPeriod, StatsGranularity
+
+
+class RollupEntry(NamedTuple):
+    """What one saved day adds to the rollup."""
+
+    user_id: uuid.UUID | None
+    day: date
+    totals: tuple[float, ...]
+
+
+def day_date(plan_date: Any, created_at: datetime) -> date:
+    """The date a saved day counts on."""
+    if isinstance(plan_date, str):
+        try:
+            return date.fromisoformat(plan_date[:10])
+        except ValueError:
+            pass
+    return created_at.date()
+
+
+def rollup_entry(saved_day: SavedDay) -> RollupEntry:
+    return RollupEntry(
+        saved_day.user_id,
+        day_date(saved_day.day_plan.get("date"), saved_day.created_at),
+        tuple(getattr(saved_day, field) for field in TOTAL_FIELDS),
+    )
+
+
+# (user_id, day) -> [day_count, *totals] to add
+Deltas = dict[tuple[uuid.UUID | None, date], list[float]]
+
+# First key of the months' advisory locks, the second being the month number
+ROLLUP_LOCK = 73010
+
+
+def _month(day: date) -> int:
+    return day.year * 12 + day.month - 1
+
+
+def _lock_months(session: Session, days: Iterable[date]) -> None:
+    """Hold the locks of the months of ``days`` shared, in a fixed order."""
+    for month in sorted({_month(day) for day in days}):
+        session.execute(select(func.pg_advisory_xact_lock_shared(ROLLUP_LOCK, month)))
+
+
+def _add(deltas: Deltas, entry: RollupEntry, sign: int) -> None:
+    delta = deltas.setdefault((entry.user_id, entry.day), [0.0] * 7)
+    delta[0] += sign
+    for i, value in enumerate(entry.totals, start=1):
+        delta[i] += sign * value
+
+
+def _apply(session: Session, deltas: Deltas) -> None:
+    """Add ``deltas`` to the rollup rows, dropping rows left without days."""
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "user_id": user_id,
+            "day": day,
+            "day_count": int(delta[0]),
+            **{
+                field: round(value, 2)
+                for field, value in zip(TOTAL_FIELDS, delta[1:], strict=True)
+            },
+        }
+        for (user_id, day), delta in deltas.items()
+        if any(delta)
+    ]
+    if not rows:
+        return
+    _lock_months(session, (day for _, day in deltas))
+    insert_rows = insert(NutritionDailyRollup).values(rows)
+    excluded = insert_rows.excluded
+    statement = insert_rows.on_conflict_do_update(
+        index_elements=[
+            col(NutritionDailyRollup.user_id),
+            col(NutritionDailyRollup.day),
+        ],
+        set_={
+            "day_count": col(NutritionDailyRollup.day_count) + excluded.day_count,
+            # Rounded like the day totals, so additions and removals cancel
+            **{
+                field: func.round(
+                    cast(
+                        col(getattr(NutritionDailyRollup, field)) + excluded[field],
+                        Numeric,
+                    ),
+                    2,
+                )
+                for field in TOTAL_FIELDS
+            },
+            "updated_at": func.now(),
+        },
+    ).returning(col(NutritionDailyRollup.id), col(NutritionDailyRollup.day_count))
+    empty = [row.id for row in session.execute(statement) if row.day_count <= 0]
+    if empty:
+        session.execute(
+            delete(NutritionDailyRollup).where(col(NutritionDailyRollup.id).in_(empty))
+        )
+
+
+def apply_day_changes(
+    session: Session,
+    changes: Iterable[tuple[RollupEntry | None, RollupEntry | None]],
+) -> None:
+    """
+    Move the contributions of saved days, each from ``before`` (None when the
+    day is created) to ``after`` (None when it is deleted), in one upsert.
+    """
+    deltas: Deltas = {}
+    for before, after in changes:
+        if before is not None:
+            _add(deltas, before, -1)
+        if after is not None:
+            _add(deltas, after, 1)
+    _apply(session, deltas)
+
+
+def apply_day_change(
+    session: Session,
+    before: RollupEntry | None = None,
+    after: RollupEntry | None = None,
+) -> None:
+    """Move a saved day's contribution, see :func:`apply_day_changes`."""
+    apply_day_changes(session, [(before, after)])
+
+
+def _day_entries(
+    session: Session, condition: Any, chunk_size: int
+) -> Iterator[list[RollupEntry]]:
+    """Rollup entries of the saved days matching ``condition``, by chunks."""
+    last_id: uuid.UUID | None = None
+    while True:
+        statement = select(
+            SavedDay.id,
+            SavedDay.user_id,
+            col(SavedDay.day_plan)["date"].as_string().label("plan_date"),
+            SavedDay.created_at,
+            *(getattr(SavedDay, field) for field in TOTAL_FIELDS),
+        ).where(condition)
+        if last_id is not None:
+            statement = statement.where(col(SavedDay.id) > last_id)
+        rows = session.execute(
+            statement.order_by(col(SavedDay.id)).limit(chunk_size)
+        ).all()
+        if not rows:
+            return
+        yield [
+            RollupEntry(
+                row.user_id,
+                day_date(row.plan_date, row.created_at),
+                tuple(getattr(row, field) for field in TOTAL_FIELDS),
+            )
+            for row in rows
+        ]
+        last_id = rows[-1].id
+
+
+def _rebuild_month(session: Session, month: int, chunk_size: int) -> int:
+    start = date(month // 12, month % 12 + 1, 1)
+    end = (start + timedelta(days=31)).replace(day=1)
+    # Waits for the writers of the month to commit, and holds off new ones
+    session.execute(select(func.pg_advisory_xact_lock(ROLLUP_LOCK, month)))
+    session.execute(
+        delete(NutritionDailyRollup).where(
+            col(NutritionDailyRollup.day) >= start, col(NutritionDailyRollup.day) < end
+        )
+    )
+    # Days planned in the month, or created around it when the plan's date
+    # isn't valid; the exact date is checked on each entry
+    candidates = or_(
+        col(SavedDay.day_plan)["date"].as_string().startswith(start.isoformat()[:7]),
+        and_(
+            col(SavedDay.created_at)
+            >= datetime.combine(start, time(), timezone.utc) - timedelta(days=1),
+            col(SavedDay.created_at)
+            < datetime.combine(end, time(), timezone.utc) + timedelta(days=1),
+        ),
+    )
+    count = 0
+    for entries in _day_entries(session, candidates, chunk_size):
+        deltas: Deltas = {}
+        for entry in entries:
+            if start <= entry.day < end:
+                _add(deltas, entry, 1)
+                count += 1
+        _apply(session, deltas)
+    return count
+
+
+def rebuild_rollups(session: Session, chunk_size: int = 5000) -> int:
+    """
+    Recompute every rollup from the saved days, reading ``chunk_size`` days at
+    a time. Returns the number of days counted.
+
+    Each month is rebuilt and committed in a transaction of its own, during
+    which saved day writes to that month wait and then apply their change on
+    top of the rebuilt rows.
+    """
+    months = {
+        _month(day)
+        for day in session.exec(select(col(NutritionDailyRollup.day)).distinct())
+    }
+    for entries in _day_entries(session, true(), chunk_size):
+        months.update(_month(entry.day) for entry in entries)
+    session.commit()
+
+    count = 0
+    for month in sorted(months):
+        count += _rebuild_month(session, month, chunk_size)
+        session.commit()
+    return count
+
+
+def _stats_statement(
+    start: date,
+    end: date,
+    granularity: StatsGranularity,
+    user_id: uuid.UUID | None,
+) -> Any:
+    period = cast(
+        func.date_trunc(granularity.value, NutritionDailyRollup.day), Date
+    ).label("start")
+    statement = (
+        select(
+            period,
+            func.sum(NutritionDailyRollup.day_count).label("day_count"),
+            *(
+                func.sum(getattr(NutritionDailyRollup, field)).label(field)
+                for field in TOTAL_FIELDS
+            ),
+        )
+        .where(NutritionDailyRollup.day >= start, NutritionDailyRollup.day <= end)
+        .group_by(period)
+        .order_by(period)
+    )
+    if user_id is not None:
+        statement = statement.where(NutritionDailyRollup.user_id == user_id)
+    return statement
+
+
+def _stats_periods(rows: Iterable[Any]) -> list[NutritionStatsPeriod]:
+    return [
+        NutritionStatsPeriod(
+            start=row.start,
+            day_count=row.day_count,
+            **{field: round(getattr(row, field), 2) for field in TOTAL_FIELDS},
+        )
+        for row in rows
+    ]
+
+
+def read_stats(
+    session: Session,
+    start: date,
+    end: date,
+    granularity: StatsGranularity,
+    user_id: uuid.UUID | None = None,
+) -> list[NutritionStatsPeriod]:
+    """
+    Rollups from ``start`` to ``end`` included, summed per period. Without
+    ``user_id`` every user's days are summed.
+    """
+    statement = _stats_statement(start, end, granularity, user_id)
+    return _stats_periods(session.execute(statement))
+
+
+async def read_stats_async(
+    session: AsyncSession,
+    start: date,
+    end: date,
+    granularity: StatsGranularity,
+    user_id: uuid.UUID | None = None,
+) -> list[NutritionStatsPeriod]:
+    """:func:`read_stats` on an async session."""
+    statement = _stats_statement(start, end, granularity, user_id)
+    return _stats_periods(await session.execute(statement))
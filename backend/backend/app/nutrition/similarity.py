@@ -0,0 +1,62 @@
+"""
+Nearest neighbours of ingredients by nutrient profile.
+
+Each ingredient is a point whose coordinates are its per-100g nutrients,
+standardized per nutrient (centred and divided by the catalog's standard
+deviation), so sodium in milligrams doesn't outweigh fat in grams. Similar
+ingredients are the closest points in Euclidean distance.
+
+With six dimensions and a catalog in the tens of thousands, a brute-force
+scan is one matrix-vector product and beats a tree index; row norms are kept
+so the scan is ``|y|² - 2 y·x + |x|²`` over the whole matrix. The index is
+built from a catalog snapshot, on the first query after each catalog write.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+from numpy.typing import NDArray
+
+
+@dataclass(frozen=True)
+class NutrientIndex:
+    vectors: NDArray[np.float64]
+    squared_norms: NDArray[np.float64]
+
+    @classmethod
+    def build(cls, nutrients: NDArray[np.float64]) -> "NutrientIndex":
+        if len(nutrients):
+            scale = nutrients.std(axis=0)
+            # A nutrient with the same value everywhere doesn't separate rows
+            scale[scale == 0] = 1.0
+            vectors = (nutrients - nutrients.mean(axis=0)) / scale
+        else:
+            vectors = nutrients.copy()
+        return cls(
+            vectors=vectors, squared_norms=np.einsum("ij,ij->i", vectors, vectors)
+        )
+
+    def nearest(
+        self, row: int, k: int, candidates: NDArray[np.intp] | None = None
+    ) -> tuple[NDArray[np.intp], NDArray[np.float64]]:
+        """
+        The ``k`` rows closest to ``row`` among ``candidates`` (every row when
+        None), ``row`` itself excluded, closest first, with their distances.
+        """
+        if candidates is None:
+            candidates = np.arange(len(self.vectors))
+        candidates = candidates[candidates != row]
+        if not len(candidates) or k <= 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float64)
+        squared = (
+            self.squared_norms[candidates]
+            - 2 * (self.vectors[candidates] @ self.vectors[row])
+            + self.squared_norms[row]
+        )
+        if k < len(candidates):
+            top = np.argpartition(squared, k - 1)[:k]
+        else:
+            top = np.arange(len(candidates))
+        # Stable on distance ties: candidates come in catalog order
+        top = top[np.lexsort((top, squared[top]))]
+        return candidates[top], np.sqrt(np.maximum(squared[top], 0.0))
@@ -0,0 +1,118 @@
+"""
+Ingredient units and their weight in grams.
+
+Units are matched through an alias registry: "grams", "gram" and "g" are all
+``g``, "c.à.s" is ``tbsp``, and so on; unknown units are only lowercased.
+Mass units convert the same way for every ingredient. Other units convert
+through the ingredient's ``ingredient_units`` rows, derived from its
+``unit_conversions`` whenever the ingredient is written, which the catalog
+snapshot loads into one ``(ingredient_id, unit) -> grams`` map
+(``NutrientTable.unit_factors``) used by every nutrition computation.
+
+A unit that converts neither way is rejected when a meal is written.
+"""
+
+import uuid
+from collections.abc import Iterable, Mapping
+from typing import Protocol
+
+from app.models.nutrition import Ingredient, IngredientUnit
+
+
+class IngredientUnitKey(Protocol):
+    ingredient_id: uuid.UUID
+    unit: str
+
+
+# Canonical unit -> other spellings (compared lowercased)
+UNIT_ALIASES: dict[str, tuple[str, ...]] = {
+    "g": ("gram", "grams", "gr", "gramme", "grammes", "غ", "غرام", "جرام"),
+    "kg": ("kilogram", "kilograms", "kilo", "kilos", "kilogramme", "kilogrammes"),
+    "mg": ("milligram", "milligrams", "milligramme", "milligrammes"),
+    "ml": ("milliliter", "milliliters", "millilitre", "millilitres", "مل"),
+    "tbsp": (
+        "tablespoon",
+        "tablespoons",
+        "tbs",
+        "c.à.s",
+        "c.a.s",
+        "càs",
+        "cas",
+        "cuillère à soupe",
+        "cuillères à soupe",
+        "ملعقة كبيرة",
+    ),
+    "tsp": (
+        "teaspoon",
+        "teaspoons",
+        "c.à.c",
+        "c.a.c",
+        "càc",
+        "cac",
+        "cuillère à café",
+        "cuillères à café",
+        "ملعقة صغيرة",
+    ),
+    "cup": ("cups", "tasse", "tasses", "كوب"),
+    "piece": ("pieces", "pc", "pcs", "pièce", "pièces", "حبة"),
+    "pinch": ("pinches", "pincée", "pincées", "رشة"),
+}
+
+# Grams per unit, for every ingredient
+MASS_UNITS = {"g": 1.0, "kg": 1000.0, "mg": 0.001}
+
+_CANONICAL = {
+    alias: unit for unit, aliases in UNIT_ALIASES.items() for alias in (unit, *aliases)
+}
+
+
+def canonical_unit(unit: str) -> str:
+    key = " ".join(unit.lower().split())
+    return _CANONICAL.get(key, key)
+
+
+def ingredient_unit_factors(
+    unit_conversions: Mapping[str, float],
+    measurement_units: Iterable[str] = (),
+    default_unit: str = "g",
+) -> dict[str, float]:
+    """
+    Grams per canonical unit for an ingredient, besides the mass units.
+    Milliliters offered without a conversion weigh a gram, as they always
+    have.
+    """
+    factors: dict[str, float] = {}
+    if any(canonical_unit(u) == "ml" for u in (*measurement_units, default_unit)):
+        factors["ml"] = 1.0
+    for unit, grams in (unit_conversions or {}).items():
+        canonical = canonical_unit(unit)
+        if canonical not in MASS_UNITS:
+            factors[canonical] = float(grams)
+    return factors
+
+
+def sync_ingredient_units(ingredient: Ingredient) -> None:
+    """Derive the ingredient's ``ingredient_units`` rows from its conversions."""
+    existing = {row.unit: row for row in ingredient.units}
+    rows = []
+    for unit, grams in ingredient_unit_factors(
+        ingredient.unit_conversions,
+        ingredient.measurement_units,
+        ingredient.default_unit,
+    ).items():
+        row = existing.get(unit)
+        if row is None:
+            row = IngredientUnit(
+                ingredient_id=ingredient.id, unit=unit, grams_per_unit=grams
+            )
+        else:
+            row.grams_per_unit = grams
+        rows.append(row)
+    ingredient.units = rows
+
+
+def unit_list(items: Iterable[IngredientUnitKey]) -> str:
+    """``ingredient_id (unit)`` of each distinct item, for error messages."""
+    return ", ".join(
+        dict.fromkeys(f"{item.ingredient_id} ({item.unit})" for item in items)
+    )
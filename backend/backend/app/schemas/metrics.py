@@ -0,0 +1,34 @@
+from sqlmodel import SQLModel
+
+
+class PoolStats(SQLModel):
+    size: int
+    in_use: int
+    idle: int
+    overflow: int
+    # Callers currently waiting for a connection, and the peak since start
+    waiting: int
+    max_waiting: int
+    checkouts: int
+    timeouts: int
+    connects: int
+    invalidations: int
+    checkout_seconds_total: float
+    checkout_seconds_max: float
+    # Cumulative checkout counts by upper latency bound in seconds
+    checkout_seconds_buckets: dict[str, int]
+
+
+class CacheStats(SQLModel):
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+
+
+class Metrics(SQLModel):
+    pid: int
+    pools: dict[str, PoolStats]
+    auth_cache: CacheStats
@@ -1,8 +1,9 @@
 import uuid
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Literal, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field, computed_field, model_validator
 
 
 # ===== CATEGORY SCHEMAS =====
@@ -33,7 +34,8 @@ class CategoryPublic(CategoryBase):
 
 class CategoriesPublic(BaseModel):
     data: list[CategoryPublic]
-    count: int
+    count: int | None = None
+    next_cursor: str | None = None
 
 
 # ===== INGREDIENT SCHEMAS =====
@@ -92,7 +94,17 @@ class IngredientPublic(IngredientBase):
 
 class IngredientsPublic(BaseModel):
     data: list[IngredientPublic]
-    count: int
+    count: int | None = None
+    next_cursor: str | None = None
+
+
+class SimilarIngredientPublic(IngredientPublic):
+    # Distance between standardized per-100g nutrient profiles
+    distance: float
+
+
+class SimilarIngredientsPublic(BaseModel):
+    data: list[SimilarIngredientPublic]
 
 
 # ===== MEAL INGREDIENT SCHEMAS =====
@@ -168,10 +180,166 @@ class MealPublic(MealBase):
 
 class MealsPublic(BaseModel):
     data: list[MealPublic]
+    count: int | None = None
+    next_cursor: str | None = None
+
+
+class SimilarMealPublic(BaseModel):
+    id: uuid.UUID
+    name: str
+    # Weighted Jaccard index of the ingredient grams, from 0 to 1
+    similarity: float
+
+
+class SimilarMealsPublic(BaseModel):
+    data: list[SimilarMealPublic]
+
+
+class MealCreatedPublic(MealPublic):
+    # Existing meals with nearly the same ingredients
+    possible_duplicates: list[SimilarMealPublic] = []
+
+
+class MealDuplicateGroup(BaseModel):
+    # The oldest meal of the group
+    id: uuid.UUID
+    name: str
+    duplicates: list[SimilarMealPublic]
+
+
+class MealDuplicatesPublic(BaseModel):
+    data: list[MealDuplicateGroup]
     count: int
 
 
+class MealExport(MealBase):
+    id: uuid.UUID
+    created_at: datetime
+    updated_at: datetime
+    ingredients: list[MealIngredientBase] = []
+
+
+class MealImportIngredient(BaseModel):
+    ingredient_id: uuid.UUID
+    quantity: float
+    unit: str
+
+    @model_validator(mode="before")
+    @classmethod
+    def ingredient_id_from_ingredient(cls, data: Any) -> Any:
+        # The frontend's meal export embeds the ingredient instead of its id
+        if isinstance(data, dict) and "ingredient_id" not in data:
+            ingredient = data.get("ingredient")
+            if isinstance(ingredient, dict):
+                return {**data, "ingredient_id": ingredient.get("id")}
+        return data
+
+
+class MealImport(MealBase):
+    ingredients: list[MealImportIngredient] = []
+
+
+class MealImportError(BaseModel):
+    index: int
+    name: Optional[str] = None
+    errors: list[str]
+
+
+class MealImportResult(BaseModel):
+    created: int = 0
+    updated: int = 0
+    errors: list[MealImportError] = []
+
+
+# ===== MEAL NUTRITION SCHEMAS =====
+class MealIngredientKey(BaseModel):
+    ingredient_id: uuid.UUID
+    unit: str
+
+
+class MealIngredientQuantity(MealIngredientKey):
+    quantity: float
+
+
+class MealIngredientsPatch(BaseModel):
+    add: list[MealIngredientQuantity] = []
+    change: list[MealIngredientQuantity] = []
+    remove: list[MealIngredientKey] = []
+
+
+class MealNutritionCompute(BaseModel):
+    ingredients: list[MealIngredientQuantity] = []
+
+
+class MealNutritionPublic(BaseModel):
+    ingredients: list[MealIngredientBase]
+    total_calories: float
+    total_protein: float
+    total_carbohydrates: float
+    total_fat: float
+    total_fiber: float
+    total_sodium: float
+
+
 # ===== SAVED DAY SCHEMAS =====
+class DayNutrition(BaseModel):
+    calories: float = 0.0
+    protein: float = 0.0
+    carbs: float = 0.0
+    fat: float = 0.0
+    fiber: float = 0.0
+    sodium: float = 0.0
+
+
+class DayMealItem(BaseModel):
+    # The planner also stores the embedded meal/ingredient for display
+    model_config = ConfigDict(extra="allow")
+
+    id: str = ""
+    type: Literal["meal", "ingredient"]
+    meal_id: Optional[uuid.UUID] = None
+    ingredient_id: Optional[uuid.UUID] = None
+    quantity: float
+    unit: str
+
+    @model_validator(mode="before")
+    @classmethod
+    def ids_from_embedded(cls, data: Any) -> Any:
+        if isinstance(data, dict):
+            for key in ("meal", "ingredient"):
+                embedded = data.get(key)
+                if not data.get(f"{key}_id") and isinstance(embedded, dict):
+                    data = {**data, f"{key}_id": embedded.get("id")}
+        return data
+
+    @model_validator(mode="after")
+    def check_reference(self) -> "DayMealItem":
+        if getattr(self, f"{self.type}_id") is None:
+            raise ValueError(f"{self.type} items need a {self.type}_id")
+        return self
+
+
+class DayMeal(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    id: str = ""
+    name: str = ""
+    time: Optional[str] = None
+    color: str = ""
+    items: list[DayMealItem] = []
+    notes: Optional[str] = None
+    total_nutrition: DayNutrition = DayNutrition()
+
+
+class DayPlan(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    date: Optional[str] = None
+    day_meals: list[DayMeal] = []
+    total_nutrition: DayNutrition = DayNutrition()
+    daily_goals: Optional[DayNutrition] = None
+
+
 class SavedDayBase(BaseModel):
     title: str
     description: Optional[str] = None
@@ -179,18 +347,71 @@ class SavedDayBase(BaseModel):
 
 
 class SavedDayCreate(SavedDayBase):
-    pass
+    day_plan: DayPlan = DayPlan()  # type: ignore[assignment]
 
 
 class SavedDayUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
-    day_plan: Optional[dict] = None
+    day_plan: Optional[DayPlan] = None
+
+
+class SavedDaySort(str, Enum):
+    updated_at = "updated_at"
+    total_calories = "total_calories"
+    total_protein = "total_protein"
+    total_carbohydrates = "total_carbohydrates"
+    total_fat = "total_fat"
+    total_fiber = "total_fiber"
+    total_sodium = "total_sodium"
+
+
+class NutritionGoals(BaseModel):
+    """Daily targets, shaped like the frontend's ``NutritionGoals``."""
+
+    daily_calories: float = Field(default=2000, gt=0)
+    protein_percentage: float = Field(default=20, ge=0, le=100)
+    carbs_percentage: float = Field(default=50, ge=0, le=100)
+    fat_percentage: float = Field(default=30, ge=0, le=100)
+    fiber_grams: float = Field(default=25, ge=0)
+    sodium_mg: float = Field(default=2300, ge=0)
+
+
+class DayOptimizeRequest(BaseModel):
+    goals: NutritionGoals = NutritionGoals()
+    # Only halal ingredients, and meals made of them
+    halal_only: bool = False
+    # Favor traditional ingredients and meals at equal fit
+    prefer_traditional: bool = False
+    # Hard limit, unlike goals.sodium_mg which is only aimed at
+    max_sodium: Optional[float] = Field(default=None, ge=0)
+    slots: list[str] = Field(
+        default=["Breakfast", "Lunch", "Dinner"], min_length=1, max_length=10
+    )
+    # Candidate meals; by default the most recent meals of user_id
+    meal_ids: Optional[list[uuid.UUID]] = None
+    user_id: Optional[uuid.UUID] = None
+    # Whether single ingredients may be added next to meals
+    use_ingredients: bool = True
+
+
+class DayOptimizeResult(BaseModel):
+    # "time_limit" when the solver stopped at its time budget with the best
+    # plan found so far
+    status: Literal["optimal", "time_limit"]
+    day_plan: DayPlan
+    targets: DayNutrition
 
 
 class SavedDayPublic(SavedDayBase):
     id: uuid.UUID
     user_id: Optional[uuid.UUID] = None
+    total_calories: float = 0.0
+    total_protein: float = 0.0
+    total_carbohydrates: float = 0.0
+    total_fat: float = 0.0
+    total_fiber: float = 0.0
+    total_sodium: float = 0.0
     created_at: datetime
     updated_at: datetime
 
@@ -200,4 +421,78 @@ class SavedDayPublic(SavedDayBase):
 
 class SavedDaysPublic(BaseModel):
     data: list[SavedDayPublic]
-    count: int
+    count: int | None = None
+    next_cursor: str | None = None
+
+
+# ===== NUTRITION STATS SCHEMAS =====
+class StatsGranularity(str, Enum):
+    day = "day"
+    week = "week"
+    month = "month"
+
+
+class NutritionStatsPeriod(BaseModel):
+    # First day of the period; weeks start on Monday
+    start: date
+    # Saved days planned in the period
+    day_count: int
+    total_calories: float = 0.0
+    total_protein: float = 0.0
+    total_carbohydrates: float = 0.0
+    total_fat: float = 0.0
+    total_fiber: float = 0.0
+    total_sodium: float = 0.0
+
+
+class NutritionStatsPublic(BaseModel):
+    granularity: StatsGranularity
+    data: list[NutritionStatsPeriod]
+
+
+# ===== MEAL RECOMPUTE JOB SCHEMAS =====
+class MealRecomputeStatus(str, Enum):
+    pending = "pending"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+
+class MealRecomputeJobCreate(BaseModel):
+    # Recompute the meals using any of these ingredients; every meal if empty
+    ingredient_ids: list[uuid.UUID] = Field(default_factory=list)
+
+
+class MealRecomputeJobPublic(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: uuid.UUID
+    ingredient_ids: list[uuid.UUID]
+    status: MealRecomputeStatus
+    # Meals to recompute, counted when the job starts
+    total_meals: int
+    processed_meals: int
+    # Processed meals whose stored values were stale
+    updated_meals: int
+    # Saved days whose totals changed, through their meals or directly
+    updated_days: int
+    error: str | None = None
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def progress(self) -> float:
+        """Fraction of the meals processed, 1 once the job is done."""
+        if self.status == MealRecomputeStatus.done:
+            return 1.0
+        if not self.total_meals:
+            return 0.0
+        return round(min(self.processed_meals / self.total_meals, 1.0), 4)
+
+
+class MealRecomputeJobsPublic(BaseModel):
+    data: list[MealRecomputeJobPublic]
+    count: int | None = None
+    next_cursor: str | None = None
@@ -67,7 +67,8 @@ class UserPublic(UserBase):
 
 class UsersPublic(SQLModel):
     data: list[UserPublic]
-    count: int
+    count: int | None = None
+    next_cursor: str | None = None
 
 
 class UserPublicWithDetails(UserPublic):
@@ -0,0 +1,268 @@
+import uuid
+
+import numpy as np
+from fastapi.testclient import TestClient
+from sqlmodel import Session, col, select
+
+from app.core.config import settings
+from app.models.nutrition import Ingredient
+from app.nutrition.engine import NUTRIENTS
+from app.nutrition.optimizer import SODIUM, Candidates, round_amounts
+from app.tests.utils.nutrition import create_random_ingredient
+from app.tests.utils.utils import random_lower_string
+
+
+def test_create_saved_day_computes_totals(client: TestClient, db: Session) -> None:
+    ingredient = create_random_ingredient(db)
+    meal = {
+        "name": "Harira",
+        "servings": 4,
+        "ingredients": [
+            {"ingredient_id": str(ingredient.id), "quantity": 400, "unit": "g"}
+        ],
+    }
+    response = client.post(f"{settings.API_V1_STR}/meals/", json=meal)
+    meal_id = response.json()["id"]
+
+    day_plan = {
+        "date": "2026-10-18",
+        "day_meals": [
+            {
+                "id": "ftour",
+                "name": "Ftour",
+                "color": "amber",
+                "items": [
+                    # Embedded objects are how the planner stores references
+                    {
+                        "type": "meal",
+                        "meal": {"id": meal_id},
+                        "quantity": 1,
+                        "unit": "servings",
+                    },
+                    {
+                        "type": "meal",
+                        "meal_id": meal_id,
+                        "quantity": 50,
+                        "unit": "grams",
+                    },
+                ],
+            },
+            {
+                "id": "asha",
+                "name": "Asha",
+                "items": [
+                    {
+                        "type": "ingredient",
+                        "ingredient_id": str(ingredient.id),
+                        "quantity": 1,
+                        "unit": "cup",
+                    }
+                ],
+            },
+        ],
+        "total_nutrition": {"calories": 1},
+    }
+    data = {"title": random_lower_string(), "day_plan": day_plan}
+    response = client.post(f"{settings.API_V1_STR}/days/", json=data)
+    assert response.status_code == 200
+    content = response.json()
+    # 376 + 188 from the meal, 658 from the cup of the ingredient
+    assert content["total_calories"] == 1222.0
+    slots = content["day_plan"]["day_meals"]
+    assert [slot["total_nutrition"]["calories"] for slot in slots] == [564.0, 658.0]
+    assert content["day_plan"]["total_nutrition"]["calories"] == 1222.0
+    assert slots[0]["items"][0]["meal"] == {"id": meal_id}
+
+
+def test_meal_changes_recompute_saved_days(client: TestClient, db: Session) -> None:
+    ingredient = create_random_ingredient(db)
+    meal = {
+        "name": "Rfissa",
+        "servings": 4,
+        "ingredients": [
+            {"ingredient_id": str(ingredient.id), "quantity": 400, "unit": "g"}
+        ],
+    }
+    response = client.post(f"{settings.API_V1_STR}/meals/", json=meal)
+    meal_id = response.json()["id"]
+    item = {"type": "meal", "meal_id": meal_id, "quantity": 1, "unit": "servings"}
+    day_plan = {"day_meals": [{"id": "lunch", "items": [item]}]}
+    data = {"title": random_lower_string(), "day_plan": day_plan}
+    response = client.post(f"{settings.API_V1_STR}/days/", json=data)
+    day_url = f"{settings.API_V1_STR}/days/{response.json()['id']}"
+    assert response.json()["total_calories"] == 376.0
+
+    change = {"ingredient_id": str(ingredient.id), "quantity": 800, "unit": "g"}
+    response = client.patch(
+        f"{settings.API_V1_STR}/meals/{meal_id}/ingredients",
+        json={"change": [change]},
+    )
+    assert response.status_code == 200
+    content = client.get(day_url).json()
+    assert content["total_calories"] == 752.0
+    assert content["day_plan"]["total_nutrition"]["calories"] == 752.0
+
+    response = client.put(
+        f"{settings.API_V1_STR}/meals/{meal_id}",
+        json={"ingredients": [{**change, "quantity": 200}]},
+    )
+    assert response.status_code == 200
+    assert client.get(day_url).json()["total_calories"] == 188.0
+
+    # A deleted meal's items count for nothing
+    response = client.delete(f"{settings.API_V1_STR}/meals/{meal_id}")
+    assert response.status_code == 200
+    assert client.get(day_url).json()["total_calories"] == 0.0
+
+
+def test_saved_days_filter_and_sort_by_totals(client: TestClient, db: Session) -> None:
+    ingredient = create_random_ingredient(db)
+    title = random_lower_string()
+    for quantity in (300, 100, 200):
+        day_plan = {
+            "day_meals": [
+                {
+                    "items": [
+                        {
+                            "type": "ingredient",
+                            "ingredient_id": str(ingredient.id),
+                            "quantity": quantity,
+                            "unit": "g",
+                        }
+                    ]
+                }
+            ]
+        }
+        response = client.post(
+            f"{settings.API_V1_STR}/days/",
+            json={"title": f"{title} {quantity}", "day_plan": day_plan},
+        )
+        assert response.status_code == 200
+
+    response = client.get(
+        f"{settings.API_V1_STR}/days/",
+        params={
+            "search": title,
+            "min_calories": 376,
+            "sort": "total_calories",
+            "descending": False,
+        },
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert [day["title"] for day in content["data"]] == [
+        f"{title} 100",
+        f"{title} 200",
+        f"{title} 300",
+    ]
+
+
+def test_saved_day_unknown_meal(client: TestClient) -> None:
+    meal_id = str(uuid.uuid4())
+    day_plan = {
+        "day_meals": [
+            {
+                "items": [
+                    {
+                        "type": "meal",
+                        "meal_id": meal_id,
+                        "quantity": 1,
+                        "unit": "servings",
+                    }
+                ]
+            }
+        ]
+    }
+    response = client.post(
+        f"{settings.API_V1_STR}/days/", json={"title": "x", "day_plan": day_plan}
+    )
+    assert response.status_code == 404
+    assert response.json()["detail"] == f"Meals not found: {meal_id}"
+
+
+def test_optimize_day_from_meals(client: TestClient, db: Session) -> None:
+    ingredient = create_random_ingredient(db)
+    meal = {
+        "name": "Bissara",
+        "servings": 2,
+        "ingredients": [
+            {"ingredient_id": str(ingredient.id), "quantity": 200, "unit": "g"}
+        ],
+    }
+    response = client.post(f"{settings.API_V1_STR}/meals/", json=meal)
+    meal_id = response.json()["id"]
+
+    # Two servings of 376 kcal hit the goal exactly
+    response = client.post(
+        f"{settings.API_V1_STR}/days/optimize",
+        json={
+            "goals": {"daily_calories": 752},
+            "meal_ids": [meal_id],
+            "use_ingredients": False,
+            "slots": ["Ftour", "Asha"],
+        },
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert content["status"] == "optimal"
+    assert content["targets"]["calories"] == 752.0
+    plan = content["day_plan"]
+    assert [slot["name"] for slot in plan["day_meals"]] == ["Ftour", "Asha"]
+    items = [item for slot in plan["day_meals"] for item in slot["items"]]
+    assert [(i["meal_id"], i["quantity"], i["unit"]) for i in items] == [
+        (meal_id, 2, "servings")
+    ]
+    assert plan["total_nutrition"]["calories"] == 752.0
+
+    # The plan saves as it is, with the same totals
+    response = client.post(
+        f"{settings.API_V1_STR}/days/", json={"title": "Optimized", "day_plan": plan}
+    )
+    assert response.status_code == 200
+    assert response.json()["total_calories"] == 752.0
+
+
+def test_optimize_day_constraints(client: TestClient, db: Session) -> None:
+    create_random_ingredient(db, is_halal=False, sodium_per_100g=0.0)
+    response = client.post(
+        f"{settings.API_V1_STR}/days/optimize",
+        json={"halal_only": True, "max_sodium": 100, "meal_ids": []},
+    )
+    assert response.status_code == 200
+    plan = response.json()["day_plan"]
+    assert plan["total_nutrition"]["sodium"] <= 100
+    ids = [
+        uuid.UUID(item["ingredient_id"])
+        for slot in plan["day_meals"]
+        for item in slot["items"]
+    ]
+    assert ids
+    ingredients = db.exec(select(Ingredient).where(col(Ingredient.id).in_(ids)))
+    assert all(ingredient.is_halal for ingredient in ingredients)
+
+
+def test_optimizer_rounding_keeps_max_sodium() -> None:
+    nutrients = np.zeros((len(NUTRIENTS), 3))
+    nutrients[SODIUM] = [600.0, 400.0, 1000.0]
+    candidates = Candidates(
+        nutrients=nutrients,
+        is_meal=np.array([True, True, False]),
+        is_traditional=np.zeros(3, dtype=np.bool_),
+        ids=[uuid.uuid4() for _ in range(3)],
+    )
+    # 738 mg of sodium, 1150 mg once rounded to 1 and 1 serving and 15 g
+    amounts = np.array([0.6, 0.6, 0.138])
+    np.testing.assert_allclose(round_amounts(candidates, amounts), [1.0, 1.0, 0.15])
+
+    rounded = round_amounts(candidates, amounts, max_sodium=800.0)
+    np.testing.assert_allclose(rounded, [0.0, 1.0, 0.15])
+    assert nutrients[SODIUM] @ rounded <= 800.0
+
+
+def test_optimize_day_without_candidates(client: TestClient) -> None:
+    response = client.post(
+        f"{settings.API_V1_STR}/days/optimize",
+        json={"meal_ids": [], "use_ingredients": False},
+    )
+    assert response.status_code == 422
+    assert response.json()["detail"] == "No meals or ingredients to plan the day from"
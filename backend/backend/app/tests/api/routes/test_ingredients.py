@@ -0,0 +1,200 @@
+import uuid
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.db import engine
+from app.nutrition.catalog import catalog
+from app.tests.utils.nutrition import create_random_ingredient
+from app.tests.utils.utils import random_lower_string, require_extensions
+
+
+def test_search_ingredients_matches_any_language(
+    client: TestClient, db: Session
+) -> None:
+    require_extensions(db, "unaccent")
+    name = random_lower_string()
+    ingredient = create_random_ingredient(db, name_fr=f"{name} Crème")
+    response = client.get(
+        f"{settings.API_V1_STR}/ingredients/", params={"search": f"{name} CREME"}
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert [item["id"] for item in content["data"]] == [str(ingredient.id)]
+    assert content["count"] == 1
+
+
+def test_search_ingredients_matches_tags(client: TestClient, db: Session) -> None:
+    tag = random_lower_string()
+    ingredient = create_random_ingredient(db, tags=[tag, "moroccan"])
+    response = client.get(f"{settings.API_V1_STR}/ingredients/", params={"search": tag})
+    assert response.status_code == 200
+    content = response.json()
+    assert [item["id"] for item in content["data"]] == [str(ingredient.id)]
+
+
+def test_search_ingredients_escapes_wildcards(client: TestClient, db: Session) -> None:
+    name = random_lower_string()
+    ingredient = create_random_ingredient(db, name_en=f"{name} 100%_pure")
+    create_random_ingredient(db, name_en=f"{name} 100 pure")
+    for search in (f"{name} 100%_pure", f"{name} 100%"):
+        response = client.get(
+            f"{settings.API_V1_STR}/ingredients/", params={"search": search}
+        )
+        assert response.status_code == 200
+        assert [item["id"] for item in response.json()["data"]] == [str(ingredient.id)]
+
+
+def test_ranked_search_tolerates_typos(client: TestClient, db: Session) -> None:
+    require_extensions(db, "pg_trgm", "unaccent")
+    name = random_lower_string()
+    ingredient = create_random_ingredient(db, name_en=f"{name} Couscous")
+    response = client.get(
+        f"{settings.API_V1_STR}/ingredients/",
+        params={"search": f"{name[:-2]}{name[-1]} couscous", "ranked": True},
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert content["data"][0]["id"] == str(ingredient.id)
+    response = client.get(
+        f"{settings.API_V1_STR}/ingredients/",
+        params={"search": name, "ranked": True, "cursor": "abc"},
+    )
+    assert response.status_code == 400
+
+
+def test_catalog_reflects_ingredient_writes(client: TestClient, db: Session) -> None:
+    ingredient = create_random_ingredient(db)
+    response = client.put(
+        f"{settings.API_V1_STR}/ingredients/{ingredient.id}",
+        json={"calories_per_100g": 100},
+    )
+    assert response.status_code == 200
+    response = client.get(f"{settings.API_V1_STR}/ingredients/{ingredient.id}")
+    assert response.json()["calories_per_100g"] == 100
+    response = client.get(f"{settings.API_V1_STR}/ingredients/")
+    count = response.json()["count"]
+
+    response = client.delete(f"{settings.API_V1_STR}/ingredients/{ingredient.id}")
+    assert response.status_code == 200
+    response = client.get(f"{settings.API_V1_STR}/ingredients/")
+    assert response.json()["count"] == count - 1
+    response = client.get(f"{settings.API_V1_STR}/ingredients/{ingredient.id}")
+    assert response.status_code == 404
+
+
+def test_get_ingredients_cursor_pagination(client: TestClient) -> None:
+    response = client.get(f"{settings.API_V1_STR}/ingredients/", params={"limit": 1})
+    assert response.status_code == 200
+    first = response.json()
+    assert len(first["data"]) == 1
+
+    response = client.get(
+        f"{settings.API_V1_STR}/ingredients/",
+        params={"limit": first["count"], "cursor": first["next_cursor"]},
+    )
+    rest = response.json()
+    assert rest["next_cursor"] is None
+    ids = [item["id"] for item in first["data"] + rest["data"]]
+    assert len(ids) == len(set(ids)) == first["count"]
+
+
+def test_get_ingredients_sparse_fields(client: TestClient, db: Session) -> None:
+    ingredient = create_random_ingredient(db)
+    response = client.put(
+        f"{settings.API_V1_STR}/ingredients/{ingredient.id}", json={"is_halal": True}
+    )
+    assert response.status_code == 200
+
+    response = client.get(
+        f"{settings.API_V1_STR}/ingredients/",
+        params={"category_id": str(ingredient.category_id), "fields": "name_en,id"},
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert content["data"] == [
+        {"id": str(ingredient.id), "name_en": ingredient.name_en}
+    ]
+    assert content["count"] == 1
+
+
+def test_catalog_conditional_get(client: TestClient, db: Session) -> None:
+    ingredient = create_random_ingredient(db)
+    url = f"{settings.API_V1_STR}/ingredients/{ingredient.id}"
+    response = client.get(url)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"].startswith("public")
+
+    # Answered from the catalog version alone, without loading the catalog
+    catalog.invalidate()
+    statements: list[str] = []
+
+    def record(_conn, _cursor, statement, *_args) -> None:  # type: ignore[no-untyped-def]
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        response = client.get(url, headers={"If-None-Match": etag})
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+    assert not any("FROM ingredients" in statement for statement in statements)
+
+    response = client.get(
+        f"{settings.API_V1_STR}/ingredients/categories",
+        headers={"If-None-Match": f'"other", W/{etag}'},
+    )
+    assert response.status_code == 304
+
+    response = client.put(url, json={"calories_per_100g": 100})
+    assert response.status_code == 200
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["calories_per_100g"] == 100
+    assert response.headers["etag"] != etag
+
+
+def test_get_similar_ingredients(client: TestClient, db: Session) -> None:
+    ingredient = create_random_ingredient(db, is_halal=True)
+    category_id = ingredient.category_id
+    near = create_random_ingredient(
+        db, category_id=category_id, calories_per_100g=370.0, is_halal=True
+    )
+    far = create_random_ingredient(
+        db,
+        category_id=category_id,
+        calories_per_100g=20.0,
+        protein_per_100g=1.0,
+        carbohydrates_per_100g=3.0,
+        is_halal=True,
+    )
+    not_halal = create_random_ingredient(
+        db, category_id=category_id, calories_per_100g=375.0, is_halal=False
+    )
+    url = f"{settings.API_V1_STR}/ingredients/{ingredient.id}/similar"
+
+    response = client.get(url, params={"k": 3, "same_category": True})
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert [item["id"] for item in data] == [
+        str(not_halal.id),
+        str(near.id),
+        str(far.id),
+    ]
+    assert data[0]["distance"] <= data[1]["distance"] < data[2]["distance"]
+
+    response = client.get(url, params={"k": 1, "same_category": True, "is_halal": True})
+    assert [item["id"] for item in response.json()["data"]] == [str(near.id)]
+
+    response = client.get(url, params={"k": 5})
+    data = response.json()["data"]
+    assert len(data) == 5
+    assert str(ingredient.id) not in [item["id"] for item in data]
+
+    response = client.get(f"{settings.API_V1_STR}/ingredients/{uuid.uuid4()}/similar")
+    assert response.status_code == 404
@@ -1,12 +1,19 @@
+import secrets
+import threading
+from datetime import datetime, timedelta, timezone
 from unittest.mock import patch
 
+import bcrypt
 from fastapi.testclient import TestClient
-from sqlmodel import Session
+from httpx import Response
+from sqlmodel import Session, col, delete, select
 
 from app.core.config import settings
-from app.core.security import verify_password
-from app.crud import create_user
-from app.models.models import UserCreate
+from app.core.security import pwd_context, verify_password
+from app.crud.crud import create_user
+from app.crud.refresh_token import delete_stale_refresh_tokens
+from app.models.models import RefreshToken
+from app.schemas.users import UserCreate
 from app.tests.utils.user import user_authentication_headers
 from app.tests.utils.utils import random_email, random_lower_string
 from app.utils import generate_password_reset_token
@@ -116,3 +123,89 @@ def test_reset_password_invalid_token(
     assert "detail" in response
     assert r.status_code == 400
     assert response["detail"] == "Invalid token"
+
+
+def test_login_rehashes_outdated_password(client: TestClient, db: Session) -> None:
+    email = random_email()
+    password = random_lower_string()
+    weak_hash = bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=4)).decode()
+    user_create = UserCreate(email=email, password=password)
+    user = create_user(session=db, user_create=user_create, hashed_password=weak_hash)
+
+    login_data = {"username": email, "password": password}
+    r = client.post(f"{settings.API_V1_STR}/login/access-token", data=login_data)
+    assert r.status_code == 200
+
+    db.refresh(user)
+    assert user.hashed_password != weak_hash
+    assert pwd_context.identify(user.hashed_password) == "bcrypt"
+    assert not pwd_context.needs_update(user.hashed_password)
+    assert verify_password(password, user.hashed_password)
+
+
+def test_login_sheds_load_when_hashing_is_saturated(client: TestClient) -> None:
+    login_data = {
+        "username": settings.FIRST_SUPERUSER,
+        "password": settings.FIRST_SUPERUSER_PASSWORD,
+    }
+    with patch("app.core.security._hash_slots", threading.BoundedSemaphore(1)) as slots:
+        slots.acquire()
+        r = client.post(f"{settings.API_V1_STR}/login/access-token", data=login_data)
+    assert r.status_code == 429
+    assert r.headers["retry-after"] == "1"
+
+
+def _refresh(client: TestClient, refresh_token: str) -> Response:
+    client.cookies.set("refresh_token", refresh_token)
+    try:
+        response: Response = client.post(f"{settings.API_V1_STR}/login/refresh-token")
+        return response
+    finally:
+        client.cookies.clear()
+
+
+def test_refresh_token_rotation(client: TestClient) -> None:
+    login_data = {
+        "username": settings.FIRST_SUPERUSER,
+        "password": settings.FIRST_SUPERUSER_PASSWORD,
+    }
+    r = client.post(f"{settings.API_V1_STR}/login/access-token", data=login_data)
+    refresh_token = r.cookies["refresh_token"]
+    client.cookies.clear()
+
+    r = _refresh(client, refresh_token)
+    assert r.status_code == 200
+    assert r.json()["access_token"]
+    assert r.cookies["refresh_token"] != refresh_token
+
+    # A rotated token can't be used again
+    r = _refresh(client, refresh_token)
+    assert r.status_code == 401
+
+
+def test_delete_stale_refresh_tokens(db: Session) -> None:
+    user = create_user(
+        session=db,
+        user_create=UserCreate(email=random_email(), password=random_lower_string()),
+    )
+    now = datetime.now(timezone.utc)
+    active, used, expired = (secrets.token_urlsafe() for _ in range(3))
+    db.add_all(
+        [
+            RefreshToken(user_id=user.id, token=active),
+            RefreshToken(user_id=user.id, token=used, is_active=False),
+            RefreshToken(
+                user_id=user.id, token=expired, expires_at=now - timedelta(days=1)
+            ),
+        ]
+    )
+    db.commit()
+
+    assert delete_stale_refresh_tokens(db, batch_size=1) >= 2
+    tokens = db.exec(
+        select(RefreshToken.token).where(RefreshToken.user_id == user.id)
+    ).all()
+    assert tokens == [active]
+    # The session fixture deletes users, which their tokens would block
+    db.execute(delete(RefreshToken).where(col(RefreshToken.user_id) == user.id))
+    db.commit()
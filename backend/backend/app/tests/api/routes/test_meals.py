@@ -0,0 +1,539 @@
+import csv
+import json
+import uuid
+from collections.abc import Callable
+from contextlib import AbstractContextManager
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.query_stats import QueryStats
+from app.models.nutrition import Meal
+from app.nutrition import meal_similarity
+from app.tests.utils.nutrition import create_random_ingredient
+from app.tests.utils.utils import random_lower_string
+
+
+def test_compute_meal_nutrition(client: TestClient, db: Session) -> None:
+    ingredient = create_random_ingredient(db)
+    data = {
+        "ingredients": [
+            {"ingredient_id": str(ingredient.id), "quantity": 1, "unit": "cup"},
+            {"ingredient_id": str(ingredient.id), "quantity": 50, "unit": "g"},
+        ]
+    }
+    response = client.post(f"{settings.API_V1_STR}/meals/compute", json=data)
+    assert response.status_code == 200
+    content = response.json()
+    assert content["ingredients"][0]["calories"] == 658.0
+    assert content["ingredients"][1]["calories"] == 188.0
+    assert content["total_calories"] == 846.0
+    assert content["total_protein"] == 28.8
+
+
+def test_compute_meal_nutrition_missing_ingredient(client: TestClient) -> None:
+    data = {
+        "ingredients": [
+            {"ingredient_id": str(uuid.uuid4()), "quantity": 1, "unit": "g"},
+        ]
+    }
+    response = client.post(f"{settings.API_V1_STR}/meals/compute", json=data)
+    assert response.status_code == 404
+
+
+def test_create_meal_computes_nutrition(client: TestClient, db: Session) -> None:
+    ingredient = create_random_ingredient(db)
+    data = {
+        "name": "Couscous",
+        "total_calories": 1.0,
+        "ingredients": [
+            {
+                "ingredient_id": str(ingredient.id),
+                "quantity": 200,
+                "unit": "g",
+                "calories": 1.0,
+            }
+        ],
+    }
+    response = client.post(f"{settings.API_V1_STR}/meals/", json=data)
+    assert response.status_code == 200
+    content = response.json()
+    assert content["total_calories"] == 752.0
+    assert content["meal_ingredients"][0]["calories"] == 752.0
+
+
+def test_update_meal_ignores_client_totals(client: TestClient, db: Session) -> None:
+    ingredient = create_random_ingredient(db)
+    data = {
+        "name": "Couscous",
+        "ingredients": [
+            {"ingredient_id": str(ingredient.id), "quantity": 100, "unit": "g"}
+        ],
+    }
+    response = client.post(f"{settings.API_V1_STR}/meals/", json=data)
+    meal_id = response.json()["id"]
+
+    response = client.put(
+        f"{settings.API_V1_STR}/meals/{meal_id}",
+        json={"name": "Seffa", "total_calories": 1.0},
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert content["name"] == "Seffa"
+    assert content["total_calories"] == 376.0
+
+
+def test_create_meal_reports_all_missing_ingredients(
+    client: TestClient, db: Session
+) -> None:
+    ingredient = create_random_ingredient(db)
+    missing_ids = [str(uuid.uuid4()), str(uuid.uuid4())]
+    data = {
+        "name": "Harira",
+        "ingredients": [
+            {"ingredient_id": str(ingredient.id), "quantity": 100, "unit": "g"},
+            {"ingredient_id": missing_ids[0], "quantity": 100, "unit": "g"},
+            {"ingredient_id": missing_ids[1], "quantity": 100, "unit": "g"},
+        ],
+    }
+    response = client.post(f"{settings.API_V1_STR}/meals/", json=data)
+    assert response.status_code == 404
+    detail = response.json()["detail"]
+    assert all(missing_id in detail for missing_id in missing_ids)
+    assert str(ingredient.id) not in detail
+
+
+def test_meal_units_resolve_aliases(client: TestClient, db: Session) -> None:
+    ingredient = create_random_ingredient(
+        db, unit_conversions={"Cup": 175.0, "c.à.s": 12.0}
+    )
+    data = {
+        "ingredients": [
+            {"ingredient_id": str(ingredient.id), "quantity": 1, "unit": "tasse"},
+            {"ingredient_id": str(ingredient.id), "quantity": 1, "unit": "tbsp"},
+            {"ingredient_id": str(ingredient.id), "quantity": 50, "unit": "grams"},
+            {"ingredient_id": str(ingredient.id), "quantity": 0.1, "unit": "kg"},
+        ]
+    }
+    response = client.post(f"{settings.API_V1_STR}/meals/compute", json=data)
+    assert response.status_code == 200
+    content = response.json()
+    assert [line["calories"] for line in content["ingredients"]] == [
+        658.0,
+        45.12,
+        188.0,
+        376.0,
+    ]
+
+
+def test_create_meal_rejects_unconvertible_units(
+    client: TestClient, db: Session
+) -> None:
+    ingredient = create_random_ingredient(db)
+    data = {
+        "name": random_lower_string(),
+        "ingredients": [
+            {"ingredient_id": str(ingredient.id), "quantity": 1, "unit": "cup"},
+            {"ingredient_id": str(ingredient.id), "quantity": 2, "unit": "piece"},
+            {"ingredient_id": str(ingredient.id), "quantity": 1, "unit": "ml"},
+        ],
+    }
+    response = client.post(f"{settings.API_V1_STR}/meals/", json=data)
+    assert response.status_code == 422
+    assert response.json()["detail"] == (
+        "Units without a conversion to grams: "
+        f"{ingredient.id} (piece), {ingredient.id} (ml)"
+    )
+    response = client.get(
+        f"{settings.API_V1_STR}/meals/", params={"search": data["name"]}
+    )
+    assert response.json()["data"] == []
+
+
+def test_update_meal_replaces_ingredients(client: TestClient, db: Session) -> None:
+    first = create_random_ingredient(db)
+    second = create_random_ingredient(db, calories_per_100g=100.0)
+    data = {
+        "name": "Tagine",
+        "ingredients": [{"ingredient_id": str(first.id), "quantity": 100, "unit": "g"}],
+    }
+    response = client.post(f"{settings.API_V1_STR}/meals/", json=data)
+    meal_id = response.json()["id"]
+
+    data = {
+        "ingredients": [{"ingredient_id": str(second.id), "quantity": 250, "unit": "g"}]
+    }
+    response = client.put(f"{settings.API_V1_STR}/meals/{meal_id}", json=data)
+    assert response.status_code == 200
+    content = response.json()
+    assert content["total_calories"] == 250.0
+    assert len(content["meal_ingredients"]) == 1
+    meal_ingredient = content["meal_ingredients"][0]
+    assert meal_ingredient["ingredient"]["id"] == str(second.id)
+
+
+def test_patch_meal_ingredients(client: TestClient, db: Session) -> None:
+    first = create_random_ingredient(db)
+    second = create_random_ingredient(db, calories_per_100g=100.0)
+    third = create_random_ingredient(db, calories_per_100g=50.0)
+    data = {
+        "name": "Rfissa",
+        "ingredients": [
+            {"ingredient_id": str(first.id), "quantity": 100, "unit": "g"},
+            {"ingredient_id": str(second.id), "quantity": 100, "unit": "g"},
+        ],
+    }
+    response = client.post(f"{settings.API_V1_STR}/meals/", json=data)
+    meal_id = response.json()["id"]
+
+    data = {
+        "add": [{"ingredient_id": str(third.id), "quantity": 200, "unit": "g"}],
+        "change": [{"ingredient_id": str(second.id), "quantity": 300, "unit": "g"}],
+        "remove": [{"ingredient_id": str(first.id), "unit": "g"}],
+    }
+    response = client.patch(
+        f"{settings.API_V1_STR}/meals/{meal_id}/ingredients", json=data
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert content["total_calories"] == 400.0
+    quantities = {
+        meal_ingredient["ingredient_id"]: meal_ingredient["quantity"]
+        for meal_ingredient in content["meal_ingredients"]
+    }
+    assert quantities == {str(second.id): 300.0, str(third.id): 200.0}
+
+
+def test_patch_meal_ingredients_unknown_key(client: TestClient, db: Session) -> None:
+    ingredient = create_random_ingredient(db)
+    data = {
+        "name": "Bissara",
+        "ingredients": [
+            {"ingredient_id": str(ingredient.id), "quantity": 100, "unit": "g"}
+        ],
+    }
+    response = client.post(f"{settings.API_V1_STR}/meals/", json=data)
+    meal_id = response.json()["id"]
+
+    data = {"remove": [{"ingredient_id": str(ingredient.id), "unit": "cup"}]}
+    response = client.patch(
+        f"{settings.API_V1_STR}/meals/{meal_id}/ingredients", json=data
+    )
+    assert response.status_code == 404
+
+
+def test_get_meals_cursor_pagination(client: TestClient) -> None:
+    name = random_lower_string()
+    for i in range(3):
+        response = client.post(
+            f"{settings.API_V1_STR}/meals/", json={"name": f"{name} {i}"}
+        )
+        assert response.status_code == 200
+
+    params: dict[str, str | int | bool] = {
+        "search": name,
+        "limit": 2,
+        "include_count": False,
+    }
+    response = client.get(f"{settings.API_V1_STR}/meals/", params=params)
+    assert response.status_code == 200
+    first = response.json()
+    assert first["count"] is None
+    assert [meal["name"] for meal in first["data"]] == [f"{name} 2", f"{name} 1"]
+
+    params["cursor"] = first["next_cursor"]
+    response = client.get(f"{settings.API_V1_STR}/meals/", params=params)
+    second = response.json()
+    assert [meal["name"] for meal in second["data"]] == [f"{name} 0"]
+    assert second["next_cursor"] is None
+
+
+def test_get_meals_invalid_cursor(client: TestClient) -> None:
+    response = client.get(f"{settings.API_V1_STR}/meals/", params={"cursor": "nope"})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+def test_get_meals_sparse_fields(client: TestClient, db: Session) -> None:
+    ingredient = create_random_ingredient(db)
+    name = random_lower_string()
+    data = {
+        "name": name,
+        "ingredients": [
+            {"ingredient_id": str(ingredient.id), "quantity": 100, "unit": "g"}
+        ],
+    }
+    response = client.post(f"{settings.API_V1_STR}/meals/", json=data)
+    assert response.status_code == 200
+
+    response = client.get(f"{settings.API_V1_STR}/meals/", params={"search": name})
+    meal = response.json()["data"][0]
+    assert meal["meal_ingredients"][0]["ingredient"]["id"] == str(ingredient.id)
+
+    params = {
+        "search": name,
+        "fields": "name,meal_ingredients.ingredient_id,meal_ingredients.quantity",
+    }
+    response = client.get(f"{settings.API_V1_STR}/meals/", params=params)
+    assert response.status_code == 200
+    content = response.json()
+    assert content["count"] == 1
+    assert content["data"] == [
+        {
+            "name": name,
+            "meal_ingredients": [
+                {"ingredient_id": str(ingredient.id), "quantity": 100.0}
+            ],
+        }
+    ]
+
+    params["fields"] = "id,total_calories"
+    response = client.get(f"{settings.API_V1_STR}/meals/", params=params)
+    assert set(response.json()["data"][0]) == {"id", "total_calories"}
+
+
+def test_get_meals_unknown_field(client: TestClient) -> None:
+    for fields in ("id,nope", "name.first"):
+        response = client.get(
+            f"{settings.API_V1_STR}/meals/", params={"fields": fields}
+        )
+        assert response.status_code == 400
+
+
+def test_meal_queries_do_not_grow_with_ingredients(
+    client: TestClient,
+    db: Session,
+    max_queries: Callable[[int], AbstractContextManager[QueryStats]],
+) -> None:
+    ingredients = [create_random_ingredient(db) for _ in range(5)]
+    data = {
+        "name": random_lower_string(),
+        "ingredients": [
+            {"ingredient_id": str(ingredient.id), "quantity": 50, "unit": "g"}
+            for ingredient in ingredients
+        ],
+    }
+    # Loads the new ingredients into the catalog
+    client.post(f"{settings.API_V1_STR}/meals/", json=data)
+
+    # The duplicate check, and one INSERT per table
+    with max_queries(3):
+        response = client.post(f"{settings.API_V1_STR}/meals/", json=data)
+    assert response.status_code == 200
+
+    # Count, page and one selectin load of every meal's ingredients
+    with max_queries(3):
+        response = client.get(f"{settings.API_V1_STR}/meals/", params={"limit": 100})
+    assert response.status_code == 200
+
+
+def test_export_meals(client: TestClient, db: Session) -> None:
+    since = datetime.now(timezone.utc).isoformat()
+    ingredient = create_random_ingredient(db)
+    data = {
+        "name": random_lower_string(),
+        "ingredients": [
+            {"ingredient_id": str(ingredient.id), "quantity": 100, "unit": "g"}
+        ],
+    }
+    response = client.post(f"{settings.API_V1_STR}/meals/", json=data)
+    meal_id = response.json()["id"]
+
+    response = client.get(
+        f"{settings.API_V1_STR}/meals/export", params={"updated_since": since}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-encoding"] == "gzip"
+    meals = [json.loads(line) for line in response.text.splitlines()]
+    assert [meal["id"] for meal in meals] == [meal_id]
+    assert meals[0]["ingredients"][0]["calories"] == 376.0
+
+    response = client.get(
+        f"{settings.API_V1_STR}/meals/export",
+        params={"updated_since": since, "format": "csv"},
+        headers={"Accept-Encoding": "identity"},
+    )
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+    rows = list(csv.DictReader(response.text.splitlines()))
+    assert [row["name"] for row in rows] == [data["name"]]
+    assert json.loads(rows[0]["ingredients"])[0]["ingredient_id"] == str(ingredient.id)
+
+    response = client.get(
+        f"{settings.API_V1_STR}/meals/export",
+        params={"updated_since": since},
+        headers={"Accept-Encoding": "gzip;q=0"},
+    )
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+    assert json.loads(response.text)["id"] == meal_id
+
+
+def test_import_meals_reports_invalid_records(client: TestClient, db: Session) -> None:
+    ingredient = create_random_ingredient(db)
+    name = random_lower_string()
+    lines = [
+        {
+            "name": name,
+            "total_calories": 1.0,
+            "ingredients": [
+                {"ingredient": {"id": str(ingredient.id)}, "quantity": 50, "unit": "g"}
+            ],
+        },
+        {"description": "no name"},
+        {
+            "name": random_lower_string(),
+            "ingredients": [
+                {"ingredient_id": str(uuid.uuid4()), "quantity": 1, "unit": "g"}
+            ],
+        },
+        {
+            "name": random_lower_string(),
+            "ingredients": [
+                {"ingredient_id": str(ingredient.id), "quantity": 1, "unit": "bowl"}
+            ],
+        },
+    ]
+    body = "\n".join(json.dumps(line) for line in lines) + "\n{not json\n"
+    response = client.post(
+        f"{settings.API_V1_STR}/meals/import",
+        content=body,
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert content["created"] == 1
+    assert content["updated"] == 0
+    assert [error["index"] for error in content["errors"]] == [1, 2, 3, 4]
+    assert content["errors"][0]["errors"] == ["name: Field required"]
+    assert content["errors"][1]["errors"][0].startswith("Ingredients not found")
+    assert content["errors"][2]["errors"] == [
+        f"Units without a conversion to grams: {ingredient.id} (bowl)"
+    ]
+
+    response = client.get(f"{settings.API_V1_STR}/meals/", params={"search": name})
+    meals = response.json()["data"]
+    assert len(meals) == 1
+    assert meals[0]["total_calories"] == 188.0
+
+
+def test_import_meals_upsert_by_name(client: TestClient, db: Session) -> None:
+    ingredient = create_random_ingredient(db)
+    name = random_lower_string()
+    response = client.post(f"{settings.API_V1_STR}/meals/", json={"name": name})
+    meal_id = response.json()["id"]
+
+    data = {
+        "meals": [
+            {
+                "name": name,
+                "ingredients": [
+                    {"ingredient_id": str(ingredient.id), "quantity": 100, "unit": "g"}
+                ],
+            }
+        ]
+    }
+    response = client.post(
+        f"{settings.API_V1_STR}/meals/import", params={"upsert": True}, json=data
+    )
+    assert response.status_code == 200
+    assert response.json() == {"created": 0, "updated": 1, "errors": []}
+
+    response = client.get(f"{settings.API_V1_STR}/meals/{meal_id}")
+    content = response.json()
+    assert content["total_calories"] == 376.0
+    assert len(content["meal_ingredients"]) == 1
+
+
+def test_import_meals_rejects_non_list(client: TestClient) -> None:
+    response = client.post(f"{settings.API_V1_STR}/meals/import", json={"name": "x"})
+    assert response.status_code == 400
+
+
+def test_meal_similarity_and_duplicates(client: TestClient, db: Session) -> None:
+    ingredients = [create_random_ingredient(db) for _ in range(5)]
+
+    def create(grams: list[float]) -> dict:  # type: ignore[type-arg]
+        data = {
+            "name": random_lower_string(),
+            "ingredients": [
+                {"ingredient_id": str(ingredient.id), "quantity": g, "unit": "g"}
+                for ingredient, g in zip(ingredients, grams, strict=True)
+                if g
+            ],
+        }
+        response = client.post(f"{settings.API_V1_STR}/meals/", json=data)
+        assert response.status_code == 200
+        return response.json()  # type: ignore[no-any-return]
+
+    original = create([100, 200, 50, 10, 0])
+    assert original["possible_duplicates"] == []
+    copy = create([100, 200, 50, 10, 0])
+    assert copy["possible_duplicates"] == [
+        {"id": original["id"], "name": original["name"], "similarity": 1.0}
+    ]
+    # Same ingredients, 20 g more rice: 360 g shared over 380 g
+    variant = create([120, 200, 50, 10, 0])
+    assert {meal["id"] for meal in variant["possible_duplicates"]} == {
+        original["id"],
+        copy["id"],
+    }
+    other = create([100, 0, 0, 0, 300])
+    assert other["possible_duplicates"] == []
+
+    response = client.get(
+        f"{settings.API_V1_STR}/meals/{original['id']}/similar", params={"k": 2}
+    )
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert [(meal["id"], meal["similarity"]) for meal in data] == [
+        (copy["id"], 1.0),
+        (variant["id"], round(360 / 380, 4)),
+    ]
+
+    response = client.get(f"{settings.API_V1_STR}/meals/duplicates")
+    assert response.status_code == 200
+    groups = {group["id"]: group for group in response.json()["data"]}
+    assert [meal["id"] for meal in groups[original["id"]]["duplicates"]] == [
+        copy["id"],
+        variant["id"],
+    ]
+    assert other["id"] not in groups
+
+    response = client.get(f"{settings.API_V1_STR}/meals/{uuid.uuid4()}/similar")
+    assert response.status_code == 404
+
+
+def test_similar_meals_rank_candidates_by_shared_bands(
+    client: TestClient, db: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    ingredients = [create_random_ingredient(db) for _ in range(3)]
+    data = {
+        "name": random_lower_string(),
+        "ingredients": [
+            {"ingredient_id": str(ingredient.id), "quantity": 100, "unit": "g"}
+            for ingredient in ingredients
+        ],
+    }
+    bands = meal_similarity.fingerprint(ingredient.id for ingredient in ingredients)
+    # Meals sharing a single band with it, more than fit among the candidates
+    for _ in range(5):
+        decoy = client.post(
+            f"{settings.API_V1_STR}/meals/", json={"name": random_lower_string()}
+        ).json()
+        db.execute(
+            update(Meal)
+            .where(Meal.id == uuid.UUID(decoy["id"]))  # type: ignore[arg-type]
+            .values(fingerprint=bands[:1])
+        )
+    db.commit()
+    original = client.post(f"{settings.API_V1_STR}/meals/", json=data).json()
+
+    monkeypatch.setattr(meal_similarity, "MAX_CANDIDATES", 1)
+    copy = client.post(f"{settings.API_V1_STR}/meals/", json=data).json()
+    assert [meal["id"] for meal in copy["possible_duplicates"]] == [original["id"]]
@@ -0,0 +1,112 @@
+import asyncio
+import json
+from collections.abc import Generator
+from datetime import datetime, timezone
+from typing import Any
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.api.routes import meals_async
+from app.nutrition import meal_import, meal_similarity
+from app.tests.utils.nutrition import create_random_ingredient
+
+
+@pytest.fixture(scope="module")
+def async_client() -> Generator[TestClient, None, None]:
+    # The async router is only mounted when ASYNC_DATABASE is set
+    app = FastAPI()
+    app.include_router(meals_async.router)
+    with TestClient(app) as c:
+        yield c
+
+
+def test_async_create_and_get_meal(async_client: TestClient, db: Session) -> None:
+    ingredient = create_random_ingredient(db)
+    data = {
+        "name": "Couscous",
+        "ingredients": [
+            {"ingredient_id": str(ingredient.id), "quantity": 200, "unit": "g"}
+        ],
+    }
+    response = async_client.post("/meals/", json=data)
+    assert response.status_code == 200
+    meal = response.json()
+    assert meal["total_calories"] == 752.0
+
+    response = async_client.patch(
+        f"/meals/{meal['id']}/favorite", params={"is_favorite": True}
+    )
+    assert response.status_code == 200
+    assert response.json()["is_favorite"] is True
+
+    response = async_client.get(f"/meals/{meal['id']}")
+    assert response.status_code == 200
+    content = response.json()
+    assert content["meal_ingredients"][0]["ingredient"]["id"] == str(ingredient.id)
+
+    response = async_client.get(f"/meals/{ingredient.id}")
+    assert response.status_code == 404
+
+
+def test_async_export_meals(async_client: TestClient, db: Session) -> None:
+    since = datetime.now(timezone.utc).isoformat()
+    ingredient = create_random_ingredient(db)
+    data = {
+        "name": "Harira",
+        "ingredients": [
+            {"ingredient_id": str(ingredient.id), "quantity": 100, "unit": "g"}
+        ],
+    }
+    meal = async_client.post("/meals/", json=data).json()
+
+    response = async_client.get("/meals/export", params={"updated_since": since})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [record["id"] for record in records] == [meal["id"]]
+    assert records[0]["ingredients"][0]["ingredient_id"] == str(ingredient.id)
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def test_async_cpu_bound_routes_leave_the_event_loop(
+    async_client: TestClient, db: Session, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    on_loop = []
+    for module, name in (
+        (meal_import, "import_meals"),
+        (meal_similarity, "duplicate_groups"),
+    ):
+        original = getattr(module, name)
+
+        def record(*args: Any, original: Any = original, **kwargs: Any) -> Any:
+            on_loop.append(_on_event_loop())
+            return original(*args, **kwargs)
+
+        monkeypatch.setattr(module, name, record)
+
+    ingredient = create_random_ingredient(db)
+    data = [
+        {
+            "name": "Rfissa",
+            "ingredients": [
+                {"ingredient_id": str(ingredient.id), "quantity": 150, "unit": "g"}
+            ],
+        }
+    ]
+    response = async_client.post("/meals/import", json=data)
+    assert response.status_code == 200
+    assert response.json()["created"] == 1
+
+    response = async_client.get("/meals/duplicates")
+    assert response.status_code == 200
+    assert on_loop == [False, False]
@@ -0,0 +1,382 @@
+import random
+import threading
+import uuid
+from collections.abc import Generator
+from datetime import date, timedelta
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, col, delete
+
+from app.core.config import settings
+from app.core.db import engine
+from app.models.nutrition import NutritionDailyRollup, SavedDay
+from app.nutrition.catalog import catalog
+from app.nutrition.recompute import recompute_meals, run_recompute_jobs
+from app.nutrition.rollup import rebuild_rollups
+from app.tests.utils.nutrition import create_random_ingredient
+
+
+def _clear(db: Session, start: date, end: date) -> None:
+    """Delete the saved days planned from start to end, and their rollups."""
+    plan_date = col(SavedDay.day_plan)["date"].as_string()
+    db.execute(
+        delete(SavedDay).where(plan_date.between(start.isoformat(), end.isoformat()))
+    )
+    db.execute(
+        delete(NutritionDailyRollup).where(
+            col(NutritionDailyRollup.day).between(start, end)
+        )
+    )
+    db.commit()
+
+
+@pytest.fixture
+def monday(db: Session) -> Generator[date, None, None]:
+    """A Monday with nothing planned in the next weeks but the test's days."""
+    day = date(random.randint(2200, 2900), 3, 10)
+    day -= timedelta(days=day.weekday())
+    _clear(db, day, day + timedelta(days=62))
+    yield day
+    _clear(db, day, day + timedelta(days=62))
+
+
+def _day(ingredient_id: Any, grams: float, day: date) -> dict[str, Any]:
+    return {
+        "title": "Stats",
+        "day_plan": {
+            "date": day.isoformat(),
+            "day_meals": [
+                {
+                    "items": [
+                        {
+                            "type": "ingredient",
+                            "ingredient_id": str(ingredient_id),
+                            "quantity": grams,
+                            "unit": "g",
+                        }
+                    ]
+                }
+            ],
+        },
+    }
+
+
+def _stats(
+    client: TestClient,
+    headers: dict[str, str],
+    start: date,
+    end: date,
+    granularity: str,
+) -> Any:
+    response = client.get(
+        f"{settings.API_V1_STR}/nutrition/stats",
+        headers=headers,
+        params={"from": start, "to": end, "granularity": granularity},
+    )
+    assert response.status_code == 200
+    return response.json()["data"]
+
+
+def test_stats_follow_saved_day_changes(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    db: Session,
+    monday: date,
+) -> None:
+    ingredient = create_random_ingredient(db)
+    wednesday = monday + timedelta(days=2)
+    month_later = monday + timedelta(days=31)
+    ids = []
+    for grams, day in ((100, monday), (200, monday), (50, wednesday)):
+        response = client.post(
+            f"{settings.API_V1_STR}/days/", json=_day(ingredient.id, grams, day)
+        )
+        assert response.status_code == 200
+        ids.append(response.json()["id"])
+
+    stats = _stats(client, superuser_token_headers, monday, month_later, "day")
+    assert [(s["start"], s["day_count"], s["total_calories"]) for s in stats] == [
+        (monday.isoformat(), 2, 1128.0),
+        (wednesday.isoformat(), 1, 188.0),
+    ]
+
+    # Moving a day to another date moves its totals
+    response = client.put(
+        f"{settings.API_V1_STR}/days/{ids[1]}",
+        json={"day_plan": _day(ingredient.id, 10, month_later)["day_plan"]},
+    )
+    assert response.status_code == 200
+    response = client.delete(f"{settings.API_V1_STR}/days/{ids[2]}")
+    assert response.status_code == 200
+
+    stats = _stats(client, superuser_token_headers, monday, month_later, "week")
+    assert [(s["start"], s["day_count"], s["total_calories"]) for s in stats] == [
+        (monday.isoformat(), 1, 376.0),
+        ((month_later - timedelta(days=month_later.weekday())).isoformat(), 1, 37.6),
+    ]
+    assert stats[0]["total_protein"] == 12.8
+    stats = _stats(client, superuser_token_headers, monday, month_later, "month")
+    assert [s["start"] for s in stats] == [
+        monday.replace(day=1).isoformat(),
+        month_later.replace(day=1).isoformat(),
+    ]
+
+
+def test_meal_edit_moves_stats(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    db: Session,
+    monday: date,
+) -> None:
+    ingredient = create_random_ingredient(db)
+    line = {"ingredient_id": str(ingredient.id), "quantity": 100, "unit": "g"}
+    response = client.post(
+        f"{settings.API_V1_STR}/meals/",
+        json={"name": "Stats", "servings": 1, "ingredients": [line]},
+    )
+    meal_id = response.json()["id"]
+    item = {"type": "meal", "meal_id": meal_id, "quantity": 1, "unit": "servings"}
+    for _ in range(2):
+        day = {
+            "title": "Stats",
+            "day_plan": {"date": monday.isoformat(), "day_meals": [{"items": [item]}]},
+        }
+        response = client.post(f"{settings.API_V1_STR}/days/", json=day)
+        assert response.status_code == 200
+    stats = _stats(client, superuser_token_headers, monday, monday, "day")
+    assert [(s["day_count"], s["total_calories"]) for s in stats] == [(2, 752.0)]
+
+    response = client.put(
+        f"{settings.API_V1_STR}/meals/{meal_id}",
+        json={"ingredients": [{**line, "quantity": 50}]},
+    )
+    assert response.status_code == 200
+    stats = _stats(client, superuser_token_headers, monday, monday, "day")
+    assert [(s["day_count"], s["total_calories"]) for s in stats] == [(2, 376.0)]
+
+
+def test_rebuild_rollups_matches_incremental(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    db: Session,
+    monday: date,
+) -> None:
+    ingredient = create_random_ingredient(db)
+    for grams in (100, 250):
+        response = client.post(
+            f"{settings.API_V1_STR}/days/", json=_day(ingredient.id, grams, monday)
+        )
+        assert response.status_code == 200
+    end = monday + timedelta(days=6)
+    before = _stats(client, superuser_token_headers, monday, end, "day")
+
+    assert rebuild_rollups(db, chunk_size=2) >= 2
+
+    assert _stats(client, superuser_token_headers, monday, end, "day") == before
+    assert before[0]["day_count"] == 2
+
+
+def test_stats_invalid_range(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/nutrition/stats",
+        headers=superuser_token_headers,
+        params={"from": "2026-10-18", "to": "2026-10-01"},
+    )
+    assert response.status_code == 400
+    response = client.get(
+        f"{settings.API_V1_STR}/nutrition/stats",
+        headers=superuser_token_headers,
+        params={"from": "2026-10-18", "to": "2026-10-19", "granularity": "year"},
+    )
+    assert response.status_code == 422
+
+
+def test_stats_require_superuser(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    params = {"from": "2026-10-18", "to": "2026-10-19"}
+    response = client.get(f"{settings.API_V1_STR}/nutrition/stats", params=params)
+    assert response.status_code == 401
+    response = client.get(
+        f"{settings.API_V1_STR}/nutrition/stats",
+        headers=normal_user_token_headers,
+        params=params,
+    )
+    assert response.status_code == 403
+
+
+def test_ingredient_edit_recomputes_meals(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    db: Session,
+    monday: date,
+) -> None:
+    ingredient = create_random_ingredient(db)
+    other = create_random_ingredient(db)
+    meal_ids = []
+    for grams in (100, 50, 10):
+        response = client.post(
+            f"{settings.API_V1_STR}/meals/",
+            json={
+                "name": "Recompute",
+                "ingredients": [
+                    {"ingredient_id": str(ingredient.id), "quantity": 1, "unit": "cup"},
+                    {"ingredient_id": str(other.id), "quantity": grams, "unit": "g"},
+                ],
+            },
+        )
+        assert response.status_code == 200
+        meal_ids.append(response.json()["id"])
+    # Days using the ingredient through a meal, and directly
+    meal_item = {
+        "type": "meal",
+        "meal_id": meal_ids[0],
+        "quantity": 1,
+        "unit": "servings",
+    }
+    day_urls = []
+    for day in (
+        {
+            "day_plan": {
+                "date": monday.isoformat(),
+                "day_meals": [{"items": [meal_item]}],
+            }
+        },
+        _day(ingredient.id, 100, monday),
+    ):
+        response = client.post(
+            f"{settings.API_V1_STR}/days/", json={"title": "Recompute", **day}
+        )
+        assert response.status_code == 200
+        day_urls.append(f"{settings.API_V1_STR}/days/{response.json()['id']}")
+    url = f"{settings.API_V1_STR}/nutrition/recompute-jobs"
+
+    # A name change doesn't queue a recomputation
+    response = client.put(
+        f"{settings.API_V1_STR}/ingredients/{ingredient.id}",
+        json={"name_en": "Renamed"},
+    )
+    assert response.status_code == 200
+    response = client.put(
+        f"{settings.API_V1_STR}/ingredients/{ingredient.id}",
+        json={"calories_per_100g": 200.0, "unit_conversions": {"cup": 100.0}},
+    )
+    assert response.status_code == 200
+    response = client.get(url, headers=superuser_token_headers)
+    assert response.status_code == 200
+    jobs = [
+        job
+        for job in response.json()["data"]
+        if job["ingredient_ids"] == [str(ingredient.id)]
+    ]
+    assert len(jobs) == 1
+    assert jobs[0]["status"] == "pending"
+    assert jobs[0]["progress"] == 0.0
+
+    # In a session of its own, like the periodic job
+    with Session(engine) as session:
+        run_recompute_jobs(session, chunk_size=2)
+    response = client.get(f"{url}/{jobs[0]['id']}", headers=superuser_token_headers)
+    job = response.json()
+    assert job["status"] == "done"
+    assert job["progress"] == 1.0
+    assert job["total_meals"] == job["processed_meals"] == job["updated_meals"] == 3
+    assert job["updated_days"] == 2
+    for meal_id in meal_ids:
+        meal = client.get(f"{settings.API_V1_STR}/meals/{meal_id}").json()
+        line = next(
+            line
+            for line in meal["meal_ingredients"]
+            if line["ingredient_id"] == str(ingredient.id)
+        )
+        assert line["calories"] == 200.0
+        assert meal["total_calories"] == round(
+            sum(line["calories"] for line in meal["meal_ingredients"]), 2
+        )
+    meal = client.get(f"{settings.API_V1_STR}/meals/{meal_ids[0]}").json()
+    days = [client.get(day_url).json() for day_url in day_urls]
+    assert [day["total_calories"] for day in days] == [meal["total_calories"], 200.0]
+    stats = _stats(client, superuser_token_headers, monday, monday, "day")
+    assert stats[0]["total_calories"] == meal["total_calories"] + 200.0
+
+    # Recomputing up-to-date meals writes nothing
+    response = client.post(
+        url, headers=superuser_token_headers, json={"ingredient_ids": [str(other.id)]}
+    )
+    assert response.status_code == 200
+    with Session(engine) as session:
+        run_recompute_jobs(session)
+    response = client.get(
+        f"{url}/{response.json()['id']}", headers=superuser_token_headers
+    )
+    job = response.json()
+    assert (
+        job["status"],
+        job["processed_meals"],
+        job["updated_meals"],
+        job["updated_days"],
+    ) == ("done", 3, 0, 0)
+
+
+def test_recompute_keeps_concurrent_meal_edits(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch, db: Session
+) -> None:
+    ingredient = create_random_ingredient(db)
+    meal_url = f"{settings.API_V1_STR}/meals/"
+
+    def meal_in(grams: float) -> dict[str, Any]:
+        return {
+            "name": "Concurrent",
+            "ingredients": [
+                {"ingredient_id": str(ingredient.id), "quantity": grams, "unit": "g"}
+            ],
+        }
+
+    response = client.post(meal_url, json=meal_in(100))
+    meal_id = uuid.UUID(response.json()["id"])
+    response = client.put(
+        f"{settings.API_V1_STR}/ingredients/{ingredient.id}",
+        json={"calories_per_100g": 321.0},
+    )
+    assert response.status_code == 200
+
+    # The meal is edited after the recomputation read it, before it writes
+    edit = threading.Thread(
+        target=lambda: client.put(f"{meal_url}{meal_id}", json=meal_in(200))
+    )
+    get_including = catalog.get_including
+
+    def edit_meanwhile(*args: Any, **kwargs: Any) -> Any:
+        if edit.ident is None:
+            edit.start()
+            edit.join(timeout=0.5)
+            # Waiting for the meal's lock
+            assert edit.is_alive()
+        return get_including(*args, **kwargs)
+
+    with Session(engine) as session:
+        monkeypatch.setattr(catalog, "get_including", edit_meanwhile)
+        assert recompute_meals(session, [meal_id]) == [meal_id]
+        session.commit()
+        monkeypatch.undo()
+    edit.join()
+
+    meal = client.get(f"{meal_url}{meal_id}").json()
+    assert meal["meal_ingredients"][0]["quantity"] == 200
+    assert meal["total_calories"] == 642.0
+    with Session(engine) as session:
+        assert recompute_meals(session, [meal_id]) == []
+
+
+def test_recompute_jobs_require_superuser(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/nutrition/recompute-jobs",
+        headers=normal_user_token_headers,
+    )
+    assert response.status_code == 403
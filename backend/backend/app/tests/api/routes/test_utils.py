@@ -0,0 +1,26 @@
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+
+
+def test_pool_metrics(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/utils/metrics/", headers=superuser_token_headers
+    )
+    assert response.status_code == 200
+    pool = response.json()["pools"]["sync"]
+    assert pool["size"] == settings.DB_POOL_SIZE
+    assert pool["checkouts"] > 0
+    assert pool["waiting"] == 0
+    assert pool["checkout_seconds_buckets"]["+Inf"] == pool["checkouts"]
+
+
+def test_pool_metrics_requires_superuser(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/utils/metrics/", headers=normal_user_token_headers
+    )
+    assert response.status_code == 403
@@ -0,0 +1,114 @@
+import gzip
+
+import brotli
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.api.caching import catalog_responses
+from app.api.compression import (
+    CompressionMiddleware,
+    accepts_encoding,
+    coded_etag,
+    negotiate_encoding,
+    uncoded_etag,
+)
+from app.core.config import settings
+from app.nutrition.catalog import catalog
+
+
+def test_negotiate_encoding() -> None:
+    assert negotiate_encoding("gzip, deflate, br") == "br"
+    assert negotiate_encoding("gzip, br;q=0.5") == "gzip"
+    assert negotiate_encoding("br;q=0, gzip") == "gzip"
+    assert negotiate_encoding("*") == "br"
+    assert negotiate_encoding("identity") is None
+    assert negotiate_encoding("") is None
+    assert negotiate_encoding("gzip;q=0") is None
+
+
+def test_accepts_encoding() -> None:
+    assert accepts_encoding("gzip, br", "gzip")
+    assert accepts_encoding("br;q=1, gzip;q=0.1", "gzip")
+    assert not accepts_encoding("gzip;q=0", "gzip")
+    assert not accepts_encoding("gzip;q=0, *", "gzip")
+    assert accepts_encoding("*", "gzip")
+    assert not accepts_encoding("br", "gzip")
+
+
+def test_large_responses_are_compressed(client: TestClient) -> None:
+    for i in range(20):
+        client.post(f"{settings.API_V1_STR}/meals/", json={"name": f"Tajine {i}"})
+    url = f"{settings.API_V1_STR}/meals/"
+
+    response = client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert len(response.json()["data"]) >= 20
+
+    response = client.get(url, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+
+    response = client.get(
+        f"{settings.API_V1_STR}/utils/health-check/",
+        headers={"Accept-Encoding": "gzip"},
+    )
+    assert "content-encoding" not in response.headers
+
+
+def test_catalog_response_is_precompressed(client: TestClient, db: Session) -> None:
+    url = f"{settings.API_V1_STR}/ingredients/"
+    response = client.get(url, headers={"Accept-Encoding": "br"})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "br"
+
+    cached = catalog_responses.get(catalog.get(db).version, str(response.url))
+    assert cached is not None
+    assert brotli.decompress(cached.encoded["br"]) == cached.content
+
+    stream = client.stream("GET", url, headers={"Accept-Encoding": "gzip"})
+    with stream as response:
+        body = b"".join(response.iter_raw())
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(body) == cached.content
+    assert cached.encoded["gzip"] == body
+
+
+def test_coded_etag() -> None:
+    assert coded_etag('"catalog-3"', "br") == '"catalog-3-br"'
+    assert coded_etag('W/"catalog-3"', "gzip") == 'W/"catalog-3"'
+    assert uncoded_etag('"catalog-3-gzip"') == '"catalog-3"'
+    assert uncoded_etag('"catalog-3"') == '"catalog-3"'
+
+
+def test_each_coding_has_its_own_etag(client: TestClient) -> None:
+    url = f"{settings.API_V1_STR}/ingredients/"
+    etags = {
+        coding: client.get(url, headers={"Accept-Encoding": coding}).headers["etag"]
+        for coding in ("br", "gzip", "identity")
+    }
+    assert len(set(etags.values())) == 3
+    assert etags["br"] == coded_etag(etags["identity"], "br")
+    assert etags["gzip"] == coded_etag(etags["identity"], "gzip")
+
+    for coding, etag in etags.items():
+        response = client.get(
+            url, headers={"Accept-Encoding": coding, "If-None-Match": etag}
+        )
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+
+
+def test_middleware_codes_the_etag() -> None:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=10)
+
+    @app.get("/")
+    def tagged() -> Response:
+        return Response(b"x" * 100, headers={"ETag": '"tag"'})
+
+    with TestClient(app) as tagged_client:
+        response = tagged_client.get("/", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["etag"] == '"tag-gzip"'
+        response = tagged_client.get("/", headers={"Accept-Encoding": "identity"})
+        assert response.headers["etag"] == '"tag"'
@@ -0,0 +1,61 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.core.db import engine
+from app.core.user_cache import user_cache
+from app.tests.utils.utils import random_email, random_lower_string
+
+
+def _signup(client: TestClient) -> dict[str, str]:
+    email, password = random_email(), random_lower_string()
+    r = client.post(
+        f"{settings.API_V1_STR}/users/signup",
+        json={"email": email, "password": password},
+    )
+    assert r.status_code == 200
+    r = client.post(
+        f"{settings.API_V1_STR}/login/access-token",
+        data={"username": email, "password": password},
+    )
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def test_current_user_is_cached(client: TestClient) -> None:
+    headers = _signup(client)
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert r.status_code == 200
+
+    statements: list[str] = []
+
+    def record(_conn, _cursor, statement, *_args) -> None:  # type: ignore[no-untyped-def]
+        statements.append(statement)
+
+    hits = user_cache.hits
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert r.status_code == 200
+    assert user_cache.hits == hits + 1
+    assert not any('FROM "user"' in statement for statement in statements)
+
+
+def test_current_user_cache_invalidated_on_update(client: TestClient) -> None:
+    headers = _signup(client)
+    client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+
+    r = client.patch(
+        f"{settings.API_V1_STR}/users/me",
+        headers=headers,
+        json={"full_name": "Updated Name"},
+    )
+    assert r.status_code == 200
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert r.json()["full_name"] == "Updated Name"
+
+    r = client.post(f"{settings.API_V1_STR}/users/me/deactivate", headers=headers)
+    assert r.status_code == 200
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert r.status_code == 401
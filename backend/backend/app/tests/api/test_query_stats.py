@@ -0,0 +1,79 @@
+import logging
+import re
+from collections.abc import Callable
+from contextlib import AbstractContextManager
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from sqlmodel import Session, text
+
+from app.core.config import settings
+from app.core.db import engine
+from app.core.query_stats import QueryStats, QueryStatsMiddleware
+
+
+def _lookup(i: int) -> int:
+    with Session(engine) as session:
+        return session.exec(text("SELECT :i"), params={"i": i}).scalar_one()  # type: ignore[call-overload,no-any-return]
+
+
+def test_server_timing_header() -> None:
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware, repeated_threshold=0)
+
+    @app.get("/lookup")
+    def lookup() -> int:
+        return _lookup(1)
+
+    with TestClient(app) as client:
+        response = client.get("/lookup")
+    assert response.status_code == 200
+    timing = re.fullmatch(
+        r'db;dur=[\d.]+;desc="(\d+) queries"', response.headers["server-timing"]
+    )
+    assert timing is not None
+    assert int(timing.group(1)) == 1
+
+
+def test_streamed_response_has_no_server_timing() -> None:
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware, repeated_threshold=0)
+
+    @app.get("/lookups")
+    def lookups() -> StreamingResponse:
+        return StreamingResponse(f"{_lookup(i)}\n" for i in range(2))
+
+    with TestClient(app) as client:
+        response = client.get("/lookups")
+    assert response.text == "0\n1\n"
+    assert "server-timing" not in response.headers
+
+
+def test_repeated_statements_are_logged(caplog: pytest.LogCaptureFixture) -> None:
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware, repeated_threshold=3)
+
+    @app.get("/lookups")
+    def lookups() -> list[int]:
+        with Session(engine) as session:
+            return [
+                session.exec(text("SELECT :i"), params={"i": i}).scalar_one()  # type: ignore[call-overload]
+                for i in range(3)
+            ]
+
+    with caplog.at_level(logging.WARNING), TestClient(app) as client:
+        response = client.get("/lookups")
+    assert response.json() == [0, 1, 2]
+    assert response.headers["server-timing"].endswith('desc="3 queries"')
+    assert "GET /lookups ran the same statement 3 times" in caplog.text
+
+
+def test_max_queries(
+    client: TestClient,
+    max_queries: Callable[[int], AbstractContextManager[QueryStats]],
+) -> None:
+    with pytest.raises(AssertionError, match="expected at most 0"):
+        with max_queries(0):
+            client.get(f"{settings.API_V1_STR}/meals/")
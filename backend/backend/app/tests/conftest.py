@@ -1,16 +1,23 @@
-from collections.abc import Generator
+from collections.abc import Callable, Generator
+from contextlib import AbstractContextManager, contextmanager
 
 import pytest
 from fastapi.testclient import TestClient
 from sqlmodel import Session, delete
 
 from app.core.config import settings
-from app.core.db import engine, init_db
+from app.core.db import async_engine, engine, init_db
+from app.core.query_stats import QueryStats, instrument_queries, observe_queries
 from app.main import app
 from app.models.models import Item, User
 from app.tests.utils.user import authentication_token_from_email
 from app.tests.utils.utils import get_superuser_token_headers
 
+if not settings.SQL_STATS:
+    # max_queries counts the statements recorded by the SQL_STATS events
+    instrument_queries(engine)
+    instrument_queries(async_engine.sync_engine)
+
 
 @pytest.fixture(scope="session", autouse=True)
 def db() -> Generator[Session, None, None]:
@@ -40,3 +47,21 @@ def normal_user_token_headers(client: TestClient, db: Session) -> dict[str, str]
     return authentication_token_from_email(
         client=client, email=settings.EMAIL_TEST_USER, db=db
     )
+
+
+@pytest.fixture
+def max_queries() -> Callable[[int], AbstractContextManager[QueryStats]]:
+    """
+    ``with max_queries(3): client.get(...)`` fails when the block runs more
+    than 3 SQL statements, and lists them.
+    """
+
+    @contextmanager
+    def check(limit: int) -> Generator[QueryStats, None, None]:
+        with observe_queries() as stats:
+            yield stats
+        assert stats.count <= limit, (
+            f"{stats.count} queries, expected at most {limit}:\n{stats.report()}"
+        )
+
+    return check
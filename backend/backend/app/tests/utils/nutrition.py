@@ -0,0 +1,40 @@
+from sqlmodel import Session
+
+from app.models.nutrition import Category, Ingredient
+from app.nutrition.units import sync_ingredient_units
+from app.tests.utils.utils import random_lower_string
+
+
+def create_random_category(db: Session) -> Category:
+    name = random_lower_string()
+    category = Category(name_fr=name, name_en=name, name_ar=name)
+    db.add(category)
+    db.commit()
+    db.refresh(category)
+    return category
+
+
+def create_random_ingredient(db: Session, **overrides: object) -> Ingredient:
+    category = create_random_category(db)
+    name = random_lower_string()
+    data: dict[str, object] = {
+        "category_id": category.id,
+        "name_fr": name,
+        "name_en": name,
+        "name_ar": name,
+        "calories_per_100g": 376.0,
+        "protein_per_100g": 12.8,
+        "carbohydrates_per_100g": 77.4,
+        "fat_per_100g": 0.6,
+        "fiber_per_100g": 5.0,
+        "sodium_per_100g": 10.0,
+        "measurement_units": ["g", "cup"],
+        "unit_conversions": {"cup": 175.0},
+    }
+    data.update(overrides)
+    ingredient = Ingredient.model_validate(data)
+    sync_ingredient_units(ingredient)
+    db.add(ingredient)
+    db.commit()
+    db.refresh(ingredient)
+    return ingredient
@@ -3,7 +3,8 @@ from sqlmodel import Session
 
 from app.core.config import settings
 from app.crud import crud
-from app.models.models import User, UserCreate, UserUpdate
+from app.models.models import User
+from app.schemas.users import UserCreate, UserUpdate
 from app.tests.utils.utils import random_email, random_lower_string
 
 
@@ -1,7 +1,9 @@
 import random
 import string
 
+import pytest
 from fastapi.testclient import TestClient
+from sqlmodel import Session, text
 
 from app.core.config import settings
 
@@ -24,3 +26,11 @@ def get_superuser_token_headers(client: TestClient) -> dict[str, str]:
     a_token = tokens["access_token"]
     headers = {"Authorization": f"Bearer {a_token}"}
     return headers
+
+
+def require_extensions(db: Session, *names: str) -> None:
+    """Skip the test unless the database has every extension in ``names``."""
+    installed = set(db.execute(text("SELECT extname FROM pg_extension")).scalars())
+    missing = sorted(set(names) - installed)
+    if missing:
+        pytest.skip(f"PostgreSQL extensions not installed: {', '.join(missing)}")
@@ -0,0 +1,53 @@
+import pytest
+from fastapi.testclient import TestClient
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from benchmarks.conftest import API, Dataset
+
+pytestmark = pytest.mark.benchmark(group="days")
+
+
+def test_list_by_calories(benchmark: BenchmarkFixture, client: TestClient) -> None:
+    def list_days() -> None:
+        response = client.get(
+            f"{API}/days/",
+            params={
+                "sort": "total_calories",
+                "min_calories": 1500,
+                "max_calories": 2500,
+                "limit": 50,
+            },
+        )
+        assert response.status_code == 200
+
+    benchmark(list_days)
+
+
+def test_get(benchmark: BenchmarkFixture, client: TestClient, dataset: Dataset) -> None:
+    def get() -> None:
+        response = client.get(f"{API}/days/{dataset.day_id()}")
+        assert response.status_code == 200
+
+    benchmark(get)
+
+
+def test_create(
+    benchmark: BenchmarkFixture, client: TestClient, dataset: Dataset
+) -> None:
+    def create() -> None:
+        response = client.post(f"{API}/days/", json=dataset.day_payload())
+        assert response.status_code == 200
+
+    benchmark(create)
+
+
+def test_update(
+    benchmark: BenchmarkFixture, client: TestClient, dataset: Dataset
+) -> None:
+    day = client.post(f"{API}/days/", json=dataset.day_payload()).json()
+
+    def update() -> None:
+        response = client.put(f"{API}/days/{day['id']}", json=dataset.day_payload())
+        assert response.status_code == 200
+
+    benchmark(update)
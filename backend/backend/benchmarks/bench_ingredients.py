@@ -0,0 +1,69 @@
+import pytest
+from fastapi.testclient import TestClient
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from benchmarks.conftest import API, Dataset
+
+pytestmark = pytest.mark.benchmark(group="ingredients")
+
+
+def test_search(
+    benchmark: BenchmarkFixture, client: TestClient, dataset: Dataset
+) -> None:
+    def search() -> None:
+        response = client.get(
+            f"{API}/ingredients/",
+            params={"search": dataset.search_term(), "limit": 20},
+        )
+        assert response.status_code == 200
+
+    benchmark(search)
+
+
+def test_ranked_search_with_typo(
+    benchmark: BenchmarkFixture, client: TestClient, dataset: Dataset
+) -> None:
+    def search() -> None:
+        # Drop a letter to exercise the trigram similarity path
+        term = dataset.search_term()
+        response = client.get(
+            f"{API}/ingredients/",
+            params={"search": term[:-2] + term[-1], "ranked": True, "limit": 20},
+        )
+        assert response.status_code == 200
+
+    benchmark(search)
+
+
+def test_catalog_page(
+    benchmark: BenchmarkFixture, client: TestClient, dataset: Dataset
+) -> None:
+    def catalog_page() -> None:
+        response = client.get(
+            f"{API}/ingredients/",
+            params={"skip": dataset.rng.randrange(0, 1000, 100), "limit": 100},
+        )
+        assert response.status_code == 200
+
+    benchmark(catalog_page)
+
+
+def test_get(benchmark: BenchmarkFixture, client: TestClient, dataset: Dataset) -> None:
+    def get() -> None:
+        response = client.get(f"{API}/ingredients/{dataset.ingredient_id()}")
+        assert response.status_code == 200
+
+    benchmark(get)
+
+
+def test_similar(
+    benchmark: BenchmarkFixture, client: TestClient, dataset: Dataset
+) -> None:
+    def similar() -> None:
+        response = client.get(
+            f"{API}/ingredients/{dataset.ingredient_id()}/similar",
+            params={"k": 10, "same_category": dataset.rng.random() < 0.5},
+        )
+        assert response.status_code == 200
+
+    benchmark(similar)
@@ -0,0 +1,93 @@
+import pytest
+from fastapi.testclient import TestClient
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from benchmarks.conftest import API, Dataset
+from benchmarks.generate import DISHES
+
+pytestmark = pytest.mark.benchmark(group="meals")
+
+
+def test_list(benchmark: BenchmarkFixture, client: TestClient) -> None:
+    def list_meals() -> None:
+        response = client.get(f"{API}/meals/", params={"limit": 50})
+        assert response.status_code == 200
+
+    benchmark(list_meals)
+
+
+def test_list_sparse(benchmark: BenchmarkFixture, client: TestClient) -> None:
+    def list_meals() -> None:
+        response = client.get(
+            f"{API}/meals/",
+            params={"limit": 50, "fields": "id,name,total_calories"},
+        )
+        assert response.status_code == 200
+
+    benchmark(list_meals)
+
+
+def test_list_next_page(benchmark: BenchmarkFixture, client: TestClient) -> None:
+    first = client.get(f"{API}/meals/", params={"limit": 50, "include_count": False})
+    cursor = first.json()["next_cursor"]
+
+    def next_page() -> None:
+        response = client.get(
+            f"{API}/meals/",
+            params={"limit": 50, "cursor": cursor, "include_count": False},
+        )
+        assert response.status_code == 200
+
+    benchmark(next_page)
+
+
+def test_search(
+    benchmark: BenchmarkFixture, client: TestClient, dataset: Dataset
+) -> None:
+    def search() -> None:
+        response = client.get(
+            f"{API}/meals/", params={"search": dataset.rng.choice(DISHES), "limit": 20}
+        )
+        assert response.status_code == 200
+
+    benchmark(search)
+
+
+def test_get(benchmark: BenchmarkFixture, client: TestClient, dataset: Dataset) -> None:
+    def get() -> None:
+        response = client.get(f"{API}/meals/{dataset.meal_id()}")
+        assert response.status_code == 200
+
+    benchmark(get)
+
+
+def test_similar(
+    benchmark: BenchmarkFixture, client: TestClient, dataset: Dataset
+) -> None:
+    def similar() -> None:
+        response = client.get(f"{API}/meals/{dataset.meal_id()}/similar")
+        assert response.status_code == 200
+
+    benchmark(similar)
+
+
+def test_create(
+    benchmark: BenchmarkFixture, client: TestClient, dataset: Dataset
+) -> None:
+    def create() -> None:
+        response = client.post(f"{API}/meals/", json=dataset.meal_payload())
+        assert response.status_code == 200
+
+    benchmark(create)
+
+
+def test_update(
+    benchmark: BenchmarkFixture, client: TestClient, dataset: Dataset
+) -> None:
+    meal = client.post(f"{API}/meals/", json=dataset.meal_payload()).json()
+
+    def update() -> None:
+        response = client.put(f"{API}/meals/{meal['id']}", json=dataset.meal_payload())
+        assert response.status_code == 200
+
+    benchmark(update)
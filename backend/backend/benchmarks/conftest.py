@@ -0,0 +1,131 @@
+import random
+from collections.abc import Generator
+from dataclasses import dataclass
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, text
+
+from app.core.db import engine
+from app.main import app
+from benchmarks.generate import BASE_INGREDIENTS, DAY_SLOTS, MARKER
+
+API = "/api/v1"
+# Tables whose size is saved with every benchmark run
+DATASET_TABLES = ("user", "ingredients", "meals", "meal_ingredients", "saved_days")
+
+
+@dataclass
+class Dataset:
+    """A sample of the generated rows, picked from at random by benchmarks."""
+
+    ingredient_ids: list[str]
+    meal_ids: list[str]
+    day_ids: list[str]
+    rng: random.Random
+
+    def ingredient_id(self) -> str:
+        return self.rng.choice(self.ingredient_ids)
+
+    def meal_id(self) -> str:
+        return self.rng.choice(self.meal_ids)
+
+    def day_id(self) -> str:
+        return self.rng.choice(self.day_ids)
+
+    def search_term(self) -> str:
+        return self.rng.choice(self.rng.choice(BASE_INGREDIENTS))
+
+    def meal_payload(self, lines: int = 5) -> dict[str, object]:
+        return {
+            "name": "Benchmark meal",
+            "description": MARKER,
+            "ingredients": [
+                {
+                    "ingredient_id": self.ingredient_id(),
+                    "quantity": self.rng.choice((25, 50, 100, 150)),
+                    "unit": "g",
+                }
+                for _ in range(lines)
+            ],
+        }
+
+    def day_payload(self) -> dict[str, object]:
+        """A day of a meal and an ingredient in each slot."""
+        return {
+            "title": "Benchmark day",
+            "description": MARKER,
+            "day_plan": {
+                "day_meals": [
+                    {
+                        "id": slot.lower(),
+                        "name": slot,
+                        "items": [
+                            {
+                                "type": "meal",
+                                "meal_id": self.meal_id(),
+                                "quantity": 1,
+                                "unit": "servings",
+                            },
+                            {
+                                "type": "ingredient",
+                                "ingredient_id": self.ingredient_id(),
+                                "quantity": 100,
+                                "unit": "g",
+                            },
+                        ],
+                    }
+                    for slot in DAY_SLOTS
+                ]
+            },
+        }
+
+
+def pytest_benchmark_update_machine_info(machine_info: dict[str, Any]) -> None:
+    """
+    Save the dataset size next to the machine: runs are only comparable when
+    both match.
+    """
+    with Session(engine) as session:
+        machine_info["dataset"] = {
+            table: session.execute(text(f'SELECT count(*) FROM "{table}"')).scalar()
+            for table in DATASET_TABLES
+        }
+
+
+def _sample(session: Session, statement: str, size: int = 1000) -> list[str]:
+    rows = session.execute(text(statement), {"marker": MARKER, "size": size})
+    return [str(row[0]) for row in rows]
+
+
+@pytest.fixture(scope="session")
+def dataset() -> Dataset:
+    with Session(engine) as session:
+        dataset = Dataset(
+            ingredient_ids=_sample(
+                session,
+                "SELECT id FROM ingredients WHERE tags::jsonb ? :marker "
+                "ORDER BY random() LIMIT :size",
+            ),
+            meal_ids=_sample(
+                session,
+                "SELECT id FROM meals WHERE description = :marker "
+                "ORDER BY random() LIMIT :size",
+            ),
+            day_ids=_sample(
+                session,
+                "SELECT id FROM saved_days WHERE description = :marker "
+                "ORDER BY random() LIMIT :size",
+            ),
+            rng=random.Random(0),
+        )
+    if not (dataset.ingredient_ids and dataset.meal_ids and dataset.day_ids):
+        pytest.skip("No benchmark data, run python -m benchmarks.generate first")
+    return dataset
+
+
+@pytest.fixture(scope="session")
+def client() -> Generator[TestClient, None, None]:
+    with TestClient(app) as c:
+        yield c
@@ -0,0 +1,384 @@
+"""
+Synthetic nutrition data for the benchmarks.
+
+    python -m benchmarks.generate --users 100 --ingredients 10000 --meals 1000000
+    python -m benchmarks.generate --reset
+
+Seeds the nutrition categories if needed, then creates users, ingredients
+spread over the categories, meals with their ingredient lines and saved days
+built from those meals. Meals, lines and days are written with COPY in
+batches; their nutrition values are computed like the API computes gram
+quantities. Every generated row is marked (see ``MARKER``) so ``--reset``
+removes it again, together with rows the benchmarks create.
+"""
+
+import argparse
+import json
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+import numpy as np
+from numpy.typing import NDArray
+from psycopg import Connection, Cursor
+from sqlmodel import Session, select, text
+
+from app.core.db import engine
+from app.core.security import get_password_hash
+from app.models.models import User
+from app.models.nutrition import Category, Ingredient
+from app.models.seeds.seed_nutrition_data import seed_nutrition_data
+from app.nutrition.catalog import bump_catalog_version
+from app.nutrition.day_plan import DAY_NUTRITION_FIELDS
+from app.nutrition.engine import NUTRIENTS, PER_100G_FIELDS, TOTAL_FIELDS
+from app.nutrition.meal_similarity import fingerprint
+
+# Description of generated meals and days, and tag of generated ingredients
+MARKER = "benchmark"
+EMAIL_DOMAIN = "benchmark.example.com"
+PASSWORD = "benchmark-password"
+BATCH_SIZE = 10_000
+
+# (en, fr, ar) names ingredients are derived from; also the search terms
+BASE_INGREDIENTS = (
+    ("Lentils", "Lentilles", "عدس"),
+    ("Chickpeas", "Pois chiches", "حمص"),
+    ("Couscous", "Couscous", "كسكس"),
+    ("Semolina", "Semoule", "سميد"),
+    ("Olive oil", "Huile d'olive", "زيت الزيتون"),
+    ("Almonds", "Amandes", "لوز"),
+    ("Dates", "Dattes", "تمر"),
+    ("Lamb", "Agneau", "لحم الغنم"),
+    ("Chicken", "Poulet", "دجاج"),
+    ("Sardines", "Sardines", "سردين"),
+    ("Tomatoes", "Tomates", "طماطم"),
+    ("Mint", "Menthe", "نعناع"),
+    ("Cumin", "Cumin", "كمون"),
+    ("Saffron", "Safran", "زعفران"),
+    ("Honey", "Miel", "عسل"),
+    ("Yogurt", "Yaourt", "لبن"),
+)
+VARIANTS = ("fresh", "dried", "ground", "roasted", "organic", "smoked", "whole")
+DISHES = (
+    "Tagine",
+    "Couscous",
+    "Harira",
+    "Pastilla",
+    "Rfissa",
+    "Tanjia",
+    "Zaalouk",
+    "Bissara",
+    "Msemen",
+    "Baghrir",
+)
+DAY_SLOTS = ("Breakfast", "Lunch", "Dinner")
+GRAMS = np.array([10.0, 25.0, 50.0, 75.0, 100.0, 150.0, 200.0, 250.0])
+
+MEAL_COLUMNS = (
+    "id",
+    "user_id",
+    "name",
+    "description",
+    "servings",
+    *TOTAL_FIELDS,
+    "is_favorite",
+    "is_traditional",
+    "fingerprint",
+    "created_at",
+    "updated_at",
+)
+LINE_COLUMNS = (
+    "id",
+    "meal_id",
+    "ingredient_id",
+    "quantity",
+    "unit",
+    *NUTRIENTS,
+    "created_at",
+)
+DAY_COLUMNS = (
+    "id",
+    "user_id",
+    "title",
+    "description",
+    "day_plan",
+    *TOTAL_FIELDS,
+    "meal_ids",
+    "created_at",
+    "updated_at",
+)
+
+
+def _copy(table: str, columns: tuple[str, ...]) -> str:
+    return f"COPY {table} ({', '.join(columns)}) FROM STDIN"
+
+
+def _created_at(rng: np.random.Generator, count: int) -> list[datetime]:
+    """Timestamps spread over the past year."""
+    now = datetime.now(timezone.utc)
+    return [
+        now - timedelta(seconds=float(seconds))
+        for seconds in rng.uniform(0, 365 * 86400, count)
+    ]
+
+
+def generate_users(session: Session, count: int) -> list[uuid.UUID]:
+    # One hash for every user: bcrypt would dominate the run otherwise
+    hashed_password = get_password_hash(PASSWORD)
+    users = [
+        User(
+            email=f"user-{i}@{EMAIL_DOMAIN}",
+            full_name=f"Benchmark user {i}",
+            hashed_password=hashed_password,
+        )
+        for i in range(count)
+    ]
+    session.add_all(users)
+    session.commit()
+    return [user.id for user in users]
+
+
+def generate_ingredients(
+    session: Session, rng: np.random.Generator, count: int
+) -> tuple[list[uuid.UUID], NDArray[np.float64]]:
+    """Ingredients over every category; returns their ids and nutrient rows."""
+    category_ids = session.exec(select(Category.id)).all()
+    nutrients = np.round(
+        rng.uniform(0, 1, (count, len(NUTRIENTS)))
+        * np.array([600.0, 30.0, 80.0, 50.0, 15.0, 500.0]),
+        1,
+    )
+    ingredients = []
+    for i in range(count):
+        en, fr, ar = BASE_INGREDIENTS[i % len(BASE_INGREDIENTS)]
+        variant = VARIANTS[(i // len(BASE_INGREDIENTS)) % len(VARIANTS)]
+        ingredients.append(
+            Ingredient(
+                category_id=category_ids[i % len(category_ids)],
+                name_en=f"{en} {variant} {i}",
+                name_fr=f"{fr} {variant} {i}",
+                name_ar=f"{ar} {i}",
+                measurement_units=["g"],
+                tags=[MARKER, variant],
+                is_traditional=bool(rng.random() < 0.3),
+                is_halal=bool(rng.random() < 0.9),
+                **dict(zip(PER_100G_FIELDS, nutrients[i].tolist(), strict=True)),
+            )
+        )
+    session.add_all(ingredients)
+    bump_catalog_version(session)
+    session.commit()
+    return [ingredient.id for ingredient in ingredients], nutrients
+
+
+def generate_meals(
+    cursor: Cursor[Any],
+    rng: np.random.Generator,
+    count: int,
+    user_ids: list[uuid.UUID],
+    ingredient_ids: list[uuid.UUID],
+    nutrients: NDArray[np.float64],
+    lines_per_meal: tuple[int, int],
+) -> tuple[list[uuid.UUID], NDArray[np.float64]]:
+    """
+    Meals of ``lines_per_meal`` (min, max) gram lines each. Returns the ids
+    and totals of the first batch, to build days from.
+    """
+    sample: tuple[list[uuid.UUID], NDArray[np.float64]] | None = None
+    for start in range(0, count, BATCH_SIZE):
+        size = min(BATCH_SIZE, count - start)
+        counts = rng.integers(lines_per_meal[0], lines_per_meal[1] + 1, size)
+        rows = rng.integers(0, len(ingredient_ids), int(counts.sum()))
+        grams = rng.choice(GRAMS, len(rows))
+        # Same rounding as engine.compute_meals
+        lines = np.round(nutrients[rows] * (grams / 100.0)[:, np.newaxis], 2)
+        totals = np.zeros((size, len(NUTRIENTS)))
+        np.add.at(totals, np.repeat(np.arange(size), counts), lines)
+        totals = np.round(totals, 2)
+
+        meal_ids = [uuid.uuid4() for _ in range(size)]
+        created_at = _created_at(rng, size)
+        owners = rng.integers(0, len(user_ids), size) if user_ids else None
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+        with cursor.copy(_copy("meals", MEAL_COLUMNS)) as copy:
+            for i, meal_id in enumerate(meal_ids):
+                copy.write_row(
+                    (
+                        meal_id,
+                        user_ids[owners[i]] if owners is not None else None,
+                        f"{DISHES[(start + i) % len(DISHES)]} {start + i}",
+                        MARKER,
+                        1.0,
+                        *totals[i].tolist(),
+                        bool(rng.random() < 0.1),
+                        bool(rng.random() < 0.3),
+                        fingerprint(
+                            ingredient_ids[row]
+                            for row in rows[offsets[i] : offsets[i + 1]]
+                        ),
+                        created_at[i],
+                        created_at[i],
+                    )
+                )
+        line_meals = np.repeat(np.arange(size), counts)
+        with cursor.copy(_copy("meal_ingredients", LINE_COLUMNS)) as copy:
+            for line, (meal, row) in enumerate(zip(line_meals, rows, strict=True)):
+                copy.write_row(
+                    (
+                        uuid.uuid4(),
+                        meal_ids[meal],
+                        ingredient_ids[row],
+                        float(grams[line]),
+                        "g",
+                        *lines[line].tolist(),
+                        created_at[meal],
+                    )
+                )
+        if sample is None:
+            sample = (meal_ids, totals)
+        print(f"  meals: {start + size}/{count}", flush=True)
+    return sample or ([], np.zeros((0, len(NUTRIENTS))))
+
+
+def generate_days(
+    cursor: Cursor[Any],
+    rng: np.random.Generator,
+    per_user: int,
+    user_ids: list[uuid.UUID],
+    meals: tuple[list[uuid.UUID], NDArray[np.float64]],
+) -> int:
+    """Saved days of one serving of a meal per slot, for every user."""
+    meal_ids, meal_totals = meals
+    if not meal_ids:
+        return 0
+    count = 0
+    with cursor.copy(_copy("saved_days", DAY_COLUMNS)) as copy:
+        for user_id in user_ids:
+            created_at = _created_at(rng, per_user)
+            for day in range(per_user):
+                picks = rng.integers(0, len(meal_ids), len(DAY_SLOTS))
+                slots = [
+                    {
+                        "id": slot.lower(),
+                        "name": slot,
+                        "items": [
+                            {
+                                "id": str(uuid.uuid4()),
+                                "type": "meal",
+                                "meal_id": str(meal_ids[pick]),
+                                "quantity": 1,
+                                "unit": "servings",
+                            }
+                        ],
+                        "total_nutrition": dict(
+                            zip(
+                                DAY_NUTRITION_FIELDS,
+                                meal_totals[pick].tolist(),
+                                strict=True,
+                            )
+                        ),
+                    }
+                    for slot, pick in zip(DAY_SLOTS, picks, strict=True)
+                ]
+                totals = np.round(meal_totals[picks].sum(axis=0), 2).tolist()
+                plan = {
+                    "date": created_at[day].date().isoformat(),
+                    "day_meals": slots,
+                    "total_nutrition": dict(
+                        zip(DAY_NUTRITION_FIELDS, totals, strict=True)
+                    ),
+                }
+                copy.write_row(
+                    (
+                        uuid.uuid4(),
+                        user_id,
+                        f"Day {day}",
+                        MARKER,
+                        json.dumps(plan),
+                        *totals,
+                        list(dict.fromkeys(meal_ids[pick] for pick in picks)),
+                        created_at[day],
+                        created_at[day],
+                    )
+                )
+                count += 1
+    return count
+
+
+def reset(session: Session) -> None:
+    """Delete every generated row and the rows benchmarks created."""
+    params = {"marker": MARKER, "emails": f"%@{EMAIL_DOMAIN}"}
+    for statement in (
+        "DELETE FROM meal_ingredients WHERE meal_id IN "
+        "(SELECT id FROM meals WHERE description = :marker)",
+        "DELETE FROM meals WHERE description = :marker",
+        "DELETE FROM saved_days WHERE description = :marker",
+        "DELETE FROM ingredients WHERE tags::jsonb ? :marker",
+        "DELETE FROM refresh_tokens WHERE user_id IN "
+        '(SELECT id FROM "user" WHERE email LIKE :emails)',
+        'DELETE FROM "user" WHERE email LIKE :emails',
+    ):
+        session.execute(text(statement), params)
+    bump_catalog_version(session)
+    session.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--ingredients", type=int, default=10_000)
+    parser.add_argument("--meals", type=int, default=1_000_000)
+    parser.add_argument("--days-per-user", type=int, default=30)
+    parser.add_argument("--min-lines", type=int, default=3)
+    parser.add_argument("--max-lines", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--reset", action="store_true", help="delete generated data and exit"
+    )
+    args = parser.parse_args()
+
+    if args.reset:
+        with Session(engine) as session:
+            reset(session)
+        print("Benchmark data deleted.")
+        return
+
+    started = time.perf_counter()
+    rng = np.random.default_rng(args.seed)
+    seed_nutrition_data()
+    with Session(engine) as session:
+        user_ids = generate_users(session, args.users)
+        print(f"users: {len(user_ids)}", flush=True)
+        ingredient_ids, nutrients = generate_ingredients(session, rng, args.ingredients)
+        print(f"ingredients: {len(ingredient_ids)}", flush=True)
+
+    connection = engine.raw_connection()
+    try:
+        driver = connection.driver_connection
+        assert isinstance(driver, Connection)
+        with driver.cursor() as cursor:
+            meals = generate_meals(
+                cursor,
+                rng,
+                args.meals,
+                user_ids,
+                ingredient_ids,
+                nutrients,
+                (args.min_lines, args.max_lines),
+            )
+            driver.commit()
+            days = generate_days(cursor, rng, args.days_per_user, user_ids, meals)
+            print(f"days: {days}", flush=True)
+            driver.commit()
+    finally:
+        connection.close()
+
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for table in ("ingredients", "meals", "meal_ingredients", "saved_days"):
+            conn.execute(text(f"ANALYZE {table}"))
+    print(f"Done in {time.perf_counter() - started:.0f}s.")
+
+
+if __name__ == "__main__":
+    main()
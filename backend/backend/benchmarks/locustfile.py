@@ -0,0 +1,130 @@
+"""
+Load test of the nutrition API, against a running server with generated data:
+
+    locust -f benchmarks/locustfile.py --host http://localhost:8000 \
+        --users 50 --spawn-rate 10 --run-time 2m --headless \
+        --csv benchmarks/results/load
+
+Each simulated user mostly reads (search, lists, single meals) and sometimes
+writes meals and days, in roughly the proportions of the frontend.
+"""
+
+import random
+from typing import Any
+
+from locust import HttpUser, between, task
+
+API = "/api/v1"
+MARKER = "benchmark"
+SEARCH_TERMS = ("lentils", "pois chiches", "couscous", "amandes", "poulet", "mint")
+DAY_SLOTS = ("Breakfast", "Lunch", "Dinner")
+
+
+class NutritionUser(HttpUser):
+    wait_time = between(0.5, 2)
+
+    def on_start(self) -> None:
+        ingredients = self.client.get(
+            f"{API}/ingredients/", params={"limit": 500, "fields": "id"}
+        ).json()["data"]
+        meals = self.client.get(
+            f"{API}/meals/",
+            params={"limit": 500, "fields": "id", "include_count": False},
+        ).json()["data"]
+        self.ingredient_ids = [ingredient["id"] for ingredient in ingredients]
+        self.meal_ids = [meal["id"] for meal in meals]
+        self.own_meal_ids: list[str] = []
+
+    def _lines(self) -> list[dict[str, Any]]:
+        return [
+            {
+                "ingredient_id": random.choice(self.ingredient_ids),
+                "quantity": random.choice((25, 50, 100, 150)),
+                "unit": "g",
+            }
+            for _ in range(random.randint(3, 8))
+        ]
+
+    @task(6)
+    def search_ingredients(self) -> None:
+        self.client.get(
+            f"{API}/ingredients/",
+            params={"search": random.choice(SEARCH_TERMS), "limit": 20},
+            name="/ingredients/?search",
+        )
+
+    @task(3)
+    def browse_catalog(self) -> None:
+        self.client.get(
+            f"{API}/ingredients/",
+            params={"skip": random.randrange(0, 1000, 100), "limit": 100},
+            name="/ingredients/",
+        )
+
+    @task(4)
+    def list_meals(self) -> None:
+        self.client.get(f"{API}/meals/", params={"limit": 50}, name="/meals/")
+
+    @task(4)
+    def get_meal(self) -> None:
+        self.client.get(
+            f"{API}/meals/{random.choice(self.meal_ids)}", name="/meals/{id}"
+        )
+
+    @task(2)
+    def list_days(self) -> None:
+        self.client.get(
+            f"{API}/days/",
+            params={"sort": "total_calories", "limit": 50},
+            name="/days/",
+        )
+
+    @task(1)
+    def create_meal(self) -> None:
+        response = self.client.post(
+            f"{API}/meals/",
+            json={
+                "name": "Load test meal",
+                "description": MARKER,
+                "ingredients": self._lines(),
+            },
+        )
+        if response.ok:
+            self.own_meal_ids.append(response.json()["id"])
+
+    @task(1)
+    def update_meal(self) -> None:
+        if not self.own_meal_ids:
+            return
+        self.client.put(
+            f"{API}/meals/{random.choice(self.own_meal_ids)}",
+            json={"ingredients": self._lines()},
+            name="/meals/{id}",
+        )
+
+    @task(1)
+    def create_day(self) -> None:
+        self.client.post(
+            f"{API}/days/",
+            json={
+                "title": "Load test day",
+                "description": MARKER,
+                "day_plan": {
+                    "day_meals": [
+                        {
+                            "id": slot.lower(),
+                            "name": slot,
+                            "items": [
+                                {
+                                    "type": "meal",
+                                    "meal_id": random.choice(self.meal_ids),
+                                    "quantity": 1,
+                                    "unit": "servings",
+                                }
+                            ],
+                        }
+                        for slot in DAY_SLOTS
+                    ]
+                },
+            },
+        )
@@ -0,0 +1,27 @@
+#!/usr/bin/env bash
+# Run the benchmarks against $POSTGRES_DB (app_bench by default):
+#   bash scripts/benchmark.sh save [name]  record a baseline for this machine
+#   bash scripts/benchmark.sh compare      compare with this machine's last run,
+#                                          failing when a mean is 15% slower
+# Extra arguments are passed to pytest.
+
+set -e
+set -x
+
+export POSTGRES_DB="${POSTGRES_DB:-app_bench}"
+
+case "${1:-}" in
+    save)
+        name="${2:-baseline}"
+        shift $(( $# < 2 ? $# : 2 ))
+        python -m pytest benchmarks --benchmark-save="$name" "$@"
+        ;;
+    compare)
+        shift
+        python -m pytest benchmarks --benchmark-compare --benchmark-compare-fail=mean:15% "$@"
+        ;;
+    *)
+        echo "usage: $0 save [name] | compare" >&2
+        exit 2
+        ;;
+esac